@@ -11,15 +11,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import hashlib
 
 from oslo.config import cfg
 from oslo.serialization import jsonutils as json
 from oslo.utils import importutils
+from oslo.utils import timeutils
 import requests
 import webob
 
 from heat.api.aws import exception
+from heat.common import cache
 from heat.common.i18n import _
 from heat.common.i18n import _LE
 from heat.common.i18n import _LI
@@ -39,10 +42,29 @@ opts = [
                 default=[],
                 help=_('Allowed keystone endpoints for auth_uri when '
                        'multi_cloud is enabled. At least one endpoint needs '
-                       'to be specified.'))
+                       'to be specified.')),
+    cfg.IntOpt('signature_cache_size',
+               default=1000,
+               help=_('Maximum number of successfully authenticated '
+                      'signatures that are cached in memory by each '
+                      'process.')),
+    cfg.IntOpt('signature_cache_ttl',
+               default=60,
+               help=_('Number of seconds for which a request with the same '
+                      'credentials and signature as one already '
+                      'authenticated is accepted without checking it against '
+                      'keystone again, up to the expiry of its token. Set to '
+                      '0 to check every request.'))
 ]
 cfg.CONF.register_opts(opts, group='ec2authtoken')
 
+# A single session, so that connections to keystone are pooled
+_session = requests.Session()
+
+Authenticated = collections.namedtuple('Authenticated',
+                                       ['token_id', 'tenant', 'tenant_id',
+                                        'roles', 'expires'])
+
 
 class EC2Token(wsgi.Middleware):
     """Authenticate an EC2 request with keystone and convert to token."""
@@ -50,6 +72,8 @@ class EC2Token(wsgi.Middleware):
     def __init__(self, app, conf):
         self.conf = conf
         self.application = app
+        self._signature_cache = cache.LRUCache(
+            lambda: int(self._conf_get('signature_cache_size')))
 
     def _conf_get(self, name):
         # try config from paste-deploy first
@@ -180,11 +204,49 @@ class EC2Token(wsgi.Middleware):
                                     'body_hash': body_hash
                                     }}
         creds_json = json.dumps(creds)
+
+        # The cache is keyed on everything that is checked by keystone, so
+        # only an identical request can be authenticated from it
+        cache_key = (auth_uri, access,
+                     hashlib.sha256(json.dumps(creds,
+                                               sort_keys=True)).hexdigest())
+        authenticated = self._signature_cache.get(cache_key)
+        if (authenticated is not None and
+                authenticated.expires > timeutils.utcnow_ts()):
+            LOG.info(_LI("AWS credentials previously authenticated."))
+        else:
+            authenticated = self._authenticate(auth_uri, creds_json)
+            self._cache_authenticated(cache_key, authenticated)
+
+        # Authenticated!
+        ec2_creds = {'ec2Credentials': {'access': access,
+                                        'signature': signature}}
+        req.headers['X-Auth-EC2-Creds'] = json.dumps(ec2_creds)
+        req.headers['X-Auth-Token'] = authenticated.token_id
+        req.headers['X-Tenant-Name'] = authenticated.tenant
+        req.headers['X-Tenant-Id'] = authenticated.tenant_id
+        req.headers['X-Auth-URL'] = auth_uri
+        req.headers['X-Roles'] = ','.join(authenticated.roles)
+
+        return self.application
+
+    def _cache_authenticated(self, cache_key, authenticated):
+        ttl = int(self._conf_get('signature_cache_ttl'))
+        if ttl <= 0:
+            return
+
+        expires = timeutils.utcnow_ts() + ttl
+        if authenticated.expires is not None:
+            expires = min(expires, authenticated.expires)
+        self._signature_cache.set(cache_key,
+                                  authenticated._replace(expires=expires))
+
+    def _authenticate(self, auth_uri, creds_json):
         headers = {'Content-Type': 'application/json'}
 
         keystone_ec2_uri = self._conf_get_keystone_ec2_uri(auth_uri)
         LOG.info(_LI('Authenticating with %s'), keystone_ec2_uri)
-        response = requests.post(keystone_ec2_uri, data=creds_json,
+        response = _session.post(keystone_ec2_uri, data=creds_json,
                                  headers=headers)
         result = response.json()
         try:
@@ -208,20 +270,20 @@ class EC2Token(wsgi.Middleware):
             else:
                 raise exception.HeatAccessDeniedError()
 
-        # Authenticated!
-        ec2_creds = {'ec2Credentials': {'access': access,
-                                        'signature': signature}}
-        req.headers['X-Auth-EC2-Creds'] = json.dumps(ec2_creds)
-        req.headers['X-Auth-Token'] = token_id
-        req.headers['X-Tenant-Name'] = tenant
-        req.headers['X-Tenant-Id'] = tenant_id
-        req.headers['X-Auth-URL'] = auth_uri
-
         metadata = result['access'].get('metadata', {})
         roles = metadata.get('roles', [])
-        req.headers['X-Roles'] = ','.join(roles)
 
-        return self.application
+        expires = result['access']['token'].get('expires')
+        if expires is not None:
+            try:
+                expires_at = timeutils.normalize_time(
+                    timeutils.parse_isotime(expires))
+                expires = timeutils.utcnow_ts() + timeutils.delta_seconds(
+                    timeutils.utcnow(), expires_at)
+            except ValueError:
+                expires = None
+
+        return Authenticated(token_id, tenant, tenant_id, roles, expires)
 
 
 def EC2Token_filter_factory(global_conf, **local_conf):
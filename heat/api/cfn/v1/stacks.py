@@ -18,6 +18,8 @@ Stack endpoint for Heat CloudFormation v1 API.
 import json
 import socket
 
+import webob.exc
+
 from heat.api.aws import exception
 from heat.api.aws import utils as api_utils
 from heat.common import exception as heat_exception
@@ -141,7 +143,7 @@ class StackController(object):
 
         con = req.context
         try:
-            stack_list = self.rpc_client.list_stacks(con)
+            stack_list = self.rpc_client.list_stacks(con, summary=True)
         except Exception as ex:
             return exception.map_remote_error(ex)
 
@@ -561,17 +563,36 @@ class StackController(object):
             return self._id_format(result)
 
         con = req.context
+        resource_name = req.params.get('LogicalResourceId')
+        etags = getattr(req.if_none_match, 'etags', None) or [None]
 
+        # In-instance agents poll this for the resource metadata, so check
+        # whether that has changed before describing the whole resource
         try:
             identity = self._get_identity(con, req.params['StackName'])
+            metadata = self.rpc_client.describe_stack_resource_metadata(
+                con, identity, resource_name, etag=etags[0])
+        except Exception as ex:
+            return exception.map_remote_error(ex)
+
+        etag = metadata[rpc_api.RES_METADATA_ETAG]
+        if rpc_api.RES_METADATA not in metadata:
+            raise webob.exc.HTTPNotModified(etag=etag)
+
+        try:
             resource_details = self.rpc_client.describe_stack_resource(
                 con,
                 stack_identity=identity,
-                resource_name=req.params.get('LogicalResourceId'))
+                resource_name=resource_name)
 
         except Exception as ex:
             return exception.map_remote_error(ex)
 
+        # Return the metadata that the ETag was calculated for
+        resource_details[rpc_api.RES_METADATA] = metadata[
+            rpc_api.RES_METADATA]
+        req.environ['heat.response_etag'] = etag
+
         result = format_resource_detail(resource_details)
 
         return api_utils.format_response('DescribeStackResource',
@@ -13,6 +13,8 @@
 
 import itertools
 
+from webob import exc
+
 from heat.api.openstack.v1 import util
 from heat.common import identifier
 from heat.common import serializers
@@ -109,13 +111,23 @@ class ResourceController(object):
     def metadata(self, req, identity, resource_name):
         """
         Gets metadata information for a resource
+
+        The response carries an ETag, and if the request's If-None-Match
+        header matches it a 304 Not Modified response is returned instead.
         """
 
-        res = self.rpc_client.describe_stack_resource(req.context,
-                                                      identity,
-                                                      resource_name)
+        etags = getattr(req.if_none_match, 'etags', None) or [None]
+        res = self.rpc_client.describe_stack_resource_metadata(req.context,
+                                                               identity,
+                                                               resource_name,
+                                                               etag=etags[0])
 
-        return {rpc_api.RES_METADATA: res[rpc_api.RES_METADATA]}
+        etag = res[rpc_api.RES_METADATA_ETAG]
+        if rpc_api.RES_METADATA not in res:
+            raise exc.HTTPNotModified(etag=etag)
+
+        return {rpc_api.RES_METADATA: res[rpc_api.RES_METADATA],
+                rpc_api.RES_METADATA_ETAG: etag}
 
     @util.identified_stack
     def signal(self, req, identity, resource_name, body=None):
@@ -125,10 +137,19 @@ class ResourceController(object):
                                         details=body)
 
 
+class ResourceSerializer(serializers.JSONResponseSerializer):
+    """Handles serialization of specific controller method responses."""
+
+    def metadata(self, response, result):
+        response.etag = result.pop(rpc_api.RES_METADATA_ETAG)
+        self.default(response, result)
+        return response
+
+
 def create_resource(options):
     """
     Resources resource factory method.
     """
     deserializer = wsgi.JSONRequestDeserializer()
-    serializer = serializers.JSONResponseSerializer()
+    serializer = ResourceSerializer()
     return wsgi.Resource(ResourceController(options), deserializer, serializer)
@@ -0,0 +1,123 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A size-bounded, least-recently-used cache for process-wide use."""
+
+import collections
+import weakref
+
+from heat.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# Caches given a name, whose statistics are logged by log_stats()
+_named_caches = weakref.WeakValueDictionary()
+
+
+def log_stats():
+    """Log the statistics of all of the named caches in the process."""
+    for name, lru in sorted(_named_caches.items()):
+        LOG.debug('Cache %(name)s: %(hits)d hits, %(misses)d misses, '
+                  '%(items)d items of total size %(size)d/%(max_size)d' %
+                  dict(lru.stats(), name=name))
+
+
+class LRUCache(object):
+    """A mapping that evicts the least recently used items when full.
+
+    Each item has a size, given by the sizeof function (by default every item
+    has a size of 1), and the least recently used items are evicted whenever
+    the total size exceeds the maximum. The numbers of hits and misses on
+    lookup are counted, so that the effectiveness of the cache can be
+    monitored; the statistics of caches given a name are logged periodically
+    by the engine.
+    """
+
+    def __init__(self, max_size, sizeof=None, name=None):
+        """Initialise with the maximum total size of the cached items.
+
+        :param max_size: the maximum total size, or a callable returning it
+                         (e.g. to read it from a configuration option)
+        :param sizeof: a function that returns the size of a cached value
+        :param name: a name under which to report the cache's statistics
+        """
+        self._max_size = max_size
+        self._sizeof = sizeof or (lambda value: 1)
+        self._items = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        if name is not None:
+            _named_caches[name] = self
+
+    @property
+    def max_size(self):
+        if callable(self._max_size):
+            return self._max_size()
+        return self._max_size
+
+    def stats(self):
+        """Return a dict of the cache's hit, miss and size statistics."""
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'items': len(self),
+                'size': self.size,
+                'max_size': self.max_size}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """Return the value cached for a key, marking it recently used."""
+        try:
+            value, size = self._items.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._items[key] = (value, size)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Cache a value, evicting other values if the cache is full."""
+        self.pop(key)
+
+        size = self._sizeof(value)
+        max_size = self.max_size
+        if size > max_size:
+            # this would evict everything else and still not fit
+            return
+
+        self._items[key] = (value, size)
+        self.size += size
+        while self.size > max_size:
+            self.pop(next(iter(self._items)))
+
+    def pop(self, key, default=None):
+        """Remove a key from the cache and return its value."""
+        try:
+            value, size = self._items.pop(key)
+        except KeyError:
+            return default
+
+        self.size -= size
+        return value
+
+    def clear(self):
+        """Remove all values from the cache."""
+        self._items.clear()
+        self.size = 0
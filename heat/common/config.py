@@ -76,6 +76,20 @@ service_opts = [
     cfg.IntOpt('max_template_size',
                default=524288,
                help=_('Maximum raw byte size of any template.')),
+    cfg.IntOpt('max_template_cache_size',
+               default=10485760,
+               help=_('Maximum total raw byte size of the provider templates '
+                      'kept parsed in memory by each engine process.')),
+    cfg.IntOpt('max_fetched_template_cache_size',
+               default=10485760,
+               help=_('Maximum total raw byte size of the templates fetched '
+                      'from URLs that are cached in memory by each process, '
+                      'subject to the caching headers sent with them.')),
+    cfg.IntOpt('max_cached_stacks',
+               default=100,
+               help=_('Maximum number of parsed stacks kept in memory by '
+                      'each engine process for reuse by requests that only '
+                      'read them, until the stack changes.')),
     cfg.IntOpt('max_nested_stack_depth',
                default=3,
                help=_('Maximum depth allowed when using nested stacks.')),
@@ -127,24 +141,83 @@ engine_opts = [
                help=_('Controls how many events will be pruned whenever a '
                       ' stack\'s events exceed max_events_per_stack. Set this'
                       ' lower to keep more events at the expense of more'
-                      ' frequent purges.')),
+                      ' frequent purges. Events are only counted again once'
+                      ' this many have been added since the last purge.')),
     cfg.IntOpt('max_events_per_stack',
                default=1000,
                help=_('Maximum events that will be available per stack. Older'
                       ' events will be deleted when this is reached. Set to 0'
                       ' for unlimited events per stack.')),
+    cfg.IntOpt('max_batched_state_writes',
+               default=100,
+               help=_('Maximum number of resource state changes and events '
+                      'buffered during a stack action before they are '
+                      'written to the database in bulk. Buffered writes are '
+                      'always flushed at the end of each scheduler step. '
+                      'Set to 0 to write every state change immediately.')),
     cfg.IntOpt('stack_action_timeout',
                default=3600,
                help=_('Timeout in seconds for stack action (ie. create or'
                       ' update).')),
+    cfg.IntOpt('max_resource_actions_per_stack',
+               default=0,
+               help=_('Maximum number of resources in a stack that may have'
+                      ' an action (e.g. create or delete) in progress at'
+                      ' once. Set to 0 for unlimited.')),
+    cfg.IntOpt('max_resource_actions_per_engine',
+               default=0,
+               help=_('Maximum number of resources that may have an action'
+                      ' in progress at once across all stacks in an engine.'
+                      ' Resources that manage a nested stack are not'
+                      ' counted. Set to 0 for unlimited.')),
+    cfg.ListOpt('max_resource_actions_per_type',
+                default=[],
+                help=_('Maximum number of resources of a given type that may'
+                       ' have an action in progress at once across all'
+                       ' stacks in an engine, as a list of <type>=<limit>'
+                       ' pairs (e.g. OS::Nova::Server=50).')),
     cfg.IntOpt('error_wait_time',
                default=240,
                help=_('Error wait time in seconds for stack action (ie. create'
                       ' or update).')),
+    cfg.FloatOpt('min_task_wait_time',
+                 help=_('Minimum time in seconds to wait before polling a'
+                        ' task again. If set, tasks are woken as soon as any'
+                        ' wakeup hint they give is ready, and the polling'
+                        ' interval for other tasks backs off exponentially'
+                        ' from this value. If unset, tasks are polled at a'
+                        ' fixed interval.')),
     cfg.IntOpt('engine_life_check_timeout',
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
                       ' for stack locking.')),
+    cfg.IntOpt('custom_constraint_cache_ttl',
+               default=0,
+               help=_('Number of seconds for which a value that passed '
+                      'validation by an API-backed custom constraint (e.g. '
+                      'an image or flavor) is assumed to remain valid for '
+                      'the same tenant. Successful validations are always '
+                      'reused within a single request.')),
+    cfg.IntOpt('server_status_batch_threshold',
+               default=10,
+               help=_('Number of servers in a stack being polled for status '
+                      'changes at the same time above which their status is '
+                      'fetched with one server list request per second, '
+                      'rather than a request per server. Set to 0 to always '
+                      'poll servers individually.')),
+    cfg.IntOpt('client_lookup_cache_ttl',
+               default=60,
+               help=_('Number of seconds for which the indexes used to look '
+                      'up the IDs of flavors, images and networks by name '
+                      'are shared by all requests for the same tenant. An '
+                      'index is also refreshed when a name is not found in '
+                      'it. Set to 0 to look up every name separately.')),
+    cfg.BoolOpt('verify_memoized_properties',
+                default=False,
+                help=_('Re-resolve resource property values that are read '
+                       'from the per-action cache and log a warning when '
+                       'they are stale. This is a debugging aid and '
+                       'negates the benefit of the cache.')),
     cfg.BoolOpt('enable_cloud_watch_lite',
                 default=True,
                 help=_('Enable the legacy OS::Heat::CWLiteAlarm resource.')),
@@ -13,26 +13,149 @@
 
 """Utility for fetching a resource (e.g. a template) from a URL."""
 
+import collections
+import time
+
 from oslo.config import cfg
 import requests
 from requests import exceptions
 
 from six.moves import urllib
 
+from heat.common import cache
 from heat.common import exception
 from heat.common.i18n import _
 from heat.common.i18n import _LI
 from heat.openstack.common import log as logging
 
 cfg.CONF.import_opt('max_template_size', 'heat.common.config')
+cfg.CONF.import_opt('max_fetched_template_cache_size', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
+# A single session, so that connections to the same host are pooled
+_session = requests.Session()
+
+CachedData = collections.namedtuple('CachedData',
+                                    ['data', 'validators', 'expires'])
+
+_cache = cache.LRUCache(lambda: cfg.CONF.max_fetched_template_cache_size,
+                        sizeof=lambda entry: len(entry.data),
+                        name='fetched_templates')
+
 
 class URLFetchError(exception.Error, IOError):
     pass
 
 
+def _cache_control(headers):
+    """Return the directives of a Cache-Control header as a dict."""
+    directives = {}
+    for directive in headers.get('cache-control', '').split(','):
+        name, sep, value = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') if sep else None
+    return directives
+
+
+def _cache_response(url, data, headers, validators=None):
+    """
+    Cache the data fetched from a URL as allowed by its headers. Any
+    validators given, from a previous response, are kept unless the headers
+    replace them.
+    """
+    directives = _cache_control(headers)
+    if 'no-store' in directives:
+        _cache.pop(url)
+        return
+
+    validators = dict(validators or {})
+    if headers.get('etag'):
+        validators['If-None-Match'] = headers['etag']
+    if headers.get('last-modified'):
+        validators['If-Modified-Since'] = headers['last-modified']
+
+    expires = None
+    if 'no-cache' not in directives:
+        try:
+            expires = time.time() + int(directives.get('max-age'))
+        except (TypeError, ValueError):
+            pass
+
+    if validators or expires is not None:
+        _cache.set(url, CachedData(data, validators, expires))
+    else:
+        _cache.pop(url)
+
+
+def _get_file(url):
+    try:
+        resp = urllib.request.urlopen(url)
+    except urllib.error.URLError as uex:
+        raise URLFetchError(_('Failed to retrieve template: %s') % uex)
+
+    try:
+        # Files are revalidated by their modification time and size
+        headers = resp.info()
+        validators = {'last-modified': headers.get('last-modified'),
+                      'content-length': headers.get('content-length')}
+        cached = _cache.get(url)
+        if cached is not None and cached.validators == validators:
+            return cached.data
+
+        data = resp.read()
+        if validators['last-modified'] is not None:
+            _cache.set(url, CachedData(data, validators, None))
+        return data
+    finally:
+        resp.close()
+
+
+def _get_http(url):
+    cached = _cache.get(url)
+    if cached is not None:
+        if cached.expires is not None and cached.expires > time.time():
+            return cached.data
+        headers = cached.validators
+    else:
+        headers = {}
+
+    resp = _session.get(url, stream=True, headers=headers)
+    try:
+        not_modified = resp.status_code == requests.codes.not_modified
+        if cached is not None and not_modified:
+            # A 304 response need not repeat the validators
+            _cache_response(url, cached.data, resp.headers,
+                            cached.validators)
+            return cached.data
+
+        resp.raise_for_status()
+
+        # We cannot use resp.text here because it would download the
+        # entire file, and a large enough file would bring down the
+        # engine.  The 'Content-Length' header could be faked, so it's
+        # necessary to download the content in chunks until
+        # max_template_size is reached.  The chunks are collected in a
+        # list and joined once at the end, to avoid copying the data
+        # received so far on every chunk; the chunk_size is still
+        # small to limit how far beyond max_template_size we may read.
+        max_size = cfg.CONF.max_template_size
+        chunks = []
+        size = 0
+        for chunk in resp.iter_content(chunk_size=1000):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_size:
+                raise URLFetchError("Template exceeds maximum allowed size (%s"
+                                    " bytes)" % max_size)
+        result = "".join(chunks)
+    finally:
+        resp.close()
+
+    _cache_response(url, result, resp.headers)
+    return result
+
+
 def get(url, allowed_schemes=('http', 'https')):
     """Get the data at the specified URL.
 
@@ -40,6 +163,9 @@ def get(url, allowed_schemes=('http', 'https')):
     The file: scheme is also supported if you override
     the allowed_schemes argument.
     Raise an IOError if getting the data fails.
+
+    Fetched data is cached in memory and, subject to the caching headers
+    of the response, is revalidated or reused on subsequent requests.
     """
     LOG.info(_LI('Fetching data from %s'), url)
 
@@ -49,31 +175,9 @@ def get(url, allowed_schemes=('http', 'https')):
         raise URLFetchError(_('Invalid URL scheme %s') % components.scheme)
 
     if components.scheme == 'file':
-        try:
-            return urllib.request.urlopen(url).read()
-        except urllib.error.URLError as uex:
-            raise URLFetchError(_('Failed to retrieve template: %s') % uex)
+        return _get_file(url)
 
     try:
-        resp = requests.get(url, stream=True)
-        resp.raise_for_status()
-
-        # We cannot use resp.text here because it would download the
-        # entire file, and a large enough file would bring down the
-        # engine.  The 'Content-Length' header could be faked, so it's
-        # necessary to download the content in chunks to until
-        # max_template_size is reached.  The chunk_size we use needs
-        # to balance CPU-intensive string concatenation with accuracy
-        # (eg. it's possible to fetch 1000 bytes greater than
-        # max_template_size with a chunk_size of 1000).
-        reader = resp.iter_content(chunk_size=1000)
-        result = ""
-        for chunk in reader:
-            result += chunk
-            if len(result) > cfg.CONF.max_template_size:
-                raise URLFetchError("Template exceeds maximum allowed size (%s"
-                                    " bytes)" % cfg.CONF.max_template_size)
-        return result
-
+        return _get_http(url)
     except exceptions.RequestException as ex:
         raise URLFetchError(_('Failed to retrieve template: %s') % ex)
@@ -679,6 +679,11 @@ class Resource(object):
 
             response = webob.Response(request=request)
             self.dispatch(serializer, action, response, action_result)
+            # Controllers using the content type serializers have no access to
+            # the response, so they can give its ETag in the request instead
+            etag = request.environ.get('heat.response_etag')
+            if etag is not None:
+                response.etag = etag
             return response
 
         # return unserializable result (typically an exception)
@@ -88,6 +88,13 @@ def resource_create(context, values):
     return IMPL.resource_create(context, values)
 
 
+def resource_update_batch(context, values_by_id):
+    """Apply several resource updates, given as a dict of values keyed
+    by resource id, in a single transaction.
+    """
+    return IMPL.resource_update_batch(context, values_by_id)
+
+
 def resource_exchange_stacks(context, resource_id1, resource_id2):
     return IMPL.resource_exchange_stacks(context, resource_id1, resource_id2)
 
@@ -124,16 +131,30 @@ def stack_get_by_name(context, stack_name):
 
 def stack_get_all(context, limit=None, sort_keys=None, marker=None,
                   sort_dir=None, filters=None, tenant_safe=True,
-                  show_deleted=False, show_nested=False):
+                  show_deleted=False, show_nested=False, eager_load=False):
     return IMPL.stack_get_all(context, limit, sort_keys,
                               marker, sort_dir, filters, tenant_safe,
-                              show_deleted, show_nested)
+                              show_deleted, show_nested,
+                              eager_load=eager_load)
+
+
+def stack_get_identities(context, stack_ids):
+    """Return the id, name and tenant of each of the given stacks."""
+    return IMPL.stack_get_identities(context, stack_ids)
 
 
 def stack_get_all_by_owner_id(context, owner_id):
     return IMPL.stack_get_all_by_owner_id(context, owner_id)
 
 
+def stack_count_nested_resources(context, stack_id):
+    """
+    Return the number of resources in the templates of all the stacks
+    nested, at any depth, below the given stack.
+    """
+    return IMPL.stack_count_nested_resources(context, stack_id)
+
+
 def stack_count_all(context, filters=None, tenant_safe=True,
                     show_deleted=False, show_nested=False):
     return IMPL.stack_count_all(context, filters=filters,
@@ -214,6 +235,11 @@ def event_create(context, values):
     return IMPL.event_create(context, values)
 
 
+def event_create_batch(context, values_list):
+    """Insert several events in a single transaction."""
+    return IMPL.event_create_batch(context, values_list)
+
+
 def watch_rule_get(context, watch_rule_id):
     return IMPL.watch_rule_get(context, watch_rule_id)
 
@@ -222,8 +248,8 @@ def watch_rule_get_by_name(context, watch_rule_name):
     return IMPL.watch_rule_get_by_name(context, watch_rule_name)
 
 
-def watch_rule_get_all(context):
-    return IMPL.watch_rule_get_all(context)
+def watch_rule_get_all(context, exclude_states=None):
+    return IMPL.watch_rule_get_all(context, exclude_states)
 
 
 def watch_rule_get_all_by_stack(context, stack_id):
@@ -250,6 +276,20 @@ def watch_data_get_all(context):
     return IMPL.watch_data_get_all(context)
 
 
+def watch_data_get_all_by_watch_rule(context, watch_rule_id, since=None):
+    """
+    Return the data for a watch rule, oldest first, optionally only those
+    samples created at or after the given time.
+    """
+    return IMPL.watch_data_get_all_by_watch_rule(context, watch_rule_id,
+                                                 since)
+
+
+def watch_data_delete_before(context, watch_rule_id, before):
+    """Delete the data for a watch rule created before the given time."""
+    return IMPL.watch_data_delete_before(context, watch_rule_id, before)
+
+
 def software_config_create(context, values):
     return IMPL.software_config_create(context, values)
 
@@ -12,13 +12,18 @@
 #    under the License.
 
 '''Implementation of SQLAlchemy backend.'''
+import collections
 import datetime
+import hashlib
+import json
 import six
 import sys
 
 from oslo.config import cfg
+from oslo.db import exception as db_exception
 from oslo.db.sqlalchemy import session as db_session
 from oslo.db.sqlalchemy import utils
+from oslo.utils import timeutils
 import osprofiler.sqlalchemy
 import sqlalchemy
 from sqlalchemy import orm
@@ -94,9 +99,46 @@ def raw_template_get(context, template_id):
     return result
 
 
+def _template_blob_get_or_create(context, value):
+    content = json.dumps(value, sort_keys=True)
+    blob_id = hashlib.sha256(content).hexdigest()
+
+    # Mark existing content as used now, so that purge_deleted() does not
+    # remove it before the raw template that refers to it is stored
+    query = model_query(context, models.TemplateBlob).filter_by(id=blob_id)
+    if query.update({'updated_at': timeutils.utcnow()},
+                    synchronize_session=False):
+        blob = query.first()
+        if blob is not None:
+            return blob
+
+    blob = models.TemplateBlob(id=blob_id, content=content)
+    try:
+        blob.save(_session(context))
+    except db_exception.DBDuplicateEntry:
+        # Stored concurrently by another engine
+        blob = model_query(context, models.TemplateBlob).get(blob_id)
+    return blob
+
+
+def _raw_template_values(context, values):
+    # Store the template and files content in shared, content-addressed
+    # blobs rather than in the raw_template row itself
+    values = dict(values)
+    if 'template' in values:
+        values['template_blob'] = _template_blob_get_or_create(
+            context, values.pop('template'))
+        values['_template'] = None
+    if 'files' in values:
+        values['files_blob'] = _template_blob_get_or_create(
+            context, values.pop('files') or {})
+        values['_files'] = None
+    return values
+
+
 def raw_template_create(context, values):
     raw_template_ref = models.RawTemplate()
-    raw_template_ref.update(values)
+    raw_template_ref.update(_raw_template_values(context, values))
     raw_template_ref.save(_session(context))
     return raw_template_ref
 
@@ -108,7 +150,8 @@ def raw_template_update(context, template_id, values):
                   if getattr(raw_template_ref, k) != v)
 
     if values:
-        raw_template_ref.update_and_save(values)
+        raw_template_ref.update_and_save(_raw_template_values(context,
+                                                              values))
 
     return raw_template_ref
 
@@ -257,6 +300,29 @@ def resource_create(context, values):
     return resource_ref
 
 
+def resource_update_batch(context, values_by_id):
+    session = _session(context)
+    with session.begin(subtransactions=True):
+        for resource_id, values in six.iteritems(values_by_id):
+            values = dict(values)
+            if 'status_reason' in values:
+                # Bulk updates bypass the truncating model property
+                reason = values.pop('status_reason')
+                values[models.Resource._status_reason] = (reason and
+                                                          reason[:255] or '')
+            session.query(models.Resource).filter_by(id=resource_id).\
+                update(values, synchronize_session='evaluate')
+
+        # Bulk updates bypass the ORM events that record changes to stacks
+        if values_by_id:
+            stack_ids = session.query(models.Resource.stack_id).filter(
+                models.Resource.id.in_(list(values_by_id))).subquery()
+            session.query(models.Stack).filter(
+                models.Stack.id.in_(stack_ids)).update(
+                    {'version': models.Stack.version + 1},
+                    synchronize_session=False)
+
+
 def resource_get_all_by_stack(context, stack_id):
     results = model_query(context, models.Resource).\
         filter_by(stack_id=stack_id).\
@@ -309,12 +375,32 @@ def stack_get(context, stack_id, show_deleted=False, tenant_safe=True,
     return result
 
 
+def stack_get_identities(context, stack_ids):
+    return model_query(context, models.Stack.id, models.Stack.name,
+                       models.Stack.tenant).\
+        filter(models.Stack.id.in_(stack_ids)).all()
+
+
 def stack_get_all_by_owner_id(context, owner_id):
     results = soft_delete_aware_query(context, models.Stack).\
         filter_by(owner_id=owner_id).all()
     return results
 
 
+def stack_count_nested_resources(context, stack_id):
+    total = 0
+    owner_ids = [stack_id]
+    # walk down the tree one level of nesting at a time
+    while owner_ids:
+        query = soft_delete_aware_query(context, models.Stack.id).\
+            filter(models.Stack.owner_id.in_(owner_ids)).\
+            filter_by(backup=False)
+        total += query.with_entities(
+            sqlalchemy.func.sum(models.Stack.num_resources)).scalar() or 0
+        owner_ids = [s.id for s in query]
+    return total
+
+
 def _get_sort_keys(sort_keys, mapping):
     '''Returns an array containing only whitelisted keys
 
@@ -368,10 +454,12 @@ def _query_stack_get_all(context, tenant_safe=True, show_deleted=False,
 
 def stack_get_all(context, limit=None, sort_keys=None, marker=None,
                   sort_dir=None, filters=None, tenant_safe=True,
-                  show_deleted=False, show_nested=False):
+                  show_deleted=False, show_nested=False, eager_load=False):
     query = _query_stack_get_all(context, tenant_safe,
                                  show_deleted=show_deleted,
                                  show_nested=show_nested)
+    if eager_load:
+        query = query.options(orm.joinedload("raw_template"))
     return _filter_and_page_query(context, query, limit, sort_keys,
                                   marker, sort_dir, filters).all()
 
@@ -435,6 +523,7 @@ def stack_delete(context, stack_id):
 
     s.soft_delete(session=session)
     session.flush()
+    _event_counts.pop(stack_id, None)
 
 
 def stack_lock_create(stack_id, engine_id):
@@ -601,33 +690,81 @@ def event_count_all_by_stack(context, stack_id):
 
 
 def _delete_event_rows(context, stack_id, limit):
-    # MySQL does not support LIMIT in subqueries,
-    # sqlite does not support JOIN in DELETE.
-    # So we must manually supply the IN() values.
-    # pgsql SHOULD work with the pure DELETE/JOIN below but that must be
-    # confirmed via integration tests.
+    # MySQL does not support LIMIT in subqueries and sqlite does not
+    # support JOIN in DELETE, so look up the ID of the newest event to be
+    # removed and delete everything up to it with a single range DELETE.
     query = _query_all_by_stack(context, stack_id)
-    session = _session(context)
-    ids = [r.id for r in query.order_by(
-        models.Event.id).limit(limit).all()]
-    q = session.query(models.Event).filter(
-        models.Event.id.in_(ids))
-    return q.delete(synchronize_session='fetch')
+    last = query.with_entities(models.Event.id).order_by(
+        models.Event.id).offset(limit - 1).limit(1).first()
+    if last is not None:
+        query = query.filter(models.Event.id <= last.id)
+    return query.delete(synchronize_session='evaluate')
+
+
+# Estimated number of events stored for each stack, maintained by this
+# process so that the events do not have to be counted on every insert. The
+# estimate is seeded from the real count when a stack is first seen, and
+# again once it is older than _EVENT_COUNTS_MAX_AGE seconds to catch up with
+# events written by other engines.
+_event_counts = collections.OrderedDict()
+_EVENT_COUNTS_MAX_STACKS = 1000
+_EVENT_COUNTS_MAX_AGE = 60
+
+
+def _prune_events(context, stack_id, added):
+    max_events = cfg.CONF.max_events_per_stack
+    now = timeutils.utcnow_ts()
+
+    estimate, counted_at = _event_counts.pop(stack_id, (None, None))
+    if estimate is None or counted_at <= now - _EVENT_COUNTS_MAX_AGE:
+        estimate = event_count_all_by_stack(context, stack_id)
+        counted_at = now
+
+    if estimate + added > max_events:
+        # The estimate does not see events written by other engines, so
+        # check the real count before pruning
+        count = event_count_all_by_stack(context, stack_id)
+        counted_at = now
+        excess = count + added - max_events
+        if excess > 0:
+            # prune
+            limit = max(excess, cfg.CONF.event_purge_batch_size)
+            count -= _delete_event_rows(context, stack_id, limit)
+        estimate = count
+
+    _event_counts[stack_id] = (estimate + added, counted_at)
+    while len(_event_counts) > _EVENT_COUNTS_MAX_STACKS:
+        _event_counts.popitem(last=False)
 
 
 def event_create(context, values):
     if 'stack_id' in values and cfg.CONF.max_events_per_stack:
-        if ((event_count_all_by_stack(context, values['stack_id']) >=
-             cfg.CONF.max_events_per_stack)):
-            # prune
-            _delete_event_rows(
-                context, values['stack_id'], cfg.CONF.event_purge_batch_size)
+        _prune_events(context, values['stack_id'], 1)
     event_ref = models.Event()
     event_ref.update(values)
     event_ref.save(_session(context))
     return event_ref
 
 
+def event_create_batch(context, values_list):
+    if cfg.CONF.max_events_per_stack:
+        counts = collections.Counter(values['stack_id']
+                                     for values in values_list
+                                     if 'stack_id' in values)
+        for stack_id, added in six.iteritems(counts):
+            _prune_events(context, stack_id, added)
+
+    session = _session(context)
+    event_refs = []
+    with session.begin(subtransactions=True):
+        for values in values_list:
+            event_ref = models.Event()
+            event_ref.update(values)
+            session.add(event_ref)
+            event_refs.append(event_ref)
+    return event_refs
+
+
 def watch_rule_get(context, watch_rule_id):
     result = model_query(context, models.WatchRule).get(watch_rule_id)
     return result
@@ -639,9 +776,11 @@ def watch_rule_get_by_name(context, watch_rule_name):
     return result
 
 
-def watch_rule_get_all(context):
-    results = model_query(context, models.WatchRule).all()
-    return results
+def watch_rule_get_all(context, exclude_states=None):
+    query = model_query(context, models.WatchRule)
+    if exclude_states:
+        query = query.filter(~models.WatchRule.state.in_(exclude_states))
+    return query.all()
 
 
 def watch_rule_get_all_by_stack(context, stack_id):
@@ -678,8 +817,8 @@ def watch_rule_delete(context, watch_id):
                                      'msg': 'that does not exist'})
     session = orm_session.Session.object_session(wr)
 
-    for d in wr.watch_data:
-        session.delete(d)
+    session.query(models.WatchData).filter_by(
+        watch_rule_id=wr.id).delete(synchronize_session='fetch')
 
     session.delete(wr)
     session.flush()
@@ -697,6 +836,21 @@ def watch_data_get_all(context):
     return results
 
 
+def watch_data_get_all_by_watch_rule(context, watch_rule_id, since=None):
+    query = model_query(context, models.WatchData).filter_by(
+        watch_rule_id=watch_rule_id)
+    if since is not None:
+        query = query.filter(models.WatchData.created_at >= since)
+    return query.order_by(models.WatchData.created_at).all()
+
+
+def watch_data_delete_before(context, watch_rule_id, before):
+    query = model_query(context, models.WatchData).filter_by(
+        watch_rule_id=watch_rule_id).filter(
+            models.WatchData.created_at < before)
+    return query.delete(synchronize_session=False)
+
+
 def software_config_create(context, values):
     obj_ref = models.SoftwareConfig()
     obj_ref.update(values)
@@ -835,6 +989,7 @@ def purge_deleted(age, granularity='days'):
     stack = sqlalchemy.Table('stack', meta, autoload=True)
     event = sqlalchemy.Table('event', meta, autoload=True)
     raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    template_blob = sqlalchemy.Table('template_blob', meta, autoload=True)
     user_creds = sqlalchemy.Table('user_creds', meta, autoload=True)
 
     stmt = sqlalchemy.select([stack.c.id,
@@ -854,6 +1009,22 @@ def purge_deleted(age, granularity='days'):
         user_creds_del = user_creds.delete().where(user_creds.c.id == s[2])
         engine.execute(user_creds_del)
 
+    # Template content may be shared by several raw templates, so only
+    # delete the blobs that are no longer referenced by any of them. Blobs
+    # stored or reused recently are kept, as another engine may be about to
+    # store a template that refers to them.
+    last_used = sqlalchemy.func.coalesce(template_blob.c.updated_at,
+                                         template_blob.c.created_at)
+    unused_blobs = template_blob.delete().where(sqlalchemy.and_(
+        last_used < time_line,
+        ~template_blob.c.id.in_(
+            sqlalchemy.select([raw_template.c.template_blob_id]).where(
+                raw_template.c.template_blob_id.isnot(None))),
+        ~template_blob.c.id.in_(
+            sqlalchemy.select([raw_template.c.files_blob_id]).where(
+                raw_template.c.files_blob_id.isnot(None)))))
+    engine.execute(unused_blobs)
+
 
 def db_sync(engine, version=None):
     """Migrate the database to `version` or the most recent version."""
@@ -0,0 +1,102 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sqlalchemy
+
+from heat.db.sqlalchemy import types
+
+BLOB_COLUMNS = (
+    ('template_blob_id', 'template'),
+    ('files_blob_id', 'files'),
+)
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData()
+    meta.bind = migrate_engine
+
+    template_blob = sqlalchemy.Table(
+        'template_blob', meta,
+        sqlalchemy.Column('id', sqlalchemy.String(64),
+                          primary_key=True,
+                          nullable=False),
+        sqlalchemy.Column('created_at', sqlalchemy.DateTime),
+        sqlalchemy.Column('updated_at', sqlalchemy.DateTime),
+        sqlalchemy.Column('content', types.LongText),
+        mysql_engine='InnoDB',
+        mysql_charset='utf8'
+    )
+    template_blob.create()
+
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    for blob_column, content_column in BLOB_COLUMNS:
+        column = sqlalchemy.Column(blob_column, sqlalchemy.String(64),
+                                   sqlalchemy.ForeignKey('template_blob.id'),
+                                   nullable=True)
+        column.create(raw_template)
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData()
+    meta.bind = migrate_engine
+
+    template_blob = sqlalchemy.Table('template_blob', meta, autoload=True)
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+
+    # Copy the content of de-duplicated templates back into each row
+    for blob_column, content_column in BLOB_COLUMNS:
+        columns = [raw_template.c.id, template_blob.c.content]
+        stmt = sqlalchemy.select(columns).where(
+            raw_template.c[blob_column] == template_blob.c.id)
+        for row in migrate_engine.execute(stmt):
+            update = raw_template.update().where(
+                raw_template.c.id == row.id).values(
+                    {content_column: row.content})
+            migrate_engine.execute(update)
+
+    if migrate_engine.name == 'sqlite':
+        _downgrade_052_sqlite(migrate_engine, meta, raw_template)
+    else:
+        for blob_column, content_column in BLOB_COLUMNS:
+            raw_template.c[blob_column].drop()
+
+    template_blob.drop()
+
+
+def _downgrade_052_sqlite(migrate_engine, metadata, table):
+
+    table_name = table.name
+    blob_columns = [b for b, c in BLOB_COLUMNS]
+
+    constraints = [
+        c.copy() for c in table.constraints
+        if not isinstance(c, (sqlalchemy.CheckConstraint,
+                              sqlalchemy.ForeignKeyConstraint))
+    ]
+    columns = [c.copy() for c in table.columns
+               if c.name not in blob_columns]
+
+    new_table = sqlalchemy.Table(table_name + "__tmp__", metadata,
+                                 *(columns + constraints))
+    new_table.create()
+
+    migrate_data = """
+        INSERT INTO raw_template__tmp__
+            SELECT id, created_at, updated_at, template, files
+            FROM raw_template;"""
+
+    migrate_engine.execute(migrate_data)
+
+    table.drop()
+
+    new_table.rename(table_name)
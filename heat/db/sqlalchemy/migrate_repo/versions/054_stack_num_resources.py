@@ -0,0 +1,51 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import sqlalchemy
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    template_blob = sqlalchemy.Table('template_blob', meta, autoload=True)
+
+    num_resources = sqlalchemy.Column('num_resources', sqlalchemy.Integer())
+    num_resources.create(stack)
+
+    # Count the resources in the template of each existing stack
+    join = raw_template.outerjoin(
+        template_blob, raw_template.c.template_blob_id == template_blob.c.id)
+    stmt = sqlalchemy.select([raw_template.c.id,
+                              raw_template.c.template,
+                              template_blob.c.content]).select_from(join)
+    for row in migrate_engine.execute(stmt):
+        content = row.content or row.template
+        if not content:
+            continue
+        template = json.loads(content)
+        resources = template.get('Resources', template.get('resources'))
+        update = stack.update().where(
+            stack.c.raw_template_id == row.id).values(
+                num_resources=len(resources or {}))
+        migrate_engine.execute(update)
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    stack.c.num_resources.drop()
@@ -14,12 +14,14 @@
 SQLAlchemy models for heat data.
 """
 
+import itertools
 import uuid
 
 from oslo.db.sqlalchemy import models
 from oslo.utils import timeutils
 import six
 import sqlalchemy
+from sqlalchemy import event
 from sqlalchemy.ext import declarative
 from sqlalchemy.orm import backref
 from sqlalchemy.orm import relationship
@@ -100,19 +102,61 @@ class StateAware(object):
         self._status_reason = reason and reason[:255] or ''
 
 
+class TemplateBlob(BASE, HeatBase):
+    """
+    Represents the JSON-serialised content of a template or files map,
+    stored once and identified by the SHA-256 hash of its content.
+    """
+
+    __tablename__ = 'template_blob'
+    id = sqlalchemy.Column(sqlalchemy.String(64), primary_key=True)
+    content = sqlalchemy.Column(types.LongText)
+
+
 class RawTemplate(BASE, HeatBase):
     """Represents an unparsed template which should be in JSON format."""
 
     __tablename__ = 'raw_template'
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
-    template = sqlalchemy.Column(types.Json)
-    files = sqlalchemy.Column(types.Json)
+    # The content of templates stored before it was de-duplicated
+    _template = sqlalchemy.Column('template', types.Json)
+    _files = sqlalchemy.Column('files', types.Json)
+
+    template_blob_id = sqlalchemy.Column(
+        sqlalchemy.String(64),
+        sqlalchemy.ForeignKey('template_blob.id'),
+        nullable=True)
+    template_blob = relationship(TemplateBlob,
+                                 foreign_keys=[template_blob_id],
+                                 lazy='joined')
+    files_blob_id = sqlalchemy.Column(
+        sqlalchemy.String(64),
+        sqlalchemy.ForeignKey('template_blob.id'),
+        nullable=True)
+    files_blob = relationship(TemplateBlob,
+                              foreign_keys=[files_blob_id],
+                              lazy='joined')
+
+    @property
+    def template(self):
+        if self.template_blob is not None:
+            return types.loads(self.template_blob.content)
+        return self._template
+
+    @property
+    def files(self):
+        if self.files_blob is not None:
+            return types.loads(self.files_blob.content)
+        return self._files
 
 
 class Stack(BASE, HeatBase, SoftDelete, StateAware):
     """Represents a stack created by the heat engine."""
 
     __tablename__ = 'stack'
+    __table_args__ = (
+        sqlalchemy.Index('ix_stack_owner_id', 'owner_id'),
+        {'mysql_engine': 'InnoDB'})
 
     id = sqlalchemy.Column(sqlalchemy.String(36), primary_key=True,
                            default=lambda: str(uuid.uuid4()))
@@ -135,6 +179,11 @@ class Stack(BASE, HeatBase, SoftDelete, StateAware):
                                               nullable=True)
     backup = sqlalchemy.Column('backup', sqlalchemy.Boolean)
     nested_depth = sqlalchemy.Column('nested_depth', sqlalchemy.Integer)
+    # The number of resources in the stack's template
+    num_resources = sqlalchemy.Column('num_resources', sqlalchemy.Integer)
+    # Incremented whenever the stack or any of its resources changes
+    version = sqlalchemy.Column('version', sqlalchemy.Integer,
+                                nullable=False, default=0, server_default='0')
 
     # Override timestamp column to store the correct value: it should be the
     # time the create/update call was issued, not the time the DB entry is
@@ -275,6 +324,10 @@ class WatchData(BASE, HeatBase):
     """Represents a watch_data created by the heat engine."""
 
     __tablename__ = 'watch_data'
+    __table_args__ = (
+        sqlalchemy.Index('ix_watch_data_watch_rule_id_created_at',
+                         'watch_rule_id', 'created_at'),
+        {'mysql_engine': 'InnoDB'})
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     data = sqlalchemy.Column('data', types.Json)
@@ -348,3 +401,40 @@ class Snapshot(BASE, HeatBase):
     status = sqlalchemy.Column('status', sqlalchemy.String(255))
     status_reason = sqlalchemy.Column('status_reason', sqlalchemy.String(255))
     stack = relationship(Stack, backref=backref('snapshot'))
+
+
+@event.listens_for(Stack, 'before_update')
+def _stack_before_update(mapper, connection, target):
+    if orm_session.object_session(target).is_modified(
+            target, include_collections=False):
+        target.version = Stack.version + 1
+
+
+@event.listens_for(orm_session.Session, 'after_flush')
+def _increment_stack_versions(session, flush_context):
+    # Record changes to the resources of stacks by incrementing the version
+    # of each stack once per flush, rather than once per changed row
+    stack_ids = set()
+    resource_ids = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(
+                obj, include_collections=False):
+            continue
+        if isinstance(obj, Resource):
+            stack_ids.add(obj.stack_id)
+        elif isinstance(obj, ResourceData):
+            resource_ids.add(obj.resource_id)
+
+    changed = []
+    stack = Stack.__table__
+    if stack_ids:
+        changed.append(stack.c.id.in_(stack_ids))
+    if resource_ids:
+        resource = Resource.__table__
+        changed.append(stack.c.id.in_(
+            sqlalchemy.select([resource.c.stack_id]).where(
+                resource.c.id.in_(resource_ids))))
+    if changed:
+        session.execute(stack.update().
+                        where(sqlalchemy.or_(*changed)).
+                        values(version=stack.c.version + 1))
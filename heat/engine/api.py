@@ -14,12 +14,15 @@
 import collections
 
 from oslo.utils import timeutils
+import six
 
 from heat.common.i18n import _
 from heat.common.i18n import _LE
+from heat.common import identifier
 from heat.common import param_utils
 from heat.common import template_format
 from heat.engine import constraints as constr
+from heat.engine import template as tmpl
 from heat.openstack.common import log as logging
 from heat.rpc import api as rpc_api
 
@@ -122,25 +125,59 @@ def format_stack(stack, preview=False):
     return info
 
 
+def format_stack_summary(db_stack):
+    '''
+    Return a summary representation of a stack directly from its database
+    record, without loading the Stack. The parameters and outputs, which
+    would require the full template to be parsed, are omitted.
+    '''
+    t = tmpl.Template(db_stack.raw_template.template)
+    stack_identifier = identifier.HeatIdentifier(db_stack.tenant,
+                                                 db_stack.name, db_stack.id)
+    updated_time = (db_stack.updated_at and
+                    timeutils.isotime(db_stack.updated_at))
+    return {
+        rpc_api.STACK_NAME: db_stack.name,
+        rpc_api.STACK_ID: dict(stack_identifier),
+        rpc_api.STACK_CREATION_TIME: timeutils.isotime(db_stack.created_at),
+        rpc_api.STACK_UPDATED_TIME: updated_time,
+        rpc_api.STACK_NOTIFICATION_TOPICS: [],  # TODO Not implemented yet
+        rpc_api.STACK_DESCRIPTION: t[t.DESCRIPTION],
+        rpc_api.STACK_TMPL_DESCRIPTION: t[t.DESCRIPTION],
+        rpc_api.STACK_CAPABILITIES: [],   # TODO Not implemented yet
+        rpc_api.STACK_DISABLE_ROLLBACK: db_stack.disable_rollback,
+        rpc_api.STACK_TIMEOUT: db_stack.timeout,
+        rpc_api.STACK_OWNER: db_stack.username,
+        rpc_api.STACK_PARENT: db_stack.owner_id,
+        rpc_api.STACK_ACTION: db_stack.action or '',
+        rpc_api.STACK_STATUS: db_stack.status or '',
+        rpc_api.STACK_STATUS_DATA: db_stack.status_reason,
+    }
+
+
 def format_resource_attributes(resource, with_attr=None):
-    def resolve(attr, resolver):
-        try:
-            return resolver[attr]
-        except Exception:
-            return None
+    '''
+    Return the values of the requested attributes of a resource.
 
+    Resolving an attribute may require calls to a backend API, so only the
+    requested attributes are resolved. Requested attributes that are not in
+    the schema are looked up in the "show" attribute, if the resource has
+    one.
+    '''
     resolver = resource.attributes
-    if 'show' in resolver.keys():
-        show_attr = resolver['show']
-        if isinstance(show_attr, collections.Mapping):
-            resolver = show_attr
 
-    if not with_attr:
-        with_attr = []
+    def resolve(attr):
+        try:
+            if attr in resolver:
+                return resolver[attr]
+            show_attr = resolver['show']
+            if isinstance(show_attr, collections.Mapping):
+                return show_attr.get(attr)
+        except Exception:
+            pass
+        return None
 
-    attributes = set(resolver.keys() + with_attr)
-    return dict((attr, resolve(attr, resolver))
-                for attr in attributes)
+    return dict((attr, resolve(attr)) for attr in with_attr or [])
 
 
 def format_resource_properties(resource):
@@ -187,6 +224,9 @@ def format_stack_resource(resource, detail=True, with_props=False,
         res[rpc_api.RES_METADATA] = resource.metadata_get()
         res[rpc_api.RES_SCHEMA_ATTRIBUTES] = format_resource_attributes(
             resource, with_attr)
+        # The names of the attributes that may be requested explicitly
+        res[rpc_api.RES_UNRESOLVED_ATTRIBUTES] = sorted(
+            set(resource.attributes.keys()).difference(with_attr or []))
 
     if with_props:
         res[rpc_api.RES_SCHEMA_PROPERTIES] = format_resource_properties(
@@ -228,6 +268,38 @@ def format_event(event):
     return result
 
 
+def format_db_event(event, stack_identifier):
+    '''
+    Return a representation of an event database record, given the
+    identifier of its stack, that matches format_event() but does not
+    require the stack to be loaded.
+    '''
+    res_identifier = identifier.ResourceIdentifier(
+        resource_name=event.resource_name, **stack_identifier)
+    event_identifier = identifier.EventIdentifier(event_id=str(event.uuid),
+                                                  **res_identifier)
+    try:
+        properties = dict(event.resource_properties)
+    except ValueError as ex:
+        properties = {'Error': six.text_type(ex)}
+
+    result = {
+        rpc_api.EVENT_ID: dict(event_identifier),
+        rpc_api.EVENT_STACK_ID: dict(stack_identifier),
+        rpc_api.EVENT_STACK_NAME: stack_identifier.stack_name,
+        rpc_api.EVENT_TIMESTAMP: timeutils.isotime(event.created_at),
+        rpc_api.EVENT_RES_NAME: event.resource_name,
+        rpc_api.EVENT_RES_PHYSICAL_ID: event.physical_resource_id,
+        rpc_api.EVENT_RES_ACTION: event.resource_action,
+        rpc_api.EVENT_RES_STATUS: event.resource_status,
+        rpc_api.EVENT_RES_STATUS_DATA: event.resource_status_reason,
+        rpc_api.EVENT_RES_TYPE: event.resource_type,
+        rpc_api.EVENT_RES_PROPERTIES: properties,
+    }
+
+    return result
+
+
 def format_notification_body(stack):
     # some other possibilities here are:
     # - template name
@@ -12,9 +12,12 @@
 #    under the License.
 
 import collections
+import datetime
 import six
 import warnings
 
+from oslo.utils import timeutils
+
 from heat.common.i18n import _
 from heat.engine import constraints as constr
 from heat.engine import support
@@ -44,10 +47,13 @@ class Schema(constr.Schema):
 
     def __init__(self, description=None,
                  support_status=support.SupportStatus(),
-                 cache_mode=CACHE_LOCAL):
+                 cache_mode=CACHE_LOCAL, cache_ttl=None):
         self.description = description
         self.support_status = support_status
         self.cache_mode = cache_mode
+        # Number of seconds after which a locally cached value is resolved
+        # again, or None to keep it until the cache is reset
+        self.cache_ttl = cache_ttl
 
     def __getitem__(self, key):
         if key == self.DESCRIPTION:
@@ -120,6 +126,7 @@ class Attributes(collections.Mapping):
 
     def reset_resolved_values(self):
         self._resolved_values = {}
+        self._expiry_times = {}
 
     @staticmethod
     def _make_attributes(schema):
@@ -155,13 +162,18 @@ class Attributes(collections.Mapping):
             return self._resolver(key)
 
         if key in self._resolved_values:
-            return self._resolved_values[key]
+            expiry = self._expiry_times.get(key)
+            if expiry is None or timeutils.utcnow() < expiry:
+                return self._resolved_values[key]
 
         value = self._resolver(key)
         if value is not None:
             # only store if not None, it may resolve to an actual value
             # on subsequent calls
             self._resolved_values[key] = value
+            if attrib.schema.cache_ttl is not None:
+                ttl = datetime.timedelta(seconds=attrib.schema.cache_ttl)
+                self._expiry_times[key] = timeutils.utcnow() + ttl
         return value
 
     def __len__(self):
@@ -12,9 +12,19 @@
 #    under the License.
 
 import abc
+import collections
+
 from oslo.config import cfg
+from oslo.utils import timeutils
 import six
 
+from heat.common import cache
+
+cfg.CONF.import_opt('client_lookup_cache_ttl', 'heat.common.config')
+
+IndexEntry = collections.namedtuple('IndexEntry',
+                                    ['index', 'built', 'expires'])
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ClientPlugin(object):
@@ -23,6 +33,13 @@ class ClientPlugin(object):
     # may emit
     exceptions_module = None
 
+    # Indexes of resource IDs by name, shared by the plugins for all
+    # contexts with the same tenant and region
+    _indexes = cache.LRUCache(1000, name='client_lookup_indexes')
+    # Minimum time in seconds between rebuilding an index because a name or
+    # ID was not found in it
+    index_rebuild_interval = 10
+
     def __init__(self, context):
         self.context = context
         self.clients = context.clients
@@ -49,6 +66,46 @@ class ClientPlugin(object):
     def url_for(self, **kwargs):
         return self.clients.client('keystone').url_for(**kwargs)
 
+    def _build_index(self, key, list_resources):
+        index = collections.defaultdict(set)
+        for resource_id, name in list_resources():
+            index[resource_id].add(resource_id)
+            if name:
+                index[name].add(resource_id)
+        now = timeutils.utcnow_ts()
+        entry = IndexEntry(dict(index), now,
+                           now + cfg.CONF.client_lookup_cache_ttl)
+        self._indexes.set(key, entry)
+        return entry
+
+    def lookup_id(self, resource_type, name_or_id, list_resources):
+        """Return the ID of a resource by name or ID, using a shared index.
+
+        The index is built by a single call to list_resources, which must
+        return an iterable of (id, name) pairs, and it is rebuilt when it
+        expires. When the name or ID is not found, the index is rebuilt at
+        most once every index_rebuild_interval seconds. None is returned if
+        the index is disabled or does not identify a unique resource, in
+        which case the caller should look up the resource directly.
+        """
+        if cfg.CONF.client_lookup_cache_ttl <= 0 or not name_or_id:
+            return None
+
+        key = (type(self), resource_type,
+               self.context.tenant_id, self.context.region_name)
+        entry = self._indexes.get(key)
+        now = timeutils.utcnow_ts()
+        if entry is None or entry.expires <= now:
+            entry = self._build_index(key, list_resources)
+
+        ids = entry.index.get(name_or_id)
+        if ids is None and entry.built <= now - self.index_rebuild_interval:
+            ids = self._build_index(key, list_resources).index.get(name_or_id)
+
+        if ids is not None and len(ids) == 1:
+            return next(iter(ids))
+        return None
+
     def _get_client_option(self, client, option):
         # look for the option in the [clients_${client}] section
         # unknown options raise cfg.NoSuchOptError
@@ -67,6 +67,11 @@ class GlanceClientPlugin(client_plugin.ClientPlugin):
         :raises: exception.ImageNotFound,
                  exception.PhysicalResourceNameAmbiguity
         '''
+        image_id = self.lookup_id('image', image_identifier,
+                                  self._list_image_names)
+        if image_id is not None:
+            return image_id
+
         if uuidutils.is_uuid_like(image_identifier):
             try:
                 image_id = self.client().images.get(image_identifier).id
@@ -76,6 +81,14 @@ class GlanceClientPlugin(client_plugin.ClientPlugin):
             image_id = self.get_image_id_by_name(image_identifier)
         return image_id
 
+    def _list_image_names(self):
+        try:
+            return [(image.id, image.name)
+                    for image in self.client().images.list()]
+        except exc.ClientException as ex:
+            raise exception.Error(
+                _("Error retrieving image list from glance: %s") % ex)
+
     def get_image_id_by_name(self, image_identifier):
         '''
         Return an id for the specified image name.
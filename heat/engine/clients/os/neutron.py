@@ -63,9 +63,20 @@ class NeutronClientPlugin(client_plugin.ClientPlugin):
             return False
         return ex.status_code == 413
 
+    def _list_resource_names(self, key_type):
+        collection = '%ss' % key_type
+        list_resources = getattr(self.client(), 'list_%s' % collection)
+        return [(r['id'], r.get('name'))
+                for r in list_resources()[collection]]
+
     def find_neutron_resource(self, props, key, key_type):
+        value = props.get(key)
+        resource_id = self.lookup_id(
+            key_type, value, lambda: self._list_resource_names(key_type))
+        if resource_id is not None:
+            return resource_id
         return neutronV20.find_resourceid_by_name_or_id(
-            self.client(), key_type, props.get(key))
+            self.client(), key_type, value)
 
     def _resolve(self, props, key, id_key, key_type):
         if props.get(key):
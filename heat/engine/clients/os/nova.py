@@ -25,6 +25,7 @@ from novaclient import client as nc
 from novaclient import exceptions
 from novaclient import shell as novashell
 from oslo.config import cfg
+from oslo.utils import timeutils
 import six
 from six.moves.urllib import parse as urlparse
 
@@ -35,6 +36,8 @@ from heat.engine.clients import client_plugin
 from heat.engine import constraints
 from heat.engine import scheduler
 
+cfg.CONF.import_opt('server_status_batch_threshold', 'heat.common.config')
+
 LOG = logging.getLogger(__name__)
 
 
@@ -53,6 +56,24 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
 
     exceptions_module = exceptions
 
+    # Maximum age in seconds of a server list used to refresh servers
+    server_list_max_age = 1
+    # Time in seconds for which a server counts as being polled
+    server_poll_window = 10
+    # Number of servers requested per page of a server list, and the
+    # maximum number of pages listed
+    server_list_page_size = 1000
+    server_list_max_pages = 5
+    # Maximum age in seconds of a fetched server used to resolve attributes
+    server_fetch_max_age = 1
+
+    def __init__(self, context):
+        super(NovaClientPlugin, self).__init__(context)
+        self._polled_servers = {}
+        self._server_list = None
+        self._server_list_time = None
+        self._fetched_servers = {}
+
     def _create(self):
         computeshell = novashell.OpenStackComputeShell()
         extensions = computeshell._discover_extensions("1.1")
@@ -99,11 +120,69 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         return (isinstance(ex, exceptions.ClientException) and
                 http_status == 422)
 
+    def _list_servers(self):
+        '''
+        Return the tenant's servers by ID, fetched a page at a time up to
+        server_list_max_pages pages.
+        '''
+        servers = {}
+        marker = None
+        for page in range(self.server_list_max_pages):
+            listed = self.client().servers.list(
+                marker=marker, limit=self.server_list_page_size)
+            servers.update((s.id, s) for s in listed)
+            if len(listed) < self.server_list_page_size:
+                break
+            marker = listed[-1].id
+        return servers
+
+    def _listed_server(self, server):
+        '''
+        Return the details of a server from a recent list of servers, if
+        enough servers are being polled for a single list request to be
+        worthwhile, or None otherwise.
+
+        The list may not include every server (e.g. because it was paged or
+        the server has been deleted), so None is also returned for a server
+        missing from it.
+        '''
+        threshold = cfg.CONF.server_status_batch_threshold
+        if threshold <= 0:
+            return None
+
+        now = timeutils.utcnow_ts()
+        self._polled_servers[server.id] = now
+        for polled_id, polled_at in list(self._polled_servers.items()):
+            if polled_at <= now - self.server_poll_window:
+                del self._polled_servers[polled_id]
+        if len(self._polled_servers) < threshold:
+            return None
+
+        if (self._server_list is None or
+                self._server_list_time <= now - self.server_list_max_age):
+            try:
+                self._server_list = self._list_servers()
+            except exceptions.ClientException as exc:
+                LOG.warn(_LW('Failed to list servers: %s'), exc)
+                return None
+            self._server_list_time = now
+
+        return self._server_list.get(server.id)
+
     def refresh_server(self, server):
         '''
         Refresh server's attributes and log warnings for non-critical
         API errors.
+
+        When many servers are being polled at once, they are refreshed from
+        a single list of servers instead. Servers missing from the list are
+        refreshed individually.
         '''
+        listed = self._listed_server(server)
+        if listed is not None:
+            server._add_details(listed._info)
+            return
+
         try:
             server.get()
         except exceptions.OverLimit as exc:
@@ -149,7 +228,12 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         :returns: the id of :flavor:
         :raises: exception.FlavorMissing
         '''
-        flavor_id = None
+        flavor_id = self.lookup_id(
+            'flavor', flavor,
+            lambda: ((o.id, o.name) for o in self.client().flavors.list()))
+        if flavor_id is not None:
+            return flavor_id
+
         flavor_list = self.client().flavors.list()
         for o in flavor_list:
             if o.name == flavor:
@@ -399,12 +483,33 @@ echo -e '%s\tALL=(ALL)\tNOPASSWD: ALL' >> /etc/sudoers
 
         client.servers.set_meta(server, metadata)
 
+    def fetch_server(self, server_id):
+        '''
+        Return the server with the given ID, fetched from Nova.
+
+        A server fetched less than server_fetch_max_age seconds ago is
+        reused, so that resolving several attributes of a server needs only
+        a single request.
+        '''
+        now = timeutils.utcnow_ts()
+        for fetched_id, (fetched, fetched_at) in list(
+                self._fetched_servers.items()):
+            if fetched_at <= now - self.server_fetch_max_age:
+                del self._fetched_servers[fetched_id]
+
+        if server_id in self._fetched_servers:
+            return self._fetched_servers[server_id][0]
+
+        server = self.client().servers.get(server_id)
+        self._fetched_servers[server_id] = (server, now)
+        return server
+
     def server_to_ipaddress(self, server):
         '''
         Return the server's IP address, fetching it from Nova.
         '''
         try:
-            server = self.client().servers.get(server)
+            server = self.fetch_server(server)
         except exceptions.NotFound as ex:
             LOG.warn(_LW('Instance (%(server)s) not found: %(ex)s'),
                      {'server': server, 'ex': ex})
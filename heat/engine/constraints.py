@@ -15,13 +15,18 @@ import collections
 import numbers
 import re
 
+from oslo.config import cfg
 from oslo.utils import strutils
+from oslo.utils import timeutils
 import six
 
+from heat.common import cache
 from heat.common import exception
 from heat.common.i18n import _
 from heat.engine import resources
 
+cfg.CONF.import_opt('custom_constraint_cache_ttl', 'heat.common.config')
+
 
 class Schema(collections.Mapping):
     """
@@ -566,17 +571,51 @@ class BaseCustomConstraint(object):
 
     _error_message = None
 
+    # Values that passed validation, shared by all instances, mapped to the
+    # ID of the request that validated them and the time they expire
+    _validated = cache.LRUCache(1000, name='custom_constraints')
+
     def error(self, value):
         if self._error_message is None:
             return _("Error validating value %(value)r") % {"value": value}
         return _("Error validating value %(value)r: %(message)s") % {
             "value": value, "message": self._error_message}
 
+    def _cache_key(self, value, context):
+        key = (type(self), value, context.tenant_id, context.region_name)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _validated_before(self, key, context):
+        entry = self._validated.get(key)
+        if entry is None:
+            return False
+        request_id, expires = entry
+        return (request_id == context.request_id or
+                timeutils.utcnow_ts() < expires)
+
     def validate(self, value, context):
+        """Validate a value, reusing previous successful validations.
+
+        A value that validated successfully is not checked again for the
+        rest of the same request, or for the same tenant until the
+        custom_constraint_cache_ttl expires.
+        """
+        key = self._cache_key(value, context)
+        if key is not None and self._validated_before(key, context):
+            return True
+
         try:
             self.validate_with_client(context.clients, value)
         except self.expected_exceptions as e:
             self._error_message = str(e)
             return False
-        else:
-            return True
+
+        if key is not None:
+            expires = (timeutils.utcnow_ts() +
+                       cfg.CONF.custom_constraint_cache_ttl)
+            self._validated.set(key, (context.request_id, expires))
+        return True
@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import array
 import collections
 import itertools
 
@@ -160,16 +161,149 @@ class Graph(collections.defaultdict):
 
         This is a destructive operation for the graph.
         '''
-        for iteration in six.moves.xrange(len(graph)):
-            for key, node in six.iteritems(graph):
-                if not node:
-                    yield key
-                    del graph[key]
-                    break
-            else:
-                # There are nodes remaining, but none without
-                # dependencies: a cycle
-                raise CircularDependencyException(cycle=six.text_type(graph))
+        ready = collections.deque(k for k, n in six.iteritems(graph)
+                                  if not n)
+        while ready:
+            key = ready.popleft()
+            dependents = list(graph[key].required_by())
+            yield key
+            del graph[key]
+            ready.extend(k for k in dependents if not graph[k])
+
+        if graph:
+            # There are nodes remaining, but none without
+            # dependencies: a cycle
+            raise CircularDependencyException(cycle=six.text_type(graph))
+
+
+class CompactGraph(object):
+    '''
+    An immutable, array-backed representation of a dependency graph.
+
+    Each key is interned to an integer id, and the edges in each direction are
+    stored in compressed sparse row form - an array of offsets into an array
+    of ids. A reversed view of the graph shares the same storage.
+    '''
+
+    def __init__(self, keys, index, requires, required_by):
+        '''
+        Initialise with a list of keys, a dict mapping each key to its id, and
+        the (offsets, ids) arrays for the edges in each direction.
+        '''
+        self._keys = keys
+        self._index = index
+        self._requires = requires
+        self._required_by = required_by
+
+    @classmethod
+    def from_graph(cls, graph):
+        '''Return a CompactGraph with the same nodes and edges as a Graph.'''
+        keys = list(graph)
+        index = dict((k, i) for i, k in enumerate(keys))
+
+        def adjacency(targets):
+            offsets = array.array('i', [0])
+            ids = array.array('i')
+            for k in keys:
+                ids.extend(index[t] for t in targets(graph[k]))
+                offsets.append(len(ids))
+            return offsets, ids
+
+        return cls(keys, index,
+                   adjacency(iter), adjacency(lambda n: n.required_by()))
+
+    @staticmethod
+    def _targets(adjacency, node_id):
+        offsets, ids = adjacency
+        return ids[offsets[node_id]:offsets[node_id + 1]]
+
+    def __len__(self):
+        '''Count the number of nodes in the graph.'''
+        return len(self._keys)
+
+    def __iter__(self):
+        '''Iterate over the keys of the nodes in the graph.'''
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        '''Return True if the graph contains a node with the given key.'''
+        return key in self._index
+
+    def requires(self, key):
+        '''Iterate over the keys required by the specified node.'''
+        return (self._keys[i]
+                for i in self._targets(self._requires, self._index[key]))
+
+    def required_by(self, key):
+        '''Iterate over the keys that require the specified node.'''
+        return (self._keys[i]
+                for i in self._targets(self._required_by, self._index[key]))
+
+    def reverse(self):
+        '''Return a view of the graph with the edges reversed.'''
+        return CompactGraph(self._keys, self._index,
+                            self._required_by, self._requires)
+
+    def subgraph(self, keys):
+        '''
+        Return the subgraph consisting of the specified nodes and the edges
+        between them.
+        '''
+        node_ids = sorted(set(self._index[k] for k in keys))
+        renumber = dict((old, new) for new, old in enumerate(node_ids))
+        sub_keys = [self._keys[i] for i in node_ids]
+
+        def adjacency(edges):
+            offsets = array.array('i', [0])
+            ids = array.array('i')
+            for i in node_ids:
+                ids.extend(renumber[t] for t in self._targets(edges, i)
+                           if t in renumber)
+                offsets.append(len(ids))
+            return offsets, ids
+
+        return CompactGraph(sub_keys,
+                            dict((k, i) for i, k in enumerate(sub_keys)),
+                            adjacency(self._requires),
+                            adjacency(self._required_by))
+
+    def edges(self):
+        '''Return an iterator over all of the edges in the graph.'''
+        for i, key in enumerate(self._keys):
+            required = self._targets(self._requires, i)
+            if required:
+                for rqd in required:
+                    yield (key, self._keys[rqd])
+            elif not self._targets(self._required_by, i):
+                yield (key, None)
+
+    def to_graph(self):
+        '''Return a mutable Graph with the same nodes and edges.'''
+        return Graph((k, Node(set(self.requires(k)),
+                              set(self.required_by(k))))
+                     for k in self._keys)
+
+    def toposort(self):
+        '''Return a topologically sorted iterator over the graph.'''
+        offsets = self._requires[0]
+        unsatisfied = array.array('i', (offsets[i + 1] - offsets[i]
+                                        for i in six.moves.xrange(len(self))))
+        ready = collections.deque(i for i, c in enumerate(unsatisfied)
+                                  if not c)
+        while ready:
+            node_id = ready.popleft()
+            yield self._keys[node_id]
+            for rqr in self._targets(self._required_by, node_id):
+                unsatisfied[rqr] -= 1
+                if not unsatisfied[rqr]:
+                    ready.append(rqr)
+
+        remaining = [k for k, c in zip(self._keys, unsatisfied) if c]
+        if remaining:
+            # There are nodes remaining, but none without
+            # dependencies: a cycle
+            cycle = self.subgraph(remaining).to_graph()
+            raise CircularDependencyException(cycle=six.text_type(cycle))
 
 
 class Dependencies(object):
@@ -182,26 +316,63 @@ class Dependencies(object):
         '''
         edges = edges or []
         self._graph = Graph()
+        self._compact = None
         for e in edges:
             self += e
 
+    def _mutable_graph(self):
+        '''Return the underlying graph in a form that can be modified.'''
+        if self._graph is None:
+            self._graph = self._compact.to_graph()
+        self._compact = None
+        return self._graph
+
+    def view(self, reverse=False):
+        '''
+        Return an immutable view of the dependency graph.
+
+        Once the graph has been built, it is stored in compact form and views
+        of it (in either direction) share that storage, so they can be
+        traversed repeatedly without copying.
+        '''
+        if self._compact is None:
+            self._compact = CompactGraph.from_graph(self._graph)
+            self._graph = None
+        if reverse:
+            return self._compact.reverse()
+        return self._compact
+
     def __iadd__(self, edge):
         '''Add another edge, in the form of a (requirer, required) tuple.'''
         requirer, required = edge
+        graph = self._mutable_graph()
 
         if required is None:
             # Just ensure the node is created by accessing the defaultdict
-            self._graph[requirer]
+            graph[requirer]
         else:
-            self._graph[required].required_by(requirer)
-            self._graph[requirer].requires(required)
+            graph[required].required_by(requirer)
+            graph[requirer].requires(required)
 
         return self
 
+    def requires(self, target):
+        '''
+        List the keys that the specified node requires.
+        '''
+        if self._graph is None:
+            return self._compact.requires(target)
+        if target not in self._graph:
+            raise KeyError
+
+        return iter(self._graph[target])
+
     def required_by(self, last):
         '''
         List the keys that require the specified node.
         '''
+        if self._graph is None:
+            return self._compact.required_by(last)
         if last not in self._graph:
             raise KeyError
 
@@ -212,58 +383,49 @@ class Dependencies(object):
         Return a partial dependency graph consisting of the specified node and
         all those that require it only.
         '''
-        if last not in self._graph:
+        view = self.view()
+        if last not in view:
             raise KeyError
 
-        def get_edges(key):
-            def requirer_edges(rqr):
-                # Concatenate the dependency on the current node with the
-                # recursive generated list
-                return itertools.chain([(rqr, key)], get_edges(rqr))
-
-            # Get the edge list for each node that requires the current node
-            edge_lists = itertools.imap(requirer_edges,
-                                        self._graph[key].required_by())
-            # Combine the lists into one long list
-            return itertools.chain.from_iterable(edge_lists)
-
-        if self._graph[last].stem():
-            # Nothing requires this, so just add the node itself
-            edges = [(last, None)]
-        else:
-            edges = get_edges(last)
+        keys = set([last])
+        unvisited = [last]
+        while unvisited:
+            for rqr in view.required_by(unvisited.pop()):
+                if rqr not in keys:
+                    keys.add(rqr)
+                    unvisited.append(rqr)
 
-        return Dependencies(edges)
+        partial = Dependencies()
+        partial._graph = None
+        partial._compact = view.subgraph(keys)
+        return partial
 
     def __str__(self):
         '''
         Return a human-readable string representation of the dependency graph
         '''
-        return str(self._graph)
+        return str(self.graph())
 
     def __unicode__(self):
         '''
         Return a human-readable string representation of the dependency graph
         '''
-        return unicode(self._graph)
+        return unicode(self.graph())
 
     def __repr__(self):
         '''Return a string representation of the object.'''
-        edge_reprs = (repr(e) for e in self._graph.edges())
+        edge_reprs = (repr(e) for e in self.view().edges())
         text = 'Dependencies([%s])' % ', '.join(edge_reprs)
         return encodeutils.safe_encode(text)
 
     def graph(self, reverse=False):
         '''Return a copy of the underlying dependency graph.'''
-        if reverse:
-            return self._graph.reverse_copy()
-        else:
-            return self._graph.copy()
+        return self.view(reverse=reverse).to_graph()
 
     def __iter__(self):
         '''Return a topologically sorted iterator'''
-        return Graph.toposort(self.graph())
+        return self.view().toposort()
 
     def __reversed__(self):
         '''Return a reverse topologically sorted iterator'''
-        return Graph.toposort(self.graph(reverse=True))
+        return self.view(reverse=True).toposort()
@@ -65,8 +65,11 @@ class Event(object):
                    ev.resource_properties, ev.resource_name,
                    ev.resource_type, ev.uuid, ev.created_at, ev.id)
 
-    def store(self):
-        '''Store the Event in the database.'''
+    def store(self, batch=None):
+        '''
+        Store the Event in the database. If a write batch is supplied, the
+        Event is buffered in it instead and no ID is assigned.
+        '''
         ev = {
             'resource_name': self.resource_name,
             'physical_resource_id': self.physical_resource_id,
@@ -84,6 +87,10 @@ class Event(object):
         if self.timestamp is not None:
             ev['created_at'] = self.timestamp
 
+        if batch is not None:
+            batch.event_add(ev)
+            return None
+
         new_ev = db_api.event_create(self.context, ev)
         self.id = new_ev.id
         return self.id
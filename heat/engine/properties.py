@@ -12,15 +12,24 @@
 #    under the License.
 
 import collections
+import contextlib
+import copy
 
+from oslo.config import cfg
 import six
 
 from heat.common import exception
 from heat.common.i18n import _
+from heat.common.i18n import _LW
 from heat.engine import constraints as constr
 from heat.engine import function
 from heat.engine import parameters
 from heat.engine import support
+from heat.openstack.common import log as logging
+
+cfg.CONF.import_opt('verify_memoized_properties', 'heat.common.config')
+
+LOG = logging.getLogger(__name__)
 
 SCHEMA_KEYS = (
     REQUIRED, IMPLEMENTED, DEFAULT, TYPE, SCHEMA,
@@ -334,6 +343,7 @@ class Properties(collections.Mapping):
         else:
             self.error_prefix = '%s: ' % parent_name
         self.context = context
+        self._memo = None
 
     @staticmethod
     def schema_from_params(params_snippet):
@@ -378,7 +388,56 @@ class Properties(collections.Mapping):
                 msg = _("Unknown Property %s") % key
                 raise exception.StackValidationFailed(message=msg)
 
+    @contextlib.contextmanager
+    def memoized(self):
+        """
+        Return a context manager within which each property value is
+        resolved only once.
+
+        Values are resolved on first access and then reused until the
+        context manager exits, so it must only be used while the inputs to
+        the property data (e.g. attributes of other resources) are not
+        expected to change, such as for the duration of a resource action.
+        """
+        outermost = self._memo is None
+        if outermost:
+            self._memo = {}
+        try:
+            yield self
+        finally:
+            if outermost:
+                self._memo = None
+
+    @staticmethod
+    def _copy_value(value):
+        if isinstance(value, (collections.Mapping, list)):
+            return copy.deepcopy(value)
+        return value
+
+    def _get_memoized_value(self, key):
+        value = self._memo[key]
+        if cfg.CONF.verify_memoized_properties:
+            current = self._resolve_property_value(key)
+            if current != value:
+                LOG.warning(_LW('%(prefix)sMemoized value of property '
+                                '%(key)s is stale'),
+                            {'prefix': self.error_prefix, 'key': key})
+                self._memo[key] = self._copy_value(current)
+                return current
+        return self._copy_value(value)
+
     def _get_property_value(self, key, validate=False):
+        if self._memo is None:
+            return self._resolve_property_value(key, validate)
+
+        if not validate and key in self._memo:
+            return self._get_memoized_value(key)
+
+        value = self._resolve_property_value(key, validate)
+        self._memo[key] = self._copy_value(value)
+        return value
+
+    def _resolve_property_value(self, key, validate=False):
         if key not in self:
             raise KeyError(_('%(prefix)sInvalid Property %(key)s') %
                            {'prefix': self.error_prefix, 'key': key})
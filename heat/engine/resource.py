@@ -105,6 +105,10 @@ class Resource(object):
     # throughout its lifecycle
     requires_deferred_auth = False
 
+    # If True, this resource waits for a signal from other resources (which
+    # need not depend on it) before its actions complete
+    waits_for_signal = False
+
     # Limit to apply to physical_resource_name() size reduction algorithm.
     # If set to None no limit will be applied.
     physical_resource_name_limit = 255
@@ -459,28 +463,32 @@ class Resource(object):
 
         Expected exceptions are re-raised, with the Resource left in the
         IN_PROGRESS state.
+
+        Property values are resolved only once for the duration of the action.
         '''
-        try:
-            self.state_set(action, self.IN_PROGRESS)
-            yield
-        except expected_exceptions as ex:
-            with excutils.save_and_reraise_exception():
-                LOG.debug('%s', six.text_type(ex))
-        except Exception as ex:
-            LOG.info('%(action)s: %(info)s', {"action": action,
-                                              "info": six.text_type(self)},
-                     exc_info=True)
-            failure = exception.ResourceFailure(ex, self, action)
-            self.state_set(action, self.FAILED, six.text_type(failure))
-            raise failure
-        except:  # noqa
-            with excutils.save_and_reraise_exception():
-                try:
-                    self.state_set(action, self.FAILED, '%s aborted' % action)
-                except Exception:
-                    LOG.exception(_LE('Error marking resource as failed'))
-        else:
-            self.state_set(action, self.COMPLETE)
+        with self.properties.memoized():
+            try:
+                self.state_set(action, self.IN_PROGRESS)
+                yield
+            except expected_exceptions as ex:
+                with excutils.save_and_reraise_exception():
+                    LOG.debug('%s', six.text_type(ex))
+            except Exception as ex:
+                LOG.info('%(action)s: %(info)s', {"action": action,
+                                                  "info": six.text_type(self)},
+                         exc_info=True)
+                failure = exception.ResourceFailure(ex, self, action)
+                self.state_set(action, self.FAILED, six.text_type(failure))
+                raise failure
+            except:  # noqa
+                with excutils.save_and_reraise_exception():
+                    try:
+                        self.state_set(action, self.FAILED,
+                                       '%s aborted' % action)
+                    except Exception:
+                        LOG.exception(_LE('Error marking resource as failed'))
+            else:
+                self.state_set(action, self.COMPLETE)
 
     def action_handler_task(self, action, args=[], action_prefix=None):
         '''
@@ -905,7 +913,10 @@ class Resource(object):
 
     def resource_id_set(self, inst):
         self.resource_id = inst
-        if self.id is not None:
+        if self.id is not None and self.stack.write_batch is not None:
+            self.stack.write_batch.resource_update(
+                self.id, {'nova_instance': self.resource_id})
+        elif self.id is not None:
             try:
                 rs = db_api.resource_get(self.context, self.id)
                 rs.update_and_save({'nova_instance': self.resource_id})
@@ -939,7 +950,7 @@ class Resource(object):
                          self.resource_id, self.properties,
                          self.name, self.type())
 
-        ev.store()
+        ev.store(batch=self.stack.write_batch)
 
     def _store_or_update(self, action, status, reason):
         self.action = action
@@ -947,16 +958,19 @@ class Resource(object):
         self.status_reason = reason
 
         if self.id is not None:
+            values = {'action': self.action,
+                      'status': self.status,
+                      'status_reason': reason,
+                      'stack_id': self.stack.id,
+                      'updated_at': self.updated_time,
+                      'properties_data': self._stored_properties_data,
+                      'nova_instance': self.resource_id}
+            if self.stack.write_batch is not None:
+                self.stack.write_batch.resource_update(self.id, values)
+                return
             try:
                 rs = db_api.resource_get(self.context, self.id)
-                rs.update_and_save({
-                    'action': self.action,
-                    'status': self.status,
-                    'status_reason': reason,
-                    'stack_id': self.stack.id,
-                    'updated_at': self.updated_time,
-                    'properties_data': self._stored_properties_data,
-                    'nova_instance': self.resource_id})
+                rs.update_and_save(values)
             except Exception as ex:
                 LOG.error(_LE('DB error %s'), ex)
 
@@ -999,7 +1013,7 @@ class Resource(object):
         if new_state != old_state:
             self._add_event(action, status, reason)
 
-        self.stack.reset_resource_attributes()
+        self.stack.reset_resource_attributes(self)
 
     @property
     def state(self):
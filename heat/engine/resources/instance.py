@@ -823,7 +823,9 @@ class Instance(resource.Resource):
         Refresh the metadata if new_metadata is None
         '''
         if new_metadata is None:
-            self.metadata_set(self.t.metadata())
+            tmpl_meta = self.t.metadata()
+            if tmpl_meta != self.metadata_get(refresh=True):
+                self.metadata_set(tmpl_meta)
 
     def validate(self):
         '''
@@ -240,15 +240,12 @@ class Port(neutron.NeutronResource):
         # It is not known which subnet a port might be assigned
         # to so all subnets in a network should be created before
         # the ports in that network.
-        for res in self.stack.itervalues():
-            if res.has_interface('OS::Neutron::Subnet'):
-                dep_network = res.properties.get(
-                    subnet.Subnet.NETWORK) or res.properties.get(
-                        subnet.Subnet.NETWORK_ID)
-                network = self.properties.get(
-                    self.NETWORK) or self.properties.get(self.NETWORK_ID)
-                if dep_network == network:
-                    deps += (self, res)
+        network = self.properties.get(
+            self.NETWORK) or self.properties.get(self.NETWORK_ID)
+        subnets = self.stack.resource_index('OS::Neutron::Subnet',
+                                            subnet.Subnet.network_key)
+        for res in subnets.get(network, []):
+            deps += (self, res)
 
     def handle_create(self):
         props = self.prepare_properties(
@@ -117,13 +117,10 @@ class Router(neutron.NeutronResource):
         external_gw = self.properties.get(self.EXTERNAL_GATEWAY)
         if external_gw:
             external_gw_net = external_gw.get(self.EXTERNAL_GATEWAY_NETWORK)
-            for res in self.stack.itervalues():
-                if res.has_interface('OS::Neutron::Subnet'):
-                    subnet_net = res.properties.get(
-                        subnet.Subnet.NETWORK) or res.properties.get(
-                            subnet.Subnet.NETWORK_ID)
-                    if subnet_net == external_gw_net:
-                        deps += (self, res)
+            subnets = self.stack.resource_index('OS::Neutron::Subnet',
+                                                subnet.Subnet.network_key)
+            for res in subnets.get(external_gw_net, []):
+                deps += (self, res)
 
     def prepare_properties(self, properties, name):
         props = super(Router, self).prepare_properties(properties, name)
@@ -236,6 +233,11 @@ class RouterInterface(neutron.NeutronResource):
             return False
         return True
 
+    @staticmethod
+    def router_id_key(resource):
+        '''Return the router_id of an interface, for a resource index.'''
+        return resource.properties.get(RouterInterface.ROUTER_ID)
+
     def validate(self):
         """Validate any of the provided params."""
         super(RouterInterface, self).validate()
@@ -321,6 +323,12 @@ class RouterGateway(neutron.NeutronResource):
 
     }
 
+    @staticmethod
+    def network_key(resource):
+        '''Return the network of a gateway, for use in a resource index.'''
+        return (resource.properties.get(RouterGateway.NETWORK) or
+                resource.properties.get(RouterGateway.NETWORK_ID))
+
     def validate(self):
         super(RouterGateway, self).validate()
         self._validate_depr_property_required(
@@ -328,26 +336,20 @@ class RouterGateway(neutron.NeutronResource):
 
     def add_dependencies(self, deps):
         super(RouterGateway, self).add_dependencies(deps)
-        for resource in self.stack.itervalues():
-            # depend on any RouterInterface in this template with the same
-            # router_id as this router_id
-            if resource.has_interface('OS::Neutron::RouterInterface'):
-                dep_router_id = resource.properties.get(
-                    RouterInterface.ROUTER_ID)
-                router_id = self.properties.get(self.ROUTER_ID)
-                if dep_router_id == router_id:
-                    deps += (self, resource)
-            # depend on any subnet in this template with the same network_id
-            # as this network_id, as the gateway implicitly creates a port
-            # on that subnet
-            if resource.has_interface('OS::Neutron::Subnet'):
-                dep_network = resource.properties.get(
-                    subnet.Subnet.NETWORK) or resource.properties.get(
-                        subnet.Subnet.NETWORK_ID)
-                network = self.properties.get(
-                    self.NETWORK) or self.properties.get(self.NETWORK_ID)
-                if dep_network == network:
-                    deps += (self, resource)
+        # depend on any RouterInterface in this template with the same
+        # router_id as this router_id
+        interfaces = self.stack.resource_index(
+            'OS::Neutron::RouterInterface', RouterInterface.router_id_key)
+        for resource in interfaces.get(self.properties.get(self.ROUTER_ID),
+                                       []):
+            deps += (self, resource)
+        # depend on any subnet in this template with the same network_id
+        # as this network_id, as the gateway implicitly creates a port
+        # on that subnet
+        subnets = self.stack.resource_index('OS::Neutron::Subnet',
+                                            subnet.Subnet.network_key)
+        for resource in subnets.get(self.network_key(self), []):
+            deps += (self, resource)
 
     def handle_create(self):
         router_id = self.properties.get(self.ROUTER_ID)
@@ -196,6 +196,12 @@ class Subnet(neutron.NeutronResource):
         if props.get(cls.GATEWAY_IP) == '':
             props[cls.GATEWAY_IP] = None
 
+    @staticmethod
+    def network_key(resource):
+        '''Return the network of a subnet, for use in a resource index.'''
+        return (resource.properties.get(Subnet.NETWORK) or
+                resource.properties.get(Subnet.NETWORK_ID))
+
     def validate(self):
         super(Subnet, self).validate()
         self._validate_depr_property_required(self.properties,
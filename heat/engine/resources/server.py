@@ -688,7 +688,7 @@ class Server(stack_user.StackUser):
         if name == self.NAME_ATTR:
             return self._server_name()
         try:
-            server = self.nova().servers.get(self.resource_id)
+            server = self.client_plugin().fetch_server(self.resource_id)
         except Exception as e:
             self.client_plugin().ignore_not_found(e)
             return ''
@@ -717,20 +717,18 @@ class Server(stack_user.StackUser):
         nets = self.properties.get(self.NETWORKS)
         if not nets:
             return
-        for res in self.stack.itervalues():
-            if res.has_interface('OS::Neutron::Subnet'):
-                subnet_net = (res.properties.get(subnet.Subnet.NETWORK_ID)
-                              or res.properties.get(subnet.Subnet.NETWORK))
-                for net in nets:
-                    # worry about network_id because that could be the match
-                    # assigned to the subnet as well and could have been
-                    # created by this stack. Regardless, the server should
-                    # still wait on the subnet.
-                    net_id = (net.get(self.NETWORK_ID) or
-                              net.get(self.NETWORK_UUID))
-                    if net_id and net_id == subnet_net:
-                        deps += (self, res)
-                        break
+        subnets = self.stack.resource_index('OS::Neutron::Subnet',
+                                            subnet.Subnet.network_key)
+        for net in nets:
+            # worry about network_id because that could be the match
+            # assigned to the subnet as well and could have been
+            # created by this stack. Regardless, the server should
+            # still wait on the subnet.
+            net_id = (net.get(self.NETWORK_ID) or
+                      net.get(self.NETWORK_UUID))
+            if net_id:
+                for res in subnets.get(net_id, []):
+                    deps += (self, res)
 
     def _get_network_matches(self, old_networks, new_networks):
         # make new_networks similar on old_networks
@@ -934,9 +932,10 @@ class Server(stack_user.StackUser):
             # and the resource itself adds keys to the metadata which
             # are not specified in the template (e.g the deployments data)
             meta = self.metadata_get(refresh=True) or {}
-            tmpl_meta = self.t.metadata()
-            meta.update(tmpl_meta)
-            self.metadata_set(meta)
+            new_meta = dict(meta)
+            new_meta.update(self.t.metadata())
+            if new_meta != meta:
+                self.metadata_set(new_meta)
 
     @staticmethod
     def _check_maximum(count, maximum, msg):
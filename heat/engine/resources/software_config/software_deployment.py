@@ -63,6 +63,8 @@ class SoftwareDeployment(signal_responder.SignalResponder):
 
     support_status = support.SupportStatus(version='2014.1')
 
+    waits_for_signal = True
+
     PROPERTIES = (
         CONFIG, SERVER, INPUT_VALUES,
         DEPLOY_ACTIONS, NAME, SIGNAL_TRANSPORT
@@ -547,6 +549,8 @@ class SoftwareDeployments(resource_group.ResourceGroup):
 
     support_status = support.SupportStatus(version='2014.2')
 
+    waits_for_signal = True
+
     PROPERTIES = (
         SERVERS,
         CONFIG,
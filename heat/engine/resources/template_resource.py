@@ -11,11 +11,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+import hashlib
 import json
 
+from oslo.config import cfg
 from requests import exceptions
 import six
 
+from heat.common import cache
 from heat.common import exception
 from heat.common.i18n import _
 from heat.common import template_format
@@ -26,11 +30,59 @@ from heat.engine import properties
 from heat.engine import stack_resource
 from heat.engine import template
 
+cfg.CONF.import_opt('max_template_cache_size', 'heat.common.config')
+
+
+class ParsedTemplate(object):
+    '''
+    A provider template parsed once, together with the property and
+    attribute schemata derived from it for each set of parameter defaults.
+    '''
+
+    def __init__(self, data):
+        self.size = len(data)
+        self._template = template_format.parse(data)
+        self._schemas = cache.LRUCache(100)
+
+    def template(self):
+        '''Return a copy of the parsed template that may be modified.'''
+        return copy.deepcopy(self._template)
+
+    def schemas(self, param_defaults):
+        '''Return the properties and attributes schemata.'''
+        key = json.dumps(param_defaults, sort_keys=True)
+        schemas = self._schemas.get(key)
+        if schemas is None:
+            tmpl = template.Template(self.template())
+            schemas = TemplateResource.get_schemas(tmpl, param_defaults)
+            self._schemas.set(key, schemas)
+        props, attrs = schemas
+        return dict(props), dict(attrs)
+
+
+# Parsed provider templates, keyed by a hash of their contents and shared
+# by all the template resources in the process.
+_parsed_templates = cache.LRUCache(
+    lambda: cfg.CONF.max_template_cache_size,
+    sizeof=lambda parsed: parsed.size, name='provider_templates')
+
+
+def parse_template(data):
+    '''Return the ParsedTemplate for the given provider template data.'''
+    if isinstance(data, six.text_type):
+        key = hashlib.sha256(data.encode('utf-8')).hexdigest()
+    else:
+        key = hashlib.sha256(data).hexdigest()
+    parsed = _parsed_templates.get(key)
+    if parsed is None:
+        parsed = ParsedTemplate(data)
+        _parsed_templates.set(key, parsed)
+    return parsed
+
 
 def generate_class(name, template_name, env):
     data = TemplateResource.get_template_file(template_name, ('file',))
-    tmpl = template.Template(template_format.parse(data))
-    props, attrs = TemplateResource.get_schemas(tmpl, env.param_defaults)
+    props, attrs = parse_template(data).schemas(env.param_defaults)
     cls = type(name, (TemplateResource,),
                {'properties_schema': props,
                 'attributes_schema': attrs})
@@ -47,6 +99,7 @@ class TemplateResource(stack_resource.StackResource):
     '''
 
     def __init__(self, name, json_snippet, stack):
+        self._parsed_template = None
         self._parsed_nested = None
         self.stack = stack
         self.validation_exception = None
@@ -92,15 +145,19 @@ class TemplateResource(stack_resource.StackResource):
     def _generate_schema(self, definition):
         self._parsed_nested = None
         try:
-            tmpl = template.Template(self.child_template())
+            self._parsed_template = parse_template(self.template_data())
         except (exception.NotFound, ValueError) as download_error:
             self.validation_exception = download_error
+            self._parsed_template = None
             tmpl = template.Template(
                 {"HeatTemplateFormatVersion": "2012-12-12"})
+            schemas = self.get_schemas(tmpl, self.stack.env.param_defaults)
+        else:
+            schemas = self._parsed_template.schemas(
+                self.stack.env.param_defaults)
 
         # re-generate the properties and attributes from the template.
-        self.properties_schema, self.attributes_schema = self.get_schemas(
-            tmpl, self.stack.env.param_defaults)
+        self.properties_schema, self.attributes_schema = schemas
 
         self.properties = definition.properties(self.properties_schema,
                                                 self.context)
@@ -150,7 +207,9 @@ class TemplateResource(stack_resource.StackResource):
 
     def child_template(self):
         if not self._parsed_nested:
-            self._parsed_nested = template_format.parse(self.template_data())
+            if self._parsed_template is None:
+                self._parsed_template = parse_template(self.template_data())
+            self._parsed_nested = self._parsed_template.template()
         return self._parsed_nested
 
     def implementation_signature(self):
@@ -303,6 +303,8 @@ class HeatWaitCondition(resource.Resource):
 
     support_status = support.SupportStatus(version='2014.2')
 
+    waits_for_signal = True
+
     PROPERTIES = (
         HANDLE, TIMEOUT, COUNT,
     ) = (
@@ -11,13 +11,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import functools
+import heapq
 import itertools
 import sys
 import time
 import types
 
 import eventlet
+from oslo.config import cfg
 from oslo.utils import encodeutils
 from oslo.utils import excutils
 import six
@@ -28,6 +31,8 @@ from heat.openstack.common import log as logging
 
 LOG = logging.getLogger(__name__)
 
+cfg.CONF.import_opt('min_task_wait_time', 'heat.common.config')
+
 
 # Whether TaskRunner._sleep actually does an eventlet sleep when called.
 ENABLE_SLEEP = True
@@ -125,6 +130,93 @@ class ExceptionGroup(Exception):
         return unicode(map(unicode, self.exceptions))
 
 
+class WakeupHint(object):
+    """
+    A hint, yielded by a task, of when the task next needs to be stepped.
+
+    A task that yields None is stepped again at the next opportunity. A task
+    may instead yield a WakeupHint to indicate that there is no point stepping
+    it again until a (wallclock) deadline has passed or until one of a list of
+    events (e.g. eventlet Events) is ready, whichever happens first. Yielding
+    an event directly is equivalent to yielding a WakeupHint for that event.
+    """
+
+    def __init__(self, deadline=None, events=None):
+        self.deadline = deadline
+        self.events = list(events or [])
+        assert deadline is not None or self.events, "Wakeup hint never ready"
+
+    @classmethod
+    def after(cls, delay):
+        """Return a hint to wake up after the given number of seconds."""
+        return cls(deadline=wallclock() + delay)
+
+    @classmethod
+    def earliest(cls, hints):
+        """
+        Return a hint to wake up when the first of the given hints is ready.
+
+        If any of the hints is None, then so is the result.
+        """
+        hints = list(hints)
+        if not hints or any(h is None for h in hints):
+            return None
+
+        deadlines = [h.deadline for h in hints if h.deadline is not None]
+        events = itertools.chain.from_iterable(h.events for h in hints)
+        return cls(deadline=min(deadlines) if deadlines else None,
+                   events=events)
+
+    def remaining(self):
+        """
+        Return the number of seconds until the deadline, or None if there is
+        no deadline.
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - wallclock(), 0)
+
+    def ready(self):
+        """Return True if the deadline has passed or any event is ready."""
+        if self.deadline is not None and wallclock() >= self.deadline:
+            return True
+        return any(e.ready() for e in self.events)
+
+
+class ConcurrencyLimit(object):
+    """
+    A limit on the number of subtasks that may be running at once.
+
+    A single limit may be shared between many task groups (e.g. to limit the
+    number of resources being acted on across all stacks in an engine).
+    Unlike a semaphore, acquiring a ConcurrencyLimit never blocks; a task
+    group that fails to acquire it simply tries again on its next step.
+    """
+
+    def __init__(self, limit=None):
+        """
+        Initialise with the maximum number of running subtasks. A limit of
+        None or 0 means that the number is unlimited.
+        """
+        self.limit = limit
+        self.running = 0
+
+    def available(self):
+        """Return True if a slot is free."""
+        return not self.limit or self.running < self.limit
+
+    def acquire(self):
+        """Take a slot, if one is free, and return True; else False."""
+        if not self.available():
+            return False
+        self.running += 1
+        return True
+
+    def release(self):
+        """Free a slot previously taken with acquire()."""
+        self.running -= 1
+
+
 class TaskRunner(object):
     """
     Wrapper for a resumable task (co-routine).
@@ -146,6 +238,9 @@ class TaskRunner(object):
         self._runner = None
         self._done = False
         self._timeout = None
+        self._wakeup = None
+        self._backoff = 0
+        self._max_wait_time = 1
         self.name = task_description(task)
 
     def __str__(self):
@@ -164,17 +259,82 @@ class TaskRunner(object):
             LOG.debug('%s sleeping' % six.text_type(self))
             eventlet.sleep(wait_time)
 
+    def _wait_for_events(self, events, timeout):
+        """
+        Sleep until any of the specified events is ready, or for at most
+        `timeout` seconds if that is not None.
+        """
+        if not ENABLE_SLEEP or any(e.ready() for e in events):
+            return
+
+        LOG.debug('%s waiting' % six.text_type(self))
+        waker = eventlet.event.Event()
+
+        def notify(event):
+            try:
+                event.wait()
+            except Exception:
+                pass
+            if not waker.ready():
+                waker.send()
+
+        watchers = [eventlet.spawn(notify, e) for e in events]
+        try:
+            with eventlet.Timeout(timeout, False):
+                waker.wait()
+        finally:
+            for w in watchers:
+                w.kill()
+
+    def _wait(self, wait_time):
+        """
+        Wait before running the next step of the task.
+
+        If the last step yielded a WakeupHint, sleep only until the hint is
+        ready (or the task times out). Otherwise, sleep for `wait_time`
+        seconds.
+        """
+        hint = self.wakeup_hint()
+        if wait_time is None or hint is None:
+            self._sleep(wait_time)
+        elif hint.events:
+            self._wait_for_events(hint.events, hint.remaining())
+        else:
+            self._sleep(hint.remaining())
+
+    def _hint_from(self, value):
+        """Return a WakeupHint (or None) for a value yielded by the task."""
+        if isinstance(value, WakeupHint):
+            self._backoff = 0
+            return value
+        if callable(getattr(value, 'ready', None)):
+            self._backoff = 0
+            return WakeupHint(events=[value])
+
+        min_wait_time = cfg.CONF.min_task_wait_time
+        if min_wait_time is None:
+            return None
+
+        # The task gave no hint of its own, so back off exponentially
+        delay = min(min_wait_time * 2 ** self._backoff, self._max_wait_time)
+        if delay < self._max_wait_time:
+            self._backoff += 1
+        return WakeupHint.after(delay)
+
     def __call__(self, wait_time=1, timeout=None):
         """
         Start and run the task to completion.
 
-        The task will sleep for `wait_time` seconds between steps. To avoid
-        sleeping, pass `None` for `wait_time`.
+        The task will sleep for `wait_time` seconds between steps, or only
+        until any WakeupHint yielded by the task is ready. To avoid sleeping,
+        pass `None` for `wait_time`.
         """
+        if wait_time is not None:
+            self._max_wait_time = wait_time
         self.start(timeout=timeout)
         # ensure that wait is applied only if task has not completed.
         if not self.done():
-            self._sleep(wait_time)
+            self._wait(wait_time)
         self.run_to_completion(wait_time=wait_time)
 
     def start(self, timeout=None):
@@ -219,7 +379,7 @@ class TaskRunner(object):
                 LOG.debug('%s running' % six.text_type(self))
 
                 try:
-                    next(self._runner)
+                    self._wakeup = self._hint_from(next(self._runner))
                 except StopIteration:
                     self._done = True
                     LOG.debug('%s complete' % six.text_type(self))
@@ -230,11 +390,14 @@ class TaskRunner(object):
         """
         Run the task to completion.
 
-        The task will sleep for `wait_time` seconds between steps. To avoid
-        sleeping, pass `None` for `wait_time`.
+        The task will sleep for `wait_time` seconds between steps, or only
+        until any WakeupHint yielded by the task is ready. To avoid sleeping,
+        pass `None` for `wait_time`.
         """
+        if wait_time is not None:
+            self._max_wait_time = wait_time
         while not self.step():
-            self._sleep(wait_time)
+            self._wait(wait_time)
 
     def cancel(self, grace_period=None):
         """Cancel the task and mark it as done."""
@@ -259,6 +422,30 @@ class TaskRunner(object):
         """Return True if the task is complete."""
         return self._done
 
+    def wakeup_hint(self):
+        """
+        Return a WakeupHint for when the task next needs to be stepped, or
+        None if it should simply be stepped at the next opportunity.
+
+        The hint takes into account any timeout on the task.
+        """
+        if self.done():
+            return WakeupHint(deadline=wallclock())
+
+        hint = self._wakeup
+        if hint is None or self._timeout is None:
+            return hint
+        return WakeupHint.earliest([hint,
+                                    WakeupHint(self._timeout._endtime)])
+
+    def due(self):
+        """
+        Return True if the task should be stepped now; False if it has yielded
+        a WakeupHint that is not yet ready.
+        """
+        hint = self.wakeup_hint()
+        return hint is None or hint.ready()
+
     def __nonzero__(self):
         """Return True if there are steps remaining."""
         return not self.done()
@@ -332,7 +519,7 @@ class DependencyTaskGroup(object):
 
     def __init__(self, dependencies, task=lambda o: o(),
                  reverse=False, name=None, error_wait_time=None,
-                 aggregate_exceptions=False):
+                 aggregate_exceptions=False, limits=None):
         """
         Initialise with the task dependencies and (optionally) a task to run on
         each.
@@ -350,9 +537,38 @@ class DependencyTaskGroup(object):
         will not be cancelled in the event of an error (operations downstream
         of the error will be cancelled). Once all chains are complete, any
         errors will be rolled up into an ExceptionGroup exception.
+
+        If limits is specified, it should be a function that takes an object
+        from the dependency tree and returns a list of ConcurrencyLimits, all
+        of which must be acquired before the corresponding subtask is started.
+        Subtasks that are ready to start are then started in order of the
+        length of the longest chain of subtasks that depend on them, so that
+        the critical path through the graph is favoured.
         """
         self._runners = dict((o, TaskRunner(task, o)) for o in dependencies)
-        self._graph = dependencies.graph(reverse=reverse)
+        self._graph = dependencies.view(reverse=reverse)
+        # Number of unsatisfied dependencies of each subtask in the graph
+        self._unsatisfied = dict((k, len(list(self._graph.requires(k))))
+                                 for k in self._graph)
+        # Subtasks that have been neither started nor cancelled
+        self._pending = set(self._runners)
+        # Subtasks whose dependencies have all been satisfied
+        self._ready_keys = collections.deque()
+        # Subtasks that have been started but not yet removed from the graph
+        self._started = {}
+        self._limits = limits
+        # Concurrency limits acquired by each started subtask
+        self._held = {}
+        if limits is not None:
+            self._priorities = self._critical_path_lengths()
+            self._ready_keys = []
+            self._ready_count = itertools.count()
+        # Ready subtasks that could not be started, by the ConcurrencyLimit
+        # that blocked them
+        self._parked = {}
+        for k in self._graph:
+            if not self._unsatisfied[k]:
+                self._push_ready(k)
         self.error_wait_time = error_wait_time
         self.aggregate_exceptions = aggregate_exceptions
 
@@ -370,26 +586,36 @@ class DependencyTaskGroup(object):
     def __call__(self):
         """Return a co-routine which runs the task group."""
         raised_exceptions = []
-        while any(self._runners.itervalues()):
-            try:
-                for k, r in self._ready():
-                    r.start()
-
-                yield
-
-                for k, r in self._running():
-                    if r.step():
-                        del self._graph[k]
-            except Exception:
-                exc_info = sys.exc_info()
-                if self.aggregate_exceptions:
-                    self._cancel_recursively(k, r)
-                else:
-                    self.cancel_all(grace_period=self.error_wait_time)
-                raised_exceptions.append(exc_info)
-            except:  # noqa
-                with excutils.save_and_reraise_exception():
-                    self.cancel_all()
+        try:
+            while self._pending or any(six.itervalues(self._started)):
+                try:
+                    for k, r in self._ready():
+                        r.start()
+
+                    if self._parked:
+                        # Poll until the concurrency limits allow more
+                        # subtasks to start
+                        yield
+                    else:
+                        yield WakeupHint.earliest(r.wakeup_hint()
+                                                  for k, r in self._running())
+
+                    for k, r in self._running():
+                        if r.due() and r.step():
+                            self._complete(k)
+                except Exception:
+                    exc_info = sys.exc_info()
+                    if self.aggregate_exceptions:
+                        self._cancel_recursively(k, r)
+                    else:
+                        self.cancel_all(grace_period=self.error_wait_time)
+                    raised_exceptions.append(exc_info)
+                except:  # noqa
+                    with excutils.save_and_reraise_exception():
+                        self.cancel_all()
+        finally:
+            for k in list(self._held):
+                self._release(k)
 
         if raised_exceptions:
             if self.aggregate_exceptions:
@@ -401,34 +627,124 @@ class DependencyTaskGroup(object):
     def cancel_all(self, grace_period=None):
         for r in self._runners.itervalues():
             r.cancel(grace_period=grace_period)
+        # Subtasks that had not been started are now cancelled
+        self._pending.clear()
 
     def _cancel_recursively(self, key, runner):
         runner.cancel()
-        node = self._graph[key]
-        for dependent_node in node.required_by():
+        self._pending.discard(key)
+        if key not in self._unsatisfied:
+            return
+
+        del self._unsatisfied[key]
+        self._started.pop(key, None)
+        self._release(key)
+        for dependent_node in self._graph.required_by(key):
             node_runner = self._runners[dependent_node]
             self._cancel_recursively(dependent_node, node_runner)
 
-        del self._graph[key]
+    def _complete(self, key):
+        """
+        Remove a completed subtask from the graph, and mark as ready any
+        subtasks that were waiting only for it.
+        """
+        self._started.pop(key, None)
+        self._release(key)
+        del self._unsatisfied[key]
+        for k in self._graph.required_by(key):
+            if k in self._unsatisfied:
+                self._unsatisfied[k] -= 1
+                if not self._unsatisfied[k]:
+                    self._push_ready(k)
+
+    def _critical_path_lengths(self):
+        """
+        Return a dict of the length of the longest chain of subtasks that
+        (directly or indirectly) depend on each subtask.
+        """
+        lengths = {}
+        for k in self._graph.reverse().toposort():
+            lengths[k] = 1 + max([lengths[d]
+                                  for d in self._graph.required_by(k)] or
+                                 [0])
+        return lengths
+
+    def _push_ready(self, key):
+        """Mark a subtask as ready to start."""
+        if self._limits is None:
+            self._ready_keys.append(key)
+        else:
+            heapq.heappush(self._ready_keys, (-self._priorities[key],
+                                              next(self._ready_count), key))
+
+    def _pop_ready(self):
+        """Return the next subtask that is ready to start."""
+        if self._limits is None:
+            return self._ready_keys.popleft()
+        return heapq.heappop(self._ready_keys)[-1]
+
+    def _acquire(self, key):
+        """
+        Acquire all of the concurrency limits that apply to a subtask, and
+        return None; or, if that is not possible, acquire none and return
+        the limit that could not be acquired.
+        """
+        if self._limits is None:
+            return None
+
+        acquired = []
+        for limit in self._limits(key):
+            if not limit.acquire():
+                for l in acquired:
+                    l.release()
+                return limit
+            acquired.append(limit)
+
+        self._held[key] = acquired
+        return None
+
+    def _release(self, key):
+        """Release any concurrency limits held by a subtask."""
+        for limit in self._held.pop(key, []):
+            limit.release()
+
+    def _unpark(self):
+        """
+        Mark as ready again the subtasks blocked by any concurrency limit
+        that now has a free slot.
+        """
+        for limit in [l for l in self._parked if l.available()]:
+            for k in self._parked.pop(limit):
+                self._push_ready(k)
 
     def _ready(self):
         """
         Iterate over all subtasks that are ready to start - i.e. all their
         dependencies have been satisfied but they have not yet been started.
+
+        Subtasks that cannot acquire their concurrency limits are set aside
+        until the limit that blocked them has a free slot.
         """
-        for k, n in six.iteritems(self._graph):
-            if not n:
-                runner = self._runners[k]
-                if runner and not runner.started():
-                    yield k, runner
+        self._unpark()
+        while self._ready_keys:
+            k = self._pop_ready()
+            runner = self._runners[k]
+            if runner and not runner.started():
+                limit = self._acquire(k)
+                if limit is not None:
+                    self._parked.setdefault(limit, []).append(k)
+                    continue
+                self._pending.discard(k)
+                self._started[k] = runner
+                yield k, runner
 
     def _running(self):
         """
-        Iterate over all subtasks that are currently running - i.e. they have
-        been started but have not yet completed.
+        Return a list of all subtasks that are currently running - i.e. they
+        have been started but have not yet completed.
         """
-        running = lambda (k, r): k in self._graph and r.started()
-        return itertools.ifilter(running, six.iteritems(self._runners))
+        return [(k, r) for k, r in six.iteritems(self._started)
+                if k in self._unsatisfied]
 
 
 class PollingTaskGroup(object):
@@ -518,8 +834,9 @@ class PollingTaskGroup(object):
                 r.start()
 
             while runners:
-                yield
-                runners = list(itertools.dropwhile(lambda r: r.step(),
+                yield runners[0].wakeup_hint()
+                runners = list(itertools.dropwhile(lambda r: (r.due() and
+                                                              r.step()),
                                                    runners))
         except:  # noqa
             with excutils.save_and_reraise_exception():
@@ -12,7 +12,9 @@
 #    under the License.
 
 import collections
+import contextlib
 import functools
+import hashlib
 import json
 import os
 
@@ -27,6 +29,7 @@ import six
 import warnings
 import webob
 
+from heat.common import cache
 from heat.common import context
 from heat.common import exception
 from heat.common.i18n import _
@@ -40,7 +43,6 @@ from heat.engine import api
 from heat.engine import attributes
 from heat.engine import clients
 from heat.engine import environment
-from heat.engine import event as evt
 from heat.engine import parameter_groups
 from heat.engine import properties
 from heat.engine import resources
@@ -59,6 +61,7 @@ cfg.CONF.import_opt('max_resources_per_stack', 'heat.common.config')
 cfg.CONF.import_opt('max_stacks_per_tenant', 'heat.common.config')
 cfg.CONF.import_opt('enable_stack_abandon', 'heat.common.config')
 cfg.CONF.import_opt('enable_stack_adopt', 'heat.common.config')
+cfg.CONF.import_opt('max_cached_stacks', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
@@ -91,10 +94,10 @@ class ThreadGroupManager(object):
         This is a dummy task which gets queued on the service.Service
         threadgroup.  Without this service.Service sees nothing running
         i.e has nothing to wait() on, so the process exits..
-        This could also be used to trigger periodic non-stack-specific
-        housekeeping tasks
+        It is also used to trigger periodic non-stack-specific
+        housekeeping tasks, such as logging the cache statistics.
         """
-        pass
+        cache.log_stats()
 
     def _serialize_profile_info(self):
         prof = profiler.get()
@@ -267,7 +270,7 @@ class EngineService(service.Service):
     by the RPC caller.
     """
 
-    RPC_API_VERSION = '1.2'
+    RPC_API_VERSION = '1.4'
 
     def __init__(self, host, topic, manager=None):
         super(EngineService, self).__init__()
@@ -283,6 +286,15 @@ class EngineService(service.Service):
         self.thread_group_mgr = None
         self.target = None
 
+        # Parsed stacks, with the version they were loaded at, for reuse by
+        # requests that only read them
+        self._stack_cache = cache.LRUCache(lambda: cfg.CONF.max_cached_stacks,
+                                           name='stacks')
+        # Whether in-instance users may access resources, for the version of
+        # the stack at which this was decided
+        self._stack_user_access = cache.LRUCache(1000,
+                                                 name='stack_user_access')
+
         if cfg.CONF.instance_user:
             warnings.warn('The "instance_user" option in heat.conf is '
                           'deprecated and will be removed in the Juno '
@@ -395,6 +407,27 @@ class EngineService(service.Service):
 
         return s
 
+    @contextlib.contextmanager
+    def _reusable_stack(self, cnxt, db_stack):
+        """
+        Return a context manager for read-only use of a stack.
+
+        The Stack parsed by an earlier request is reused if the stack has not
+        changed since, and the Stack is kept for later requests if the
+        context manager exits normally. A cached Stack is only ever used by
+        one request at a time.
+        """
+        cached = self._stack_cache.pop(db_stack.id)
+        if cached is not None and cached[0] == db_stack.version:
+            stack = cached[1]
+            stack.prepare_reuse(cnxt)
+        else:
+            stack = parser.Stack.load(cnxt, stack=db_stack)
+
+        yield stack
+
+        self._stack_cache.set(db_stack.id, (db_stack.version, stack))
+
     @request_context
     def show_stack(self, cnxt, stack_identity):
         """
@@ -406,11 +439,11 @@ class EngineService(service.Service):
         """
         if stack_identity is not None:
             db_stack = self._get_stack(cnxt, stack_identity, show_deleted=True)
-            stacks = [parser.Stack.load(cnxt, stack=db_stack)]
-        else:
-            stacks = parser.Stack.load_all(cnxt)
+            with self._reusable_stack(cnxt, db_stack) as stack:
+                return [api.format_stack(stack)]
 
-        return [api.format_stack(stack) for stack in stacks]
+        stacks = parser.Stack.load_all(cnxt)
+        return [api.format_stack(st) for st in stacks]
 
     def get_revision(self, cnxt):
         return cfg.CONF.revision['heat_revision']
@@ -418,7 +451,7 @@ class EngineService(service.Service):
     @request_context
     def list_stacks(self, cnxt, limit=None, marker=None, sort_keys=None,
                     sort_dir=None, filters=None, tenant_safe=True,
-                    show_deleted=False, show_nested=False):
+                    show_deleted=False, show_nested=False, summary=False):
         """
         The list_stacks method returns attributes of all stacks.  It supports
         pagination (``limit`` and ``marker``), sorting (``sort_keys`` and
@@ -433,8 +466,17 @@ class EngineService(service.Service):
         :param tenant_safe: if true, scope the request by the current tenant
         :param show_deleted: if true, show soft-deleted stacks
         :param show_nested: if true, show nested stacks
+        :param summary: if true, omit the parameters and outputs so that the
+            stacks can be listed without loading them
         :returns: a list of formatted stacks
         """
+        if summary:
+            db_stacks = db_api.stack_get_all(cnxt, limit, sort_keys, marker,
+                                             sort_dir, filters, tenant_safe,
+                                             show_deleted, show_nested,
+                                             eager_load=True) or []
+            return [api.format_stack_summary(s) for s in db_stacks]
+
         stacks = parser.Stack.load_all(cnxt, limit, marker, sort_keys,
                                        sort_dir, filters, tenant_safe,
                                        show_deleted, resolve_data=False,
@@ -959,6 +1001,7 @@ class EngineService(service.Service):
         :param sort_dir: the direction of the sort ('asc' or 'desc').
         """
 
+        st = None
         if stack_identity is not None:
             st = self._get_stack(cnxt, stack_identity, show_deleted=True)
 
@@ -974,17 +1017,20 @@ class EngineService(service.Service):
                                                     sort_dir=sort_dir,
                                                     filters=filters)
 
-        stacks = {}
+        stack_ids = set(e.stack_id for e in events)
+        if not stack_ids:
+            return []
 
-        def get_stack(stack_id):
-            if stack_id not in stacks:
-                stacks[stack_id] = parser.Stack.load(cnxt, stack_id)
-            return stacks[stack_id]
+        if st is not None:
+            stacks = [st]
+        else:
+            stacks = db_api.stack_get_identities(cnxt, stack_ids)
+        stack_identities = dict(
+            (s.id, identifier.HeatIdentifier(s.tenant, s.name, s.id))
+            for s in stacks)
 
-        return [api.format_event(evt.Event.load(cnxt,
-                                                e.id, e,
-                                                get_stack(e.stack_id)))
-                for e in events]
+        return [api.format_db_event(e, stack_identities[e.stack_id])
+                for e in events if e.stack_id in stack_identities]
 
     def _authorize_stack_user(self, cnxt, stack, resource_name):
         '''
@@ -997,16 +1043,39 @@ class EngineService(service.Service):
             return True
 
         # fall back to looking for EC2 credentials in the context
+        access_key = self._ec2_access_key(cnxt)
+        if not access_key:
+            return False
+
+        return stack.access_allowed(access_key, resource_name)
+
+    @staticmethod
+    def _ec2_access_key(cnxt):
         try:
             ec2_creds = json.loads(cnxt.aws_creds).get('ec2Credentials')
         except (TypeError, AttributeError):
             ec2_creds = None
 
-        if not ec2_creds:
-            return False
+        return ec2_creds and ec2_creds.get('access')
 
-        access_key = ec2_creds.get('access')
-        return stack.access_allowed(access_key, resource_name)
+    def _authorize_stack_user_cached(self, cnxt, db_stack, resource_name):
+        '''
+        Filter access for stack in-instance users, as _authorize_stack_user()
+        does, without loading the stack when possible.
+
+        The decision is remembered for the version of the stack row, so
+        that repeated polls by the same credentials while the stack is
+        unchanged need only the stack row to be authorized.
+        '''
+        key = (db_stack.id, db_stack.version, cnxt.user_id,
+               self._ec2_access_key(cnxt), resource_name)
+        allowed = self._stack_user_access.get(key)
+        if allowed is None:
+            with self._reusable_stack(cnxt, db_stack) as stack:
+                allowed = bool(self._authorize_stack_user(cnxt, stack,
+                                                          resource_name))
+            self._stack_user_access.set(key, allowed)
+        return allowed
 
     def _verify_stack_resource(self, stack, resource_name):
         if resource_name not in stack:
@@ -1021,17 +1090,54 @@ class EngineService(service.Service):
     def describe_stack_resource(self, cnxt, stack_identity, resource_name,
                                 with_attr=None):
         s = self._get_stack(cnxt, stack_identity)
-        stack = parser.Stack.load(cnxt, stack=s)
+        with self._reusable_stack(cnxt, s) as stack:
+            if cfg.CONF.heat_stack_user_role in cnxt.roles:
+                if not self._authorize_stack_user(cnxt, stack,
+                                                  resource_name):
+                    LOG.warn(_LW("Access denied to resource %s"),
+                             resource_name)
+                    raise exception.Forbidden()
+
+            self._verify_stack_resource(stack, resource_name)
+
+            return api.format_stack_resource(stack[resource_name],
+                                             with_attr=with_attr)
+
+    @request_context
+    def describe_stack_resource_metadata(self, cnxt, stack_identity,
+                                         resource_name, etag=None):
+        """
+        Return the metadata of a resource, along with an ETag for it.
+
+        The metadata is read directly from the database, without resolving
+        the resource's attributes. If the given ETag matches, the metadata
+        is unchanged and so is omitted from the result.
+
+        :param cnxt: RPC context.
+        :param stack_identity: Name of the stack.
+        :param resource_name: the Resource.
+        :param etag: the ETag of the metadata the caller already has.
+        """
+        s = self._get_stack(cnxt, stack_identity)
 
         if cfg.CONF.heat_stack_user_role in cnxt.roles:
-            if not self._authorize_stack_user(cnxt, stack, resource_name):
+            if not self._authorize_stack_user_cached(cnxt, s, resource_name):
                 LOG.warn(_LW("Access denied to resource %s"), resource_name)
                 raise exception.Forbidden()
 
-        self._verify_stack_resource(stack, resource_name)
+        rs = db_api.resource_get_by_name_and_stack(cnxt, resource_name, s.id)
+        if rs is None:
+            raise exception.ResourceNotFound(resource_name=resource_name,
+                                             stack_name=s.name)
 
-        return api.format_stack_resource(stack[resource_name],
-                                         with_attr=with_attr)
+        metadata = rs.rsrc_metadata
+        current_etag = hashlib.sha1(json.dumps(metadata,
+                                               sort_keys=True)).hexdigest()
+        if etag == current_etag:
+            return {rpc_api.RES_METADATA_ETAG: current_etag}
+
+        return {rpc_api.RES_METADATA: metadata,
+                rpc_api.RES_METADATA_ETAG: current_etag}
 
     @request_context
     def resource_signal(self, cnxt, stack_identity, resource_name, details):
@@ -1047,11 +1153,12 @@ class EngineService(service.Service):
         if callable(stack[resource_name].signal):
             stack[resource_name].signal(details)
 
-        # Refresh the metadata for all other resources, since signals can
-        # update metadata which is used by other resources, e.g
-        # when signalling a WaitConditionHandle resource, and other
-        # resources may refer to WaitCondition Fn::GetAtt Data
-        for res in stack.dependencies:
+        # Refresh the metadata of other resources which refer to the
+        # signalled resource, since signals can update metadata which is
+        # used by other resources, e.g when signalling a WaitConditionHandle
+        # resource, and other resources may refer to WaitCondition
+        # Fn::GetAtt Data
+        for res in stack.metadata_dependents(resource_name):
             if res.name != resource_name and res.id is not None:
                 res.metadata_update()
 
@@ -1081,20 +1188,19 @@ class EngineService(service.Service):
     def describe_stack_resources(self, cnxt, stack_identity, resource_name):
         s = self._get_stack(cnxt, stack_identity)
 
-        stack = parser.Stack.load(cnxt, stack=s)
-
-        return [api.format_stack_resource(resource)
-                for name, resource in six.iteritems(stack)
-                if resource_name is None or name == resource_name]
+        with self._reusable_stack(cnxt, s) as stack:
+            return [api.format_stack_resource(resource)
+                    for name, resource in six.iteritems(stack)
+                    if resource_name is None or name == resource_name]
 
     @request_context
     def list_stack_resources(self, cnxt, stack_identity, nested_depth=0):
         s = self._get_stack(cnxt, stack_identity, show_deleted=True)
-        stack = parser.Stack.load(cnxt, stack=s)
         depth = min(nested_depth, cfg.CONF.max_nested_stack_depth)
 
-        return [api.format_stack_resource(resource, detail=False)
-                for resource in stack.iter_resources(depth)]
+        with self._reusable_stack(cnxt, s) as stack:
+            return [api.format_stack_resource(resource, detail=False)
+                    for resource in stack.iter_resources(depth)]
 
     @request_context
     def stack_suspend(self, cnxt, stack_identity):
@@ -1231,11 +1337,11 @@ class EngineService(service.Service):
         refresh_stack = parser.Stack.load(cnxt, stack=s,
                                           use_stored_context=True)
 
-        # Refresh the metadata for all other resources, since we expect
-        # resource_name to be a WaitCondition resource, and other
+        # Refresh the metadata of other resources which refer to it, since
+        # we expect resource_name to be a WaitCondition resource, and other
         # resources may refer to WaitCondition Fn::GetAtt Data, which
         # is updated here.
-        for res in refresh_stack.dependencies:
+        for res in refresh_stack.metadata_dependents(resource_name):
             if res.name != resource_name and res.id is not None:
                 res.metadata_update()
 
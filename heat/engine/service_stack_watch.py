@@ -11,23 +11,26 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo.config import cfg
 from oslo.utils import timeutils
 
 from heat.common import context
 from heat.common.i18n import _LE
 from heat.common.i18n import _LW
 from heat.db import api as db_api
-from heat.engine import stack
 from heat.engine import watchrule
 from heat.openstack.common import log as logging
 from heat.rpc import api as rpc_api
 
 LOG = logging.getLogger(__name__)
 
+cfg.CONF.import_opt('periodic_interval', 'heat.common.config')
+
 
 class StackWatch(object):
     def __init__(self, thread_group_mgr):
         self.thread_group_mgr = thread_group_mgr
+        self.watcher_started = False
 
     def start_watch_task(self, stack_id, cnxt):
 
@@ -51,38 +54,26 @@ class StackWatch(object):
 
             return start_watch_thread
 
-        if stack_has_a_watchrule(stack_id):
-            self.thread_group_mgr.add_timer(
-                stack_id,
-                self.periodic_watcher_task,
-                sid=stack_id)
-
-    def check_stack_watches(self, sid):
-        # Retrieve the stored credentials & create context
-        # Require tenant_safe=False to the stack_get to defeat tenant
-        # scoping otherwise we fail to retrieve the stack
-        LOG.debug("Periodic watcher task for stack %s" % sid)
-        admin_context = context.get_admin_context()
-        db_stack = db_api.stack_get(admin_context, sid, tenant_safe=False,
-                                    eager_load=True)
-        if not db_stack:
-            LOG.error(_LE("Unable to retrieve stack %s for periodic task"),
-                      sid)
-            return
-        stk = stack.Stack.load(admin_context, stack=db_stack,
-                               use_stored_context=True)
+        if stack_has_a_watchrule(stack_id) and not self.watcher_started:
+            # A single periodic task evaluates the watch rules of all
+            # stacks, so it is queued with the (non-stack) service task.
+            self.thread_group_mgr.add_timer(cfg.CONF.periodic_interval,
+                                            self.periodic_watcher_task)
+            self.watcher_started = True
 
-        # recurse into any nested stacks.
-        children = db_api.stack_get_all_by_owner_id(admin_context, sid)
-        for child in children:
-            self.check_stack_watches(child.id)
+    def check_watches(self):
+        LOG.debug("Periodic watcher task")
+        admin_context = context.get_admin_context()
 
-        # Get all watchrules for this stack and evaluate them
+        # Get all watchrules that could be due and evaluate them, the
+        # stack is only loaded when an alarm action is to be run
         try:
-            wrs = db_api.watch_rule_get_all_by_stack(admin_context, sid)
+            wrs = db_api.watch_rule_get_all(
+                admin_context,
+                exclude_states=(rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED,
+                                rpc_api.WATCH_STATE_SUSPENDED))
         except Exception as ex:
-            LOG.warn(_LW('periodic_task db error watch rule removed? %(ex)s'),
-                     ex)
+            LOG.warn(_LW('periodic_task db error watch rules: %(ex)s'), ex)
             return
 
         def run_alarm_action(stk, actions, details):
@@ -92,16 +83,22 @@ class StackWatch(object):
                 res.metadata_update()
 
         for wr in wrs:
-            rule = watchrule.WatchRule.load(stk.context, watch=wr)
-            actions = rule.evaluate()
+            try:
+                rule = watchrule.WatchRule.load(admin_context, watch=wr,
+                                                use_stored_context=True)
+                actions = rule.evaluate()
+            except Exception:
+                LOG.exception(_LE('Failed to evaluate watch rule %s'),
+                              wr.name)
+                continue
             if actions:
-                self.thread_group_mgr.start(sid, run_alarm_action, stk,
-                                            actions, rule.get_details())
+                self.thread_group_mgr.start(rule.stack_id, run_alarm_action,
+                                            rule.stack, actions,
+                                            rule.get_details())
 
-    def periodic_watcher_task(self, sid):
+    def periodic_watcher_task(self):
         """
-        Periodic task, created for each stack, triggers watch-rule
-        evaluation for all rules defined for the stack
-        sid = stack ID
+        Periodic task, created once per engine, triggers watch-rule
+        evaluation for all rules that are due to be evaluated
         """
-        self.check_stack_watches(sid)
+        self.check_watches()
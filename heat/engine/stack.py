@@ -14,6 +14,7 @@
 import collections
 import copy
 import datetime
+import itertools
 import re
 import warnings
 
@@ -41,13 +42,44 @@ from heat.engine import resources
 from heat.engine import scheduler
 from heat.engine import template as tmpl
 from heat.engine import update
+from heat.engine import write_batch
 from heat.openstack.common import log as logging
 from heat.rpc import api as rpc_api
 
 cfg.CONF.import_opt('error_wait_time', 'heat.common.config')
+cfg.CONF.import_opt('max_resource_actions_per_stack', 'heat.common.config')
+cfg.CONF.import_opt('max_resource_actions_per_engine', 'heat.common.config')
+cfg.CONF.import_opt('max_resource_actions_per_type', 'heat.common.config')
+cfg.CONF.import_opt('max_batched_state_writes', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
+# Limits on concurrent resource actions, shared by all stacks in this engine
+_engine_action_limits = {}
+
+
+def _engine_action_limit(key, limit):
+    '''Return the engine-wide ConcurrencyLimit with the given key.'''
+    shared = _engine_action_limits.get(key)
+    if shared is None:
+        shared = scheduler.ConcurrencyLimit(limit)
+        _engine_action_limits[key] = shared
+    shared.limit = limit
+    return shared
+
+
+def _resource_type_action_limits():
+    '''Return a dict of the configured action limits by resource type.'''
+    limits = {}
+    for pair in cfg.CONF.max_resource_actions_per_type:
+        res_type, sep, limit = pair.rpartition('=')
+        if sep and limit.isdigit():
+            limits[res_type] = int(limit)
+        else:
+            LOG.warn(_LW('Ignoring invalid resource action limit "%s"'),
+                     pair)
+    return limits
+
 
 class ForcedCancel(BaseException):
     """Exception raised to cancel task execution."""
@@ -109,8 +141,11 @@ class Stack(collections.Mapping):
         self.parent_resource = parent_resource
         self._resources = None
         self._dependencies = None
+        self._metadata_refs = None
+        self._resource_indexes = None
         self._access_allowed_handlers = {}
         self._db_resources = None
+        self.write_batch = None
         self.adopt_stack_data = adopt_stack_data
         self.stack_user_project_id = stack_user_project_id
         self.created_time = created_time
@@ -201,12 +236,82 @@ class Stack(collections.Mapping):
     @property
     def dependencies(self):
         if self._dependencies is None:
-            self._dependencies = self._get_dependencies(
-                self.resources.itervalues())
+            try:
+                self._dependencies = self._get_dependencies(
+                    self.resources.itervalues())
+            finally:
+                # Property values (e.g. references to other resources) may
+                # change once the resources are created, so the indexes are
+                # only valid while the dependencies are being calculated.
+                self._resource_indexes = None
         return self._dependencies
 
     def reset_dependencies(self):
         self._dependencies = None
+        self._metadata_refs = None
+        self._resource_indexes = None
+
+    def resources_with_interface(self, resource_type):
+        '''
+        Return the resources in the stack that implement a resource type.
+
+        This is found once for each type while the dependencies of the stack
+        are calculated, so that add_dependencies() can find related
+        resources without scanning the whole stack.
+        '''
+        return self.resource_index(resource_type)[None]
+
+    def resource_index(self, resource_type, key=None):
+        '''
+        Return an index of the resources that implement a resource type.
+
+        The index maps the values returned by the key function (e.g. the
+        network of a subnet) to lists of the resources with those values.
+        Like resources_with_interface(), each index is built only once.
+        '''
+        if self._resource_indexes is None:
+            self._resource_indexes = {}
+
+        index_key = (resource_type, key)
+        if index_key not in self._resource_indexes:
+            if key is None:
+                index = {None: [res for res in self.itervalues()
+                                if res.has_interface(resource_type)]}
+            else:
+                index = {}
+                for res in self.resources_with_interface(resource_type):
+                    index.setdefault(key(res), []).append(res)
+            self._resource_indexes[index_key] = index
+
+        return self._resource_indexes[index_key]
+
+    def _metadata_references(self):
+        '''
+        Return a map from resource names to the names of the resources whose
+        template metadata refers to them.
+        '''
+        if self._metadata_refs is None:
+            refs = collections.defaultdict(set)
+            for res in self.itervalues():
+                for dep in res.t.metadata_dependencies():
+                    refs[dep.name].add(res.name)
+            self._metadata_refs = refs
+        return self._metadata_refs
+
+    def metadata_dependents(self, resource_name):
+        '''
+        Return the resources whose template metadata may change when the
+        named resource changes, in dependency order.
+
+        This includes resources whose metadata refers to the named resource
+        or to any resource that depends on it, since e.g. the Data attribute
+        of a WaitCondition changes when its handle is signalled.
+        '''
+        refs = self._metadata_references()
+        changed = self.dependencies[self[resource_name]]
+        dependents = set(itertools.chain.from_iterable(refs.get(r.name, ())
+                                                       for r in changed))
+        return [r for r in self.dependencies if r.name in dependents]
 
     @property
     def root_stack(self):
@@ -222,6 +327,12 @@ class Stack(collections.Mapping):
         Return the total number of resources in a stack, including nested
         stacks below.
         '''
+        if self.id is not None:
+            # use the resource counts stored with the nested stacks, rather
+            # than loading every nested stack in the tree
+            return len(self) + db_api.stack_count_nested_resources(
+                self.context, self.id)
+
         def total_nested(res):
             get_nested = getattr(res, 'nested', None)
             if callable(get_nested):
@@ -317,7 +428,8 @@ class Stack(collections.Mapping):
             'updated_at': self.updated_time,
             'user_creds_id': self.user_creds_id,
             'backup': backup,
-            'nested_depth': self.nested_depth
+            'nested_depth': self.nested_depth,
+            'num_resources': len(self.t[self.t.RESOURCES])
         }
         if self.id:
             db_api.stack_update(self.context, self.id, s)
@@ -526,6 +638,10 @@ class Stack(collections.Mapping):
         if self.id is None:
             return
 
+        # Resource states must reach the database before the stack's does
+        if self.write_batch is not None:
+            self.write_batch.flush()
+
         stack = db_api.stack_get(self.context, self.id)
         if stack is not None:
             stack.update_and_save({'action': action,
@@ -576,6 +692,40 @@ class Stack(collections.Mapping):
             error_wait_time=cfg.CONF.error_wait_time)
         creator(timeout=self.timeout_secs())
 
+    def resource_action_limits(self):
+        '''
+        Return a function that returns the list of ConcurrencyLimits which
+        apply to an action on a given resource in this stack, or None if no
+        limits are configured.
+        '''
+        per_stack = cfg.CONF.max_resource_actions_per_stack
+        per_engine = cfg.CONF.max_resource_actions_per_engine
+        per_type = _resource_type_action_limits()
+        if not (per_stack or per_engine or per_type):
+            return None
+
+        stack_limit = scheduler.ConcurrencyLimit(per_stack)
+        engine_limit = _engine_action_limit(None, per_engine)
+        type_limits = dict((t, _engine_action_limit(t, l))
+                           for t, l in six.iteritems(per_type))
+
+        def limits(res):
+            if res.waits_for_signal:
+                # The resources that will signal it need not depend on it,
+                # so they could be stuck waiting for the slots it holds.
+                return []
+            if hasattr(res, 'nested'):
+                # The resources in the nested stack are limited in their own
+                # right; holding engine-wide slots while waiting for them
+                # could deadlock.
+                return [stack_limit]
+            res_limits = [stack_limit, engine_limit]
+            if res.type() in type_limits:
+                res_limits.append(type_limits[res.type()])
+            return res_limits
+
+        return limits
+
     def _adopt_kwargs(self, resource):
         data = self.adopt_stack_data
         if not data or not data.get('resources'):
@@ -622,16 +772,26 @@ class Stack(collections.Mapping):
             resource_action,
             reverse,
             error_wait_time=error_wait_time,
-            aggregate_exceptions=aggregate_exceptions)
+            aggregate_exceptions=aggregate_exceptions,
+            limits=self.resource_action_limits())
+
+        if cfg.CONF.max_batched_state_writes > 0 and self.id is not None:
+            self.write_batch = write_batch.WriteBatch(
+                self.context, cfg.CONF.max_batched_state_writes)
+            action_task = self.write_batch.flushing(action_task())
+        else:
+            action_task = action_task()
 
         try:
-            yield action_task()
+            yield action_task
         except (exception.ResourceFailure, scheduler.ExceptionGroup) as ex:
             stack_status = self.FAILED
             reason = 'Resource %s failed: %s' % (action, six.text_type(ex))
         except scheduler.Timeout:
             stack_status = self.FAILED
             reason = '%s timed out' % action.title()
+        finally:
+            self.write_batch = None
 
         self.state_set(action, stack_status, reason)
 
@@ -988,9 +1148,11 @@ class Stack(collections.Mapping):
                                e.args[0] if e.args else
                                'Failed stack pre-ops: %s' % six.text_type(e))
                 return
-        action_task = scheduler.DependencyTaskGroup(self.dependencies,
-                                                    resource.Resource.destroy,
-                                                    reverse=True)
+        action_task = scheduler.DependencyTaskGroup(
+            self.dependencies,
+            resource.Resource.destroy,
+            reverse=True,
+            limits=self.resource_action_limits())
         try:
             scheduler.TaskRunner(action_task)(timeout=self.timeout_secs())
         except exception.ResourceFailure as ex:
@@ -1200,11 +1362,50 @@ class Stack(collections.Mapping):
                       DeprecationWarning)
         return function.resolve(snippet)
 
-    def reset_resource_attributes(self):
+    def prepare_reuse(self, context):
+        '''
+        Prepare a stack loaded by an earlier request for reuse by another.
+
+        The stack and its resources, including their properties (which
+        validate constraints and look up resources with the context's
+        clients), are bound to the new request context. Any state that may
+        have changed without the stack changing in the database, i.e.
+        resource attribute values and loaded nested stacks, is discarded.
+        '''
+        self.context = context
+        self.clients = context.clients
+        if not self._resources:
+            return
+        for res in self._resources.itervalues():
+            res.context = context
+            res.reparse()
+            res.attributes.reset_resolved_values()
+            reset_nested = getattr(res, 'reset_nested', None)
+            if callable(reset_nested):
+                reset_nested()
+
+    def reset_resource_attributes(self, changed=None):
+        '''
+        Clear the cached attribute values of resources in the stack.
+
+        If the resource that changed is given, only the attributes of that
+        resource, of the resources it directly requires and of all the
+        resources that depend on any of those are cleared.
+        '''
         # nothing is cached if no resources exist
         if not self._resources:
             return
         # a change in some resource may have side-effects in the attributes
-        # of other resources, so ensure that attributes are re-calculated
-        for res in self.resources.itervalues():
+        # of other resources (e.g. associating a floating IP changes the
+        # addresses of a server), so ensure that attributes are re-calculated
+        resources = self.resources.itervalues()
+        if changed is not None and self._dependencies is not None:
+            try:
+                affected = [changed]
+                affected.extend(self._dependencies.requires(changed))
+                resources = set(itertools.chain.from_iterable(
+                    self._dependencies[res] for res in affected))
+            except KeyError:
+                pass
+        for res in resources:
             res.attributes.reset_resolved_values()
@@ -75,6 +75,10 @@ class StackResource(resource.Resource):
         # resources in it decide if they need updating.
         return True
 
+    def reset_nested(self):
+        '''Discard the locally cached nested Stack object, if any.'''
+        self._nested = None
+
     def nested(self, force_reload=False, show_deleted=False):
         '''Return a Stack object representing the nested (child) stack.
 
@@ -59,7 +59,8 @@ class StackUpdate(object):
         self.updater = scheduler.DependencyTaskGroup(
             self.dependencies(),
             self._resource_update,
-            error_wait_time=self.error_wait_time)
+            error_wait_time=self.error_wait_time,
+            limits=self.existing_stack.resource_action_limits())
 
         if not self.rollback:
             yield cleanup_prev()
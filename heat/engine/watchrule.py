@@ -52,7 +52,7 @@ class WatchRule(object):
 
     def __init__(self, context, watch_name, rule, stack_id=None,
                  state=NODATA, wid=None, watch_data=None,
-                 last_evaluated=timeutils.utcnow()):
+                 last_evaluated=timeutils.utcnow(), use_stored_context=False):
         self.context = context
         self.now = timeutils.utcnow()
         self.name = watch_name
@@ -66,11 +66,18 @@ class WatchRule(object):
             period = int(rule['period'])
         self.timeperiod = datetime.timedelta(seconds=period)
         self.id = wid
-        self.watch_data = watch_data or []
+        # If no data is supplied, the samples inside the evaluation period
+        # are fetched from the database when the rule is evaluated
+        self.watch_data = watch_data
         self.last_evaluated = last_evaluated
+        # Load the stack for alarm actions with its stored credentials
+        # rather than with the (e.g. admin) context of the rule
+        self.use_stored_context = use_stored_context
+        self.stack = None
 
     @classmethod
-    def load(cls, context, watch_name=None, watch=None):
+    def load(cls, context, watch_name=None, watch=None,
+             use_stored_context=False):
         '''
         Load the watchrule object, either by name or via an existing DB object
         '''
@@ -89,8 +96,8 @@ class WatchRule(object):
                        stack_id=watch.stack_id,
                        state=watch.state,
                        wid=watch.id,
-                       watch_data=watch.watch_data,
-                       last_evaluated=watch.last_evaluated)
+                       last_evaluated=watch.last_evaluated,
+                       use_stored_context=use_stored_context)
 
     def store(self):
         '''
@@ -109,6 +116,7 @@ class WatchRule(object):
             wr = db_api.watch_rule_create(self.context, wr_values)
             self.id = wr.id
         else:
+            wr_values['last_evaluated'] = self.last_evaluated
             db_api.watch_rule_update(self.context, self.id, wr_values)
 
     def destroy(self):
@@ -131,96 +139,53 @@ class WatchRule(object):
         else:
             return False
 
-    def do_Maximum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            if float(d.data[self.rule['MetricName']]['Value']) > data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
+    def _period_data(self):
+        '''Return the data samples inside the evaluation period.'''
+        since = self.now - self.timeperiod
+        if self.watch_data is not None:
+            return [d for d in self.watch_data if d.created_at >= since]
+        if self.id is None:
+            return []
+        return db_api.watch_data_get_all_by_watch_rule(self.context,
+                                                       self.id, since)
 
-        if not have_data:
-            return self.NODATA
+    def _period_values(self):
+        metric = self.rule['MetricName']
+        return [float(d.data[metric]['Value']) for d in self._period_data()]
 
+    def _compare(self, data):
         if self.do_data_cmp(data,
                             float(self.rule['Threshold'])):
             return self.ALARM
         else:
             return self.NORMAL
 
-    def do_Minimum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            elif float(d.data[self.rule['MetricName']]['Value']) < data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-
-        if not have_data:
+    def do_Maximum(self):
+        values = self._period_values()
+        if not values:
             return self.NODATA
+        return self._compare(max(values))
 
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+    def do_Minimum(self):
+        values = self._period_values()
+        if not values:
+            return self.NODATA
+        return self._compare(min(values))
 
     def do_SampleCount(self):
         '''
         count all samples within the specified period
         '''
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            data = data + 1
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(len(self._period_data()))
 
     def do_Average(self):
-        data = 0
-        samples = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            samples = samples + 1
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if samples == 0:
+        values = self._period_values()
+        if not values:
             return self.NODATA
-
-        data = data / samples
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(sum(values) / len(values))
 
     def do_Sum(self):
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                LOG.debug('ignoring %s' % str(d.data))
-                continue
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(sum(self._period_values()))
 
     def get_alarm_state(self):
         fn = getattr(self, 'do_%s' % self.rule['Statistic'])
@@ -246,8 +211,21 @@ class WatchRule(object):
 
         self.last_evaluated = self.now
         self.store()
+        self._age_out_data()
         return actions
 
+    def _age_out_data(self):
+        '''
+        Delete the stored samples that are too old to fall inside any future
+        evaluation period.
+        '''
+        if self.id is None or self.watch_data is not None:
+            return
+        if not self.timeperiod:
+            return
+        db_api.watch_data_delete_before(self.context, self.id,
+                                        self.now - self.timeperiod)
+
     def rule_actions(self, new_state):
         LOG.info(_LI('WATCH: stack:%(stack)s, watch_name:%(watch_name)s, '
                      'new_state:%(new_state)s'), {'stack': self.stack_id,
@@ -258,8 +236,11 @@ class WatchRule(object):
             LOG.info(_LI('no action for new state %s'), new_state)
         else:
             s = db_api.stack_get(self.context, self.stack_id,
+                                 tenant_safe=not self.use_stored_context,
                                  eager_load=True)
-            stk = stack.Stack.load(self.context, stack=s)
+            stk = stack.Stack.load(self.context, stack=s,
+                                   use_stored_context=self.use_stored_context)
+            self.stack = stk
             if (stk.action != stk.DELETE
                     and stk.status == stk.COMPLETE):
                 for refid in self.rule[self.ACTION_MAP[new_state]]:
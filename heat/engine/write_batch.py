@@ -0,0 +1,113 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import sys
+
+from oslo.utils import timeutils
+
+from heat.common.i18n import _LE
+from heat.db import api as db_api
+from heat.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class WriteBatch(object):
+    '''
+    A write-behind buffer for resource state changes and events.
+
+    Updates to the same resource are coalesced, so that only the latest
+    values are written, and everything buffered is written to the database
+    in bulk when the batch is flushed.
+    '''
+
+    def __init__(self, context, max_size):
+        '''
+        Initialise with a context and the number of buffered writes after
+        which the batch is flushed automatically.
+        '''
+        self.context = context
+        self.max_size = max_size
+        self._resources = collections.OrderedDict()
+        self._events = []
+
+    def __len__(self):
+        '''Return the number of writes currently buffered.'''
+        return len(self._resources) + len(self._events)
+
+    def resource_update(self, resource_id, values):
+        '''Buffer an update to the resource with the given database ID.'''
+        self._resources.setdefault(resource_id, {}).update(values)
+        self._flush_if_full()
+
+    def event_add(self, values):
+        '''Buffer the creation of an event.'''
+        values = dict(values)
+        values.setdefault('created_at', timeutils.utcnow())
+        self._events.append(values)
+        self._flush_if_full()
+
+    def _flush_if_full(self):
+        if len(self) >= self.max_size:
+            self.flush()
+
+    def flush(self):
+        '''Write all buffered updates and events to the database.'''
+        resources, self._resources = (self._resources,
+                                      collections.OrderedDict())
+        events, self._events = self._events, []
+
+        if resources:
+            try:
+                db_api.resource_update_batch(self.context, resources)
+            except Exception as ex:
+                LOG.error(_LE('DB error %s'), ex)
+        if events:
+            try:
+                db_api.event_create_batch(self.context, events)
+            except Exception as ex:
+                LOG.error(_LE('DB error %s'), ex)
+
+    def flushing(self, subtask):
+        '''
+        Drive a subtask, flushing the batch after each step and when the
+        subtask completes, fails or is cancelled.
+
+        This is intended to be yielded from a wrappertask.
+        '''
+        try:
+            try:
+                step = next(subtask)
+            except StopIteration:
+                return
+
+            while True:
+                self.flush()
+                try:
+                    yield step
+                except GeneratorExit:
+                    subtask.close()
+                    raise
+                except:  # noqa
+                    try:
+                        step = subtask.throw(*sys.exc_info())
+                    except StopIteration:
+                        return
+                else:
+                    try:
+                        step = next(subtask)
+                    except StopIteration:
+                        return
+        finally:
+            self.flush()
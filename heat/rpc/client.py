@@ -28,6 +28,10 @@ class EngineClient(object):
 
         1.0 - Initial version.
         1.1 - Add support_status argument to list_resource_types()
+        1.2 - Add nested stack arguments to create_stack() and with_attr
+              argument to describe_stack_resource()
+        1.3 - Add summary argument to list_stacks()
+        1.4 - Add describe_stack_resource_metadata()
     '''
 
     BASE_RPC_API_VERSION = '1.0'
@@ -90,7 +94,7 @@ class EngineClient(object):
 
     def list_stacks(self, ctxt, limit=None, marker=None, sort_keys=None,
                     sort_dir=None, filters=None, tenant_safe=True,
-                    show_deleted=False, show_nested=False):
+                    show_deleted=False, show_nested=False, summary=False):
         """
         The list_stacks method returns attributes of all stacks.  It supports
         pagination (``limit`` and ``marker``), sorting (``sort_keys`` and
@@ -105,6 +109,7 @@ class EngineClient(object):
         :param tenant_safe: if true, scope the request by the current tenant
         :param show_deleted: if true, show soft-deleted stacks
         :param show_nested: if true, show nested stacks
+        :param summary: if true, omit the stack parameters and outputs
         :returns: a list of stacks
         """
         return self.call(ctxt,
@@ -113,7 +118,9 @@ class EngineClient(object):
                                        sort_dir=sort_dir, filters=filters,
                                        tenant_safe=tenant_safe,
                                        show_deleted=show_deleted,
-                                       show_nested=show_nested))
+                                       show_nested=show_nested,
+                                       summary=summary),
+                         version='1.3')
 
     def count_stacks(self, ctxt, filters=None, tenant_safe=True,
                      show_deleted=False, show_nested=False):
@@ -347,6 +354,22 @@ class EngineClient(object):
                                        with_attr=with_attr),
                          version='1.2')
 
+    def describe_stack_resource_metadata(self, ctxt, stack_identity,
+                                         resource_name, etag=None):
+        """
+        Get the metadata of a particular resource, unless it is unchanged.
+        :param ctxt: RPC context.
+        :param stack_identity: Name of the stack.
+        :param resource_name: the Resource.
+        :param etag: the ETag of the metadata the caller already has.
+        """
+        return self.call(ctxt,
+                         self.make_msg('describe_stack_resource_metadata',
+                                       stack_identity=stack_identity,
+                                       resource_name=resource_name,
+                                       etag=etag),
+                         version='1.4')
+
     def find_physical_resource(self, ctxt, physical_resource_id):
         """
         Return an identifier for the resource with the specified physical
@@ -25,6 +25,7 @@ import testscenarios
 import testtools
 
 from heat.common import messaging
+from heat.engine.clients import client_plugin
 from heat.engine.clients.os import cinder
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import keystone
@@ -92,6 +93,7 @@ class HeatTestCase(testscenarios.WithScenarios,
         cfg.CONF.set_default('environment_dir', env_dir)
         cfg.CONF.set_override('error_wait_time', None)
         self.addCleanup(cfg.CONF.reset)
+        self.addCleanup(client_plugin.ClientPlugin._indexes.clear)
 
         messaging.setup("fake://", optional=True)
         self.addCleanup(messaging.cleanup)
@@ -309,6 +309,46 @@ class HeatMigrationsCheckers(test_migrations.WalkVersionsMixin,
     def _check_049(self, engine, data):
         self.assertColumnExists(engine, 'user_creds', 'region_name')
 
+    def _check_050(self, engine, data):
+        self.assertIndexMembers(engine, 'watch_data',
+                                'ix_watch_data_watch_rule_id_created_at',
+                                ['watch_rule_id', 'created_at'])
+
+    def _check_051(self, engine, data):
+        self.assertIndexMembers(engine, 'stack', 'ix_stack_owner_id',
+                                ['owner_id'])
+
+    def _check_052(self, engine, data):
+        self.assertColumnExists(engine, 'template_blob', 'content')
+        self.assertColumnExists(engine, 'raw_template', 'template_blob_id')
+        self.assertColumnExists(engine, 'raw_template', 'files_blob_id')
+
+    def _check_053(self, engine, data):
+        self.assertColumnExists(engine, 'stack', 'version')
+
+    def _pre_upgrade_054(self, engine):
+        raw_template = utils.get_table(engine, 'raw_template')
+        templ = [dict(id=8, files='{}',
+                      template='{"Resources": {"A": {}, "B": {}}}')]
+        engine.execute(raw_template.insert(), templ)
+
+        stack = utils.get_table(engine, 'stack')
+        data = [dict(id='3a4bd1ec-8b21-56cd-964a-f66cb1cfa2f9', name='s54',
+                     raw_template_id=templ[0]['id'], user_creds_id=7,
+                     owner_id=None, backup=False, username='steve',
+                     disable_rollback=True)]
+        engine.execute(stack.insert(), data)
+        return data
+
+    def _check_054(self, engine, data):
+        self.assertColumnExists(engine, 'stack', 'num_resources')
+        stack_table = utils.get_table(engine, 'stack')
+        num_resources = dict((s.id, s.num_resources)
+                             for s in stack_table.select().execute())
+        self.assertEqual(2, num_resources[data[0]['id']])
+        self.assertEqual(0, num_resources[
+            '167aaefb-152e-505d-b13a-35d4c816390c'])
+
 
 class TestHeatMigrationsMySQL(HeatMigrationsCheckers,
                               test_base.MySQLOpportunisticTestCase):
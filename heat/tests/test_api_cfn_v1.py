@@ -17,6 +17,7 @@ import six
 
 import mock
 from oslo.config import cfg
+import webob.exc
 
 from heat.api.aws import exception
 import heat.api.cfn.v1.stacks as stacks
@@ -161,9 +162,10 @@ class CfnStackControllerTest(common.HeatTestCase):
         self.assertEqual(expected, result)
         default_args = {'limit': None, 'sort_keys': None, 'marker': None,
                         'sort_dir': None, 'filters': None, 'tenant_safe': True,
-                        'show_deleted': False, 'show_nested': False}
+                        'show_deleted': False, 'show_nested': False,
+                        'summary': True}
         mock_call.assert_called_once_with(
-            dummy_req.context, ('list_stacks', default_args))
+            dummy_req.context, ('list_stacks', default_args), version='1.3')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_list_rmt_aterr(self, mock_call):
@@ -179,7 +181,7 @@ class CfnStackControllerTest(common.HeatTestCase):
         result = self.controller.list(dummy_req)
         self.assertIsInstance(result, exception.HeatInvalidParameterValueError)
         mock_call.assert_called_once_with(
-            dummy_req.context, ('list_stacks', mock.ANY))
+            dummy_req.context, ('list_stacks', mock.ANY), version='1.3')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_list_rmt_interr(self, mock_call):
@@ -195,7 +197,7 @@ class CfnStackControllerTest(common.HeatTestCase):
         result = self.controller.list(dummy_req)
         self.assertIsInstance(result, exception.HeatInternalFailureError)
         mock_call.assert_called_once_with(
-            dummy_req.context, ('list_stacks', mock.ANY))
+            dummy_req.context, ('list_stacks', mock.ANY), version='1.3')
 
     def test_describe_last_updated_time(self):
         params = {'Action': 'DescribeStacks'}
@@ -1283,6 +1285,17 @@ class CfnStackControllerTest(common.HeatTestCase):
         rpc_client.EngineClient.call(
             dummy_req.context, ('identify_stack', {'stack_name': stack_name})
         ).AndReturn(identity)
+        metadata_args = {
+            'stack_identity': identity,
+            'resource_name': dummy_req.params.get('LogicalResourceId'),
+            'etag': None,
+        }
+        rpc_client.EngineClient.call(
+            dummy_req.context,
+            ('describe_stack_resource_metadata', metadata_args),
+            version='1.4'
+        ).AndReturn({u'metadata': {u'wordpress': []},
+                     u'metadata_etag': u'abc123'})
         args = {
             'stack_identity': identity,
             'resource_name': dummy_req.params.get('LogicalResourceId'),
@@ -1312,6 +1325,41 @@ class CfnStackControllerTest(common.HeatTestCase):
                        'LogicalResourceId': u'WikiDatabase'}}}}
 
         self.assertEqual(expected, response)
+        self.assertEqual('abc123', dummy_req.environ['heat.response_etag'])
+
+    def test_describe_stack_resource_not_modified(self):
+        # Format a dummy request
+        stack_name = "wordpress"
+        identity = dict(identifier.HeatIdentifier('t', stack_name, '6'))
+        params = {'Action': 'DescribeStackResource',
+                  'StackName': stack_name,
+                  'LogicalResourceId': "WikiDatabase"}
+        dummy_req = self._dummy_GET_request(params)
+        dummy_req.headers['If-None-Match'] = '"abc123"'
+        self._stub_enforce(dummy_req, 'DescribeStackResource')
+
+        # Stub out the RPC call to the engine with a pre-canned response
+        self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
+        rpc_client.EngineClient.call(
+            dummy_req.context, ('identify_stack', {'stack_name': stack_name})
+        ).AndReturn(identity)
+        metadata_args = {
+            'stack_identity': identity,
+            'resource_name': dummy_req.params.get('LogicalResourceId'),
+            'etag': 'abc123',
+        }
+        rpc_client.EngineClient.call(
+            dummy_req.context,
+            ('describe_stack_resource_metadata', metadata_args),
+            version='1.4'
+        ).AndReturn({u'metadata_etag': u'abc123'})
+
+        self.m.ReplayAll()
+
+        ex = self.assertRaises(webob.exc.HTTPNotModified,
+                               self.controller.describe_stack_resource,
+                               dummy_req)
+        self.assertEqual('"abc123"', ex.headers['ETag'])
 
     def test_describe_stack_resource_nonexistent_stack(self):
         # Format a dummy request
@@ -1351,10 +1399,11 @@ class CfnStackControllerTest(common.HeatTestCase):
         args = {
             'stack_identity': identity,
             'resource_name': dummy_req.params.get('LogicalResourceId'),
-            'with_attr': None,
+            'etag': None,
         }
         rpc_client.EngineClient.call(
-            dummy_req.context, ('describe_stack_resource', args), version='1.2'
+            dummy_req.context, ('describe_stack_resource_metadata', args),
+            version='1.4'
         ).AndRaise(heat_exception.ResourceNotFound(
             resource_name='test', stack_name='test'))
 
@@ -12,12 +12,13 @@
 #    under the License.
 
 
+import datetime
 import json
 import six
 
 from oslo.config import cfg
 from oslo.utils import importutils
-import requests
+from oslo.utils import timeutils
 
 from heat.api.aws import ec2token
 from heat.api.aws import exception
@@ -32,7 +33,7 @@ class Ec2TokenTest(common.HeatTestCase):
 
     def setUp(self):
         super(Ec2TokenTest, self).setUp()
-        self.m.StubOutWithMock(requests, 'post')
+        self.m.StubOutWithMock(ec2token._session, 'post')
 
     def _dummy_GET_request(self, params=None, environ=None):
         # Mangle the params dict into a query string
@@ -206,8 +207,9 @@ class Ec2TokenTest(common.HeatTestCase):
                                  "path": "/v1",
                                  "body_hash": body_hash}})
         req_headers = {'Content-Type': 'application/json'}
-        requests.post(req_url, data=req_creds,
-                      headers=req_headers).AndReturn(DummyHTTPResponse())
+        ec2token._session.post(
+            req_url, data=req_creds,
+            headers=req_headers).AndReturn(DummyHTTPResponse())
 
     def test_call_ok(self):
         dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
@@ -519,3 +521,120 @@ class Ec2TokenTest(common.HeatTestCase):
         self.assertEqual('woot', ec2.__call__(dummy_req))
 
         self.m.VerifyAll()
+
+    def _signed_request(self, signature='xyz'):
+        params = {'AWSAccessKeyId': 'foo', 'Signature': signature}
+        req_env = {'SERVER_NAME': 'heat',
+                   'SERVER_PORT': '8000',
+                   'PATH_INFO': '/v1'}
+        return self._dummy_GET_request(params, req_env)
+
+    def test_call_ok_cached(self):
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        ec2 = ec2token.EC2Token(app='woot',
+                                conf={'auth_uri': 'http://123:5000/v2.0'})
+
+        ok_resp = json.dumps({'access': {'metadata': {'roles': ['a']},
+                                         'token': {
+                                             'id': '123',
+                                             'tenant': {'name': 'tenant',
+                                                        'id': 'abcd1234'}}}})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+
+        self.assertEqual('woot', ec2.__call__(self._signed_request()))
+
+        # an identical request is authenticated without keystone
+        dummy_req = self._signed_request()
+        self.assertEqual('woot', ec2.__call__(dummy_req))
+        self.assertEqual('123', dummy_req.headers['X-Auth-Token'])
+        self.assertEqual('abcd1234', dummy_req.headers['X-Tenant-Id'])
+        self.assertEqual('a', dummy_req.headers['X-Roles'])
+
+        timeutils.advance_time_seconds(60)
+        self.assertEqual('woot', ec2.__call__(self._signed_request()))
+
+        self.m.VerifyAll()
+
+    def test_call_cache_token_expiry(self):
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        ec2 = ec2token.EC2Token(app='woot',
+                                conf={'auth_uri': 'http://123:5000/v2.0'})
+
+        expires = timeutils.isotime(timeutils.utcnow() +
+                                    datetime.timedelta(seconds=10))
+        ok_resp = json.dumps({'access': {'token': {
+            'id': 123, 'expires': expires,
+            'tenant': {'name': 'tenant', 'id': 'abcd1234'}}}})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+
+        self.assertEqual('woot', ec2.__call__(self._signed_request()))
+        timeutils.advance_time_seconds(9)
+        self.assertEqual('woot', ec2.__call__(self._signed_request()))
+        timeutils.advance_time_seconds(1)
+        self.assertEqual('woot', ec2.__call__(self._signed_request()))
+
+        self.m.VerifyAll()
+
+    def test_call_cache_size_paste_config(self):
+        cfg.CONF.set_override('signature_cache_size', 10,
+                              group='ec2authtoken')
+        ec2 = ec2token.EC2Token(app='woot',
+                                conf={'auth_uri': 'http://123:5000/v2.0',
+                                      'signature_cache_size': '1'})
+
+        ok_resp = json.dumps({'access': {'token': {
+            'id': '123',
+            'tenant': {'name': 'tenant', 'id': 'abcd1234'}}}})
+        for nonce in ('1', '2', '1'):
+            self._stub_http_connection(response=ok_resp,
+                                       params={'AWSAccessKeyId': 'foo',
+                                               'Nonce': nonce})
+        self.m.ReplayAll()
+
+        # the cache only holds one signature, so the first is evicted
+        req_env = {'SERVER_NAME': 'heat',
+                   'SERVER_PORT': '8000',
+                   'PATH_INFO': '/v1'}
+        for nonce in ('1', '2', '1'):
+            req = self._dummy_GET_request({'AWSAccessKeyId': 'foo',
+                                           'Signature': 'xyz',
+                                           'Nonce': nonce}, dict(req_env))
+            self.assertEqual('woot', ec2.__call__(req))
+        self.assertEqual(1, len(ec2._signature_cache))
+
+        self.m.VerifyAll()
+
+    def test_call_not_cached(self):
+        ec2 = ec2token.EC2Token(app='woot',
+                                conf={'auth_uri': 'http://123:5000/v2.0',
+                                      'signature_cache_ttl': '0'})
+
+        ok_resp = json.dumps({'access': {'token': {
+            'id': 123,
+            'tenant': {'name': 'tenant', 'id': 'abcd1234'}}}})
+        err_resp = json.dumps({})
+        self._stub_http_connection(response=err_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+
+        # failures are never cached
+        self.assertRaises(exception.HeatAccessDeniedError,
+                          ec2.__call__, self._signed_request())
+        self.assertEqual('woot', ec2.__call__(self._signed_request()))
+        self.assertEqual('woot', ec2.__call__(self._signed_request()))
+
+        self.m.VerifyAll()
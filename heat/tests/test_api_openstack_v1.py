@@ -381,9 +381,10 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(expected, result)
         default_args = {'limit': None, 'sort_keys': None, 'marker': None,
                         'sort_dir': None, 'filters': None, 'tenant_safe': True,
-                        'show_deleted': False, 'show_nested': False}
+                        'show_deleted': False, 'show_nested': False,
+                        'summary': True}
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', default_args))
+            req.context, ('list_stacks', default_args), version='1.3')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_index_whitelists_pagination_params(self, mock_call, mock_enforce):
@@ -402,7 +403,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
 
         rpc_call_args, _ = mock_call.call_args
         engine_args = rpc_call_args[1][1]
-        self.assertEqual(8, len(engine_args))
+        self.assertEqual(9, len(engine_args))
         self.assertIn('limit', engine_args)
         self.assertIn('sort_keys', engine_args)
         self.assertIn('marker', engine_args)
@@ -517,7 +518,8 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.controller.index(req, tenant_id=self.tenant)
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
-                                                       tenant_safe=False)
+                                                       tenant_safe=False,
+                                                       summary=True)
 
     def test_global_index_show_deleted_false(self, mock_enforce):
         rpc_client = self.controller.rpc_client
@@ -530,6 +532,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_deleted=False)
 
     def test_global_index_show_deleted_true(self, mock_enforce):
@@ -543,6 +546,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_deleted=True)
 
     def test_global_index_show_nested_false(self, mock_enforce):
@@ -556,6 +560,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_nested=False)
 
     def test_global_index_show_nested_true(self, mock_enforce):
@@ -569,6 +574,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_nested=True)
 
     def test_index_show_deleted_True_with_count_True(self, mock_enforce):
@@ -584,6 +590,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_deleted=True)
         rpc_client.count_stacks.assert_called_once_with(mock.ANY,
                                                         filters=mock.ANY,
@@ -647,9 +654,10 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(expected, result)
         default_args = {'limit': None, 'sort_keys': None, 'marker': None,
                         'sort_dir': None, 'filters': None, 'tenant_safe': True,
-                        'show_deleted': False, 'show_nested': False}
+                        'show_deleted': False, 'show_nested': False,
+                        'summary': False}
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', default_args))
+            req.context, ('list_stacks', default_args), version='1.3')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_index_rmt_aterr(self, mock_call, mock_enforce):
@@ -665,7 +673,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(400, resp.json['code'])
         self.assertEqual('AttributeError', resp.json['error']['type'])
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', mock.ANY))
+            req.context, ('list_stacks', mock.ANY), version='1.3')
 
     def test_index_err_denied_policy(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'index', False)
@@ -693,7 +701,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(500, resp.json['code'])
         self.assertEqual('Exception', resp.json['error']['type'])
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', mock.ANY))
+            req.context, ('list_stacks', mock.ANY), version='1.3')
 
     def test_create(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'create', True)
@@ -2410,33 +2418,20 @@ class ResourceControllerTest(ControllerTest, common.HeatTestCase):
         res_name = 'WikiDatabase'
         stack_identity = identifier.HeatIdentifier(self.tenant,
                                                    'wordpress', '6')
-        res_identity = identifier.ResourceIdentifier(resource_name=res_name,
-                                                     **stack_identity)
 
         req = self._get(stack_identity._tenant_path())
 
         engine_resp = {
-            u'description': u'',
-            u'resource_identity': dict(res_identity),
-            u'stack_name': stack_identity.stack_name,
-            u'resource_name': res_name,
-            u'resource_status_reason': None,
-            u'updated_time': u'2012-07-23T13:06:00Z',
-            u'stack_identity': dict(stack_identity),
-            u'resource_action': u'CREATE',
-            u'resource_status': u'COMPLETE',
-            u'physical_resource_id':
-            u'a3455d8c-9f88-404d-a85b-5315293e67de',
-            u'resource_type': u'AWS::EC2::Instance',
-            u'metadata': {u'ensureRunning': u'true'}
+            u'metadata': {u'ensureRunning': u'true'},
+            u'metadata_etag': u'abc123',
         }
         self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
         rpc_client.EngineClient.call(
             req.context,
-            ('describe_stack_resource',
+            ('describe_stack_resource_metadata',
              {'stack_identity': stack_identity, 'resource_name': res_name,
-              'with_attr': None}),
-            version='1.2'
+              'etag': None}),
+            version='1.4'
         ).AndReturn(engine_resp)
         self.m.ReplayAll()
 
@@ -2445,11 +2440,46 @@ class ResourceControllerTest(ControllerTest, common.HeatTestCase):
                                           stack_id=stack_identity.stack_id,
                                           resource_name=res_name)
 
-        expected = {'metadata': {u'ensureRunning': u'true'}}
+        expected = {'metadata': {u'ensureRunning': u'true'},
+                    'metadata_etag': u'abc123'}
 
         self.assertEqual(expected, result)
         self.m.VerifyAll()
 
+        response = webob.Response()
+        resources.ResourceSerializer().metadata(response, result)
+        self.assertEqual('abc123', response.etag)
+        self.assertEqual({'metadata': {u'ensureRunning': u'true'}},
+                         json.loads(response.body))
+
+    def test_metadata_show_not_modified(self, mock_enforce):
+        self._mock_enforce_setup(mock_enforce, 'metadata', True)
+        res_name = 'WikiDatabase'
+        stack_identity = identifier.HeatIdentifier(self.tenant,
+                                                   'wordpress', '6')
+
+        req = self._get(stack_identity._tenant_path())
+        req.headers['If-None-Match'] = '"abc123"'
+
+        self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
+        rpc_client.EngineClient.call(
+            req.context,
+            ('describe_stack_resource_metadata',
+             {'stack_identity': stack_identity, 'resource_name': res_name,
+              'etag': 'abc123'}),
+            version='1.4'
+        ).AndReturn({u'metadata_etag': u'abc123'})
+        self.m.ReplayAll()
+
+        ex = self.assertRaises(webob.exc.HTTPNotModified,
+                               self.controller.metadata,
+                               req, tenant_id=self.tenant,
+                               stack_name=stack_identity.stack_name,
+                               stack_id=stack_identity.stack_id,
+                               resource_name=res_name)
+        self.assertEqual('abc123', ex.etag)
+        self.m.VerifyAll()
+
     def test_metadata_show_nonexist(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'metadata', True)
         res_name = 'WikiDatabase'
@@ -2464,10 +2494,10 @@ class ResourceControllerTest(ControllerTest, common.HeatTestCase):
         self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
         rpc_client.EngineClient.call(
             req.context,
-            ('describe_stack_resource',
+            ('describe_stack_resource_metadata',
              {'stack_identity': stack_identity, 'resource_name': res_name,
-              'with_attr': None}),
-            version='1.2'
+              'etag': None}),
+            version='1.4'
         ).AndRaise(to_remote_error(error))
         self.m.ReplayAll()
 
@@ -2496,10 +2526,10 @@ class ResourceControllerTest(ControllerTest, common.HeatTestCase):
         self.m.StubOutWithMock(rpc_client.EngineClient, 'call')
         rpc_client.EngineClient.call(
             req.context,
-            ('describe_stack_resource',
+            ('describe_stack_resource_metadata',
              {'stack_identity': stack_identity, 'resource_name': res_name,
-              'with_attr': None}),
-            version='1.2'
+              'etag': None}),
+            version='1.4'
         ).AndRaise(to_remote_error(error))
         self.m.ReplayAll()
 
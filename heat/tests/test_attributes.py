@@ -12,6 +12,7 @@
 #    under the License.
 
 import mock
+from oslo.utils import timeutils
 import testtools
 
 from heat.engine import attributes
@@ -176,3 +177,20 @@ class AttributesTest(common.HeatTestCase):
         self.assertEqual("value3", attribs['test3'])
         value = 'value3 changed'
         self.assertEqual("value3 changed", attribs['test3'])
+
+    def test_caching_ttl(self):
+        value = 'value2'
+        test_resolver = lambda x: value
+        schema = {'test2': attributes.Schema('Test attrib 2', cache_ttl=30)}
+        self.m.ReplayAll()
+        attribs = attributes.Attributes('test resource', schema,
+                                        test_resolver)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+
+        self.assertEqual("value2", attribs['test2'])
+        value = 'value2 changed'
+        timeutils.advance_time_seconds(29)
+        self.assertEqual("value2", attribs['test2'])
+        timeutils.advance_time_seconds(1)
+        self.assertEqual("value2 changed", attribs['test2'])
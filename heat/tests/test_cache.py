@@ -0,0 +1,99 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import testtools
+
+from heat.common import cache
+
+
+class LRUCacheTest(testtools.TestCase):
+
+    def test_get_set(self):
+        lru = cache.LRUCache(3)
+        lru.set('a', 1)
+        self.assertEqual(1, lru.get('a'))
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual('x', lru.get('b', 'x'))
+        self.assertEqual(1, lru.hits)
+        self.assertEqual(2, lru.misses)
+
+    def test_evict_least_recently_used(self):
+        lru = cache.LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertIn('a', lru)
+        self.assertNotIn('b', lru)
+        self.assertIn('c', lru)
+        self.assertEqual(2, len(lru))
+
+    def test_sizeof(self):
+        lru = cache.LRUCache(10, sizeof=len)
+        lru.set('a', 'aaaa')
+        lru.set('b', 'bbbb')
+        self.assertEqual(8, lru.size)
+        lru.set('c', 'cccc')
+
+        self.assertEqual(['b', 'c'], sorted(k for k in 'abc' if k in lru))
+        self.assertEqual(8, lru.size)
+
+        # too big to ever be cached
+        lru.set('d', 'd' * 11)
+        self.assertNotIn('d', lru)
+        self.assertEqual(2, len(lru))
+
+    def test_replace(self):
+        lru = cache.LRUCache(10, sizeof=len)
+        lru.set('a', 'aaaa')
+        lru.set('a', 'aa')
+        self.assertEqual('aa', lru.get('a'))
+        self.assertEqual(2, lru.size)
+
+    def test_pop_clear(self):
+        lru = cache.LRUCache(10, sizeof=len)
+        lru.set('a', 'aaaa')
+        lru.set('b', 'bb')
+        self.assertEqual('aaaa', lru.pop('a'))
+        self.assertIsNone(lru.pop('a'))
+        self.assertEqual(2, lru.size)
+        lru.clear()
+        self.assertEqual(0, len(lru))
+        self.assertEqual(0, lru.size)
+
+    def test_callable_max_size(self):
+        max_size = [2]
+        lru = cache.LRUCache(lambda: max_size[0])
+        lru.set('a', 1)
+        lru.set('b', 2)
+        max_size[0] = 1
+        lru.set('c', 3)
+        self.assertEqual(['c'], [k for k in 'abc' if k in lru])
+
+    def test_stats(self):
+        lru = cache.LRUCache(10, sizeof=len)
+        lru.set('a', 'aaaa')
+        lru.get('a')
+        lru.get('b')
+        self.assertEqual({'hits': 1, 'misses': 1, 'items': 1,
+                          'size': 4, 'max_size': 10}, lru.stats())
+
+    def test_log_stats(self):
+        lru = cache.LRUCache(10, name='test_log_stats')
+        lru.get('a')
+        with mock.patch.object(cache.LOG, 'debug') as debug:
+            cache.log_stats()
+        debug.assert_any_call('Cache test_log_stats: 0 hits, 1 misses, '
+                              '0 items of total size 0/10')
@@ -25,6 +25,7 @@ from troveclient import client as troveclient
 from heatclient import client as heatclient
 import mock
 from oslo.config import cfg
+from oslo.utils import timeutils
 from testtools import testcase
 
 from heat.engine import clients
@@ -204,6 +205,70 @@ class ClientPluginTest(common.HeatTestCase):
         self.assertRaises(TypeError, client_plugin.ClientPlugin, c)
 
 
+class ClientPluginLookupTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(ClientPluginLookupTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 60)
+        client_plugin.ClientPlugin._indexes.clear()
+        self.addCleanup(client_plugin.ClientPlugin._indexes.clear)
+        self.addCleanup(timeutils.clear_time_override)
+        timeutils.set_time_override()
+        self.resources = [('1', 'foo'), ('2', 'bar'), ('3', 'bar')]
+        self.list_resources = mock.Mock(side_effect=lambda: self.resources)
+
+    def _plugin(self, tenant_id='tenant'):
+        con = mock.Mock(tenant_id=tenant_id, region_name=None)
+        return FooClientsPlugin(con)
+
+    def _lookup(self, name_or_id, plugin=None):
+        plugin = plugin or self._plugin()
+        return plugin.lookup_id('thing', name_or_id, self.list_resources)
+
+    def test_lookup_shared(self):
+        self.assertEqual('1', self._lookup('foo'))
+        self.assertEqual('1', self._lookup('1'))
+        self.assertEqual('2', self._lookup('2'))
+        self.assertEqual(1, self.list_resources.call_count)
+
+        self.assertEqual('1', self._lookup('foo', self._plugin('other')))
+        self.assertEqual(2, self.list_resources.call_count)
+
+    def test_lookup_ambiguous(self):
+        self.assertIsNone(self._lookup('bar'))
+        self.assertEqual(1, self.list_resources.call_count)
+
+    def test_lookup_refreshed_on_miss(self):
+        self.assertEqual('1', self._lookup('foo'))
+        self.resources.append(('4', 'baz'))
+        self.assertIsNone(self._lookup('baz'))
+        self.assertEqual(1, self.list_resources.call_count)
+
+        # the index is rebuilt on a miss at most once per interval
+        timeutils.advance_time_seconds(10)
+        self.assertEqual('4', self._lookup('baz'))
+        self.assertIsNone(self._lookup('wibble'))
+        self.assertEqual(2, self.list_resources.call_count)
+
+    def test_lookup_unset(self):
+        self.assertIsNone(self._lookup(None))
+        self.assertIsNone(self._lookup(''))
+        self.assertFalse(self.list_resources.called)
+
+    def test_lookup_expired(self):
+        self.assertEqual('1', self._lookup('foo'))
+        self.resources[0] = ('5', 'foo')
+        self.assertEqual('1', self._lookup('foo'))
+        timeutils.advance_time_seconds(61)
+        self.assertEqual('5', self._lookup('foo'))
+        self.assertEqual(2, self.list_resources.call_count)
+
+    def test_lookup_disabled(self):
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
+        self.assertIsNone(self._lookup('foo'))
+        self.assertFalse(self.list_resources.called)
+
+
 class TestClientPluginsInitialise(common.HeatTestCase):
 
     @testcase.skip('skipped until keystone can read context auth_ref')
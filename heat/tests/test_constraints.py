@@ -12,6 +12,9 @@
 #    under the License.
 
 
+import mock
+from oslo.config import cfg
+from oslo.utils import timeutils
 import six
 import testtools
 
@@ -495,3 +498,72 @@ class CustomConstraintTest(testtools.TestCase):
 
         constraint = constraints.CustomConstraint("zero", environment=self.env)
         self.assertEqual("zero", constraint["custom_constraint"])
+
+
+class BaseCustomConstraintTest(testtools.TestCase):
+
+    class KnownConstraint(constraints.BaseCustomConstraint):
+        expected_exceptions = (exception.NotFound,)
+
+        def validate_with_client(self, client, value):
+            client.lookup(value)
+
+    def setUp(self):
+        super(BaseCustomConstraintTest, self).setUp()
+        constraints.BaseCustomConstraint._validated.clear()
+        self.addCleanup(constraints.BaseCustomConstraint._validated.clear)
+        self.addCleanup(cfg.CONF.clear_override,
+                        'custom_constraint_cache_ttl')
+        self.addCleanup(timeutils.clear_time_override)
+        self.clients = mock.Mock()
+
+    def _context(self, request_id='req-1', tenant_id='tenant'):
+        return mock.Mock(clients=self.clients, request_id=request_id,
+                         tenant_id=tenant_id, region_name=None)
+
+    def test_validated_once_per_request(self):
+        constraint = self.KnownConstraint()
+        context = self._context()
+
+        self.assertTrue(constraint.validate('foo', context))
+        self.assertTrue(self.KnownConstraint().validate('foo', context))
+        self.assertTrue(constraint.validate('bar', context))
+        self.assertEqual([mock.call('foo'), mock.call('bar')],
+                         self.clients.lookup.call_args_list)
+
+        self.assertTrue(constraint.validate('foo', self._context('req-2')))
+        self.assertEqual(3, self.clients.lookup.call_count)
+
+    def test_failure_not_cached(self):
+        constraint = self.KnownConstraint()
+        context = self._context()
+        self.clients.lookup.side_effect = exception.NotFound('gone')
+
+        self.assertFalse(constraint.validate('foo', context))
+        self.assertFalse(constraint.validate('foo', context))
+        self.assertEqual(2, self.clients.lookup.call_count)
+
+    def test_unhashable_value(self):
+        constraint = self.KnownConstraint()
+        context = self._context()
+
+        self.assertTrue(constraint.validate(['foo'], context))
+        self.assertTrue(constraint.validate(['foo'], context))
+        self.assertEqual(2, self.clients.lookup.call_count)
+
+    def test_validated_per_tenant_with_ttl(self):
+        cfg.CONF.set_override('custom_constraint_cache_ttl', 60)
+        timeutils.set_time_override()
+        constraint = self.KnownConstraint()
+
+        self.assertTrue(constraint.validate('foo', self._context('req-1')))
+        self.assertTrue(constraint.validate('foo', self._context('req-2')))
+        self.assertEqual(1, self.clients.lookup.call_count)
+
+        self.assertTrue(constraint.validate('foo',
+                                            self._context('req-3', 'other')))
+        self.assertEqual(2, self.clients.lookup.call_count)
+
+        timeutils.advance_time_seconds(61)
+        self.assertTrue(constraint.validate('foo', self._context('req-4')))
+        self.assertEqual(3, self.clients.lookup.call_count)
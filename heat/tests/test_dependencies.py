@@ -121,6 +121,27 @@ class dependenciesTest(testtools.TestCase):
                            ('a1', 'b1'), ('a2', 'b1'), ('a2', 'b2'),
                            ('b1', 'first'), ('b2', 'first'))
 
+    def test_long_chain_fwd(self):
+        self._dep_test_fwd(*[(str(i + 1), str(i)) for i in range(1000)])
+
+    def test_long_chain_rev(self):
+        self._dep_test_rev(*[(str(i + 1), str(i)) for i in range(1000)])
+
+    def test_partial_cycle_fwd(self):
+        d = dependencies.Dependencies([('first', 'second'),
+                                       ('second', 'third'),
+                                       ('third', 'second'),
+                                       ('second', 'root')])
+        order = []
+
+        def toposort():
+            for n in d:
+                order.append(n)
+
+        self.assertRaises(dependencies.CircularDependencyException,
+                          toposort)
+        self.assertEqual(['root'], order)
+
     def test_circular_fwd(self):
         d = dependencies.Dependencies([('first', 'second'),
                                        ('second', 'third'),
@@ -227,3 +248,61 @@ class dependenciesTest(testtools.TestCase):
                         "'%s' not found in required_by" % n)
 
         self.assertRaises(KeyError, d.required_by, 'foo')
+
+    def test_requires(self):
+        d = dependencies.Dependencies([('last', 'e1'), ('last', 'mid1'),
+                                       ('mid1', 'e2')])
+
+        self.assertEqual(set(['e1', 'mid1']), set(d.requires('last')))
+        self.assertEqual([], list(d.requires('e1')))
+        self.assertRaises(KeyError, d.requires, 'foo')
+
+        # The same results are returned once the graph has been compacted
+        d.view()
+        self.assertEqual(set(['e1', 'mid1']), set(d.requires('last')))
+        self.assertEqual([], list(d.requires('e1')))
+        self.assertRaises(KeyError, d.requires, 'foo')
+
+    def test_view(self):
+        d = dependencies.Dependencies([('last', 'mid'), ('mid', 'first'),
+                                       ('other', None)])
+        view = d.view()
+
+        self.assertEqual(4, len(view))
+        self.assertIn('other', view)
+        self.assertNotIn('foo', view)
+        self.assertEqual(['mid'], list(view.requires('last')))
+        self.assertEqual(['last'], list(view.required_by('mid')))
+        self.assertEqual(set([('last', 'mid'), ('mid', 'first'),
+                              ('other', None)]),
+                         set(view.edges()))
+
+        rev = d.view(reverse=True)
+        self.assertEqual(['mid'], list(rev.required_by('last')))
+        self.assertEqual(['last'], list(rev.requires('mid')))
+        self.assertEqual(set([('mid', 'last'), ('first', 'mid'),
+                              ('other', None)]),
+                         set(rev.edges()))
+
+    def test_view_reused(self):
+        d = dependencies.Dependencies([('last', 'first')])
+        self.assertIs(d.view(), d.view())
+        self.assertEqual(['first', 'last'], list(d))
+        self.assertEqual(['last', 'first'], list(reversed(d)))
+        self.assertIs(d.view(), d.view())
+
+    def test_add_after_view(self):
+        d = dependencies.Dependencies([('mid', 'first')])
+        self.assertEqual(['first', 'mid'], list(d))
+
+        d += ('last', 'mid')
+        self.assertEqual(['first', 'mid', 'last'], list(d))
+        self.assertEqual(['last'], list(d.required_by('mid')))
+
+    def test_graph_copy(self):
+        d = dependencies.Dependencies([('last', 'first')])
+        graph = d.graph()
+        del graph['first']
+
+        self.assertEqual(['first', 'last'], list(d))
+        self.assertEqual(['last'], list(d.view().required_by('first')))
@@ -83,6 +83,7 @@ class FormatTest(common.HeatTestCase):
             rpc_api.RES_DESCRIPTION,
             rpc_api.RES_METADATA,
             rpc_api.RES_SCHEMA_ATTRIBUTES,
+            rpc_api.RES_UNRESOLVED_ATTRIBUTES,
         )))
 
         formatted = api.format_stack_resource(res, True)
@@ -109,40 +110,65 @@ class FormatTest(common.HeatTestCase):
         formatted_attrs = formatted[rpc_api.RES_SCHEMA_ATTRIBUTES]
         self.assertEqual('formatted_resource_attrs', formatted_attrs)
 
+    def test_format_stack_resource_unresolved_attributes(self):
+        res = self.stack['generic1']
+
+        formatted = api.format_stack_resource(res, True)
+        self.assertEqual({}, formatted[rpc_api.RES_SCHEMA_ATTRIBUTES])
+        self.assertEqual(['Foo', 'foo'],
+                         formatted[rpc_api.RES_UNRESOLVED_ATTRIBUTES])
+
+        formatted = api.format_stack_resource(res, True, with_attr=['foo'])
+        self.assertEqual(['foo'],
+                         list(formatted[rpc_api.RES_SCHEMA_ATTRIBUTES]))
+        self.assertEqual(['Foo'],
+                         formatted[rpc_api.RES_UNRESOLVED_ATTRIBUTES])
+
     def test_format_resource_attributes(self):
         res = self.stack['generic1']
         formatted_attributes = api.format_resource_attributes(res)
-        self.assertEqual(2, len(formatted_attributes))
-        self.assertIn('foo', formatted_attributes)
-        self.assertIn('Foo', formatted_attributes)
+        self.assertEqual({}, formatted_attributes)
+
+    def test_format_resource_attributes_requested(self):
+        res = mock.Mock()
+        res.attributes = mock.MagicMock()
+        res.attributes.keys.return_value = ['a', 'b']
+        res.attributes.__contains__.side_effect = lambda k: k in ('a', 'b')
+        res.attributes.__getitem__.side_effect = lambda k: k + '_value'
+
+        formatted_attributes = api.format_resource_attributes(res, ['b'])
+        self.assertEqual({'b': 'b_value'}, formatted_attributes)
+        res.attributes.__getitem__.assert_called_once_with('b')
 
     def test_format_resource_attributes_show_attribute(self):
         res = mock.Mock()
         res.attributes = {'a': 'a_value', 'show': {'b': 'b_value'}}
 
-        formatted_attributes = api.format_resource_attributes(res)
-        self.assertIn('b', formatted_attributes)
-        self.assertNotIn('a', formatted_attributes)
+        formatted_attributes = api.format_resource_attributes(res, ['b'])
+        self.assertEqual({'b': 'b_value'}, formatted_attributes)
 
     def test_format_resource_attributes_show_attribute_fail(self):
         res = mock.Mock()
         res.attributes = {'a': 'a_value', 'show': ''}
 
-        formatted_attributes = api.format_resource_attributes(res)
-        self.assertIn('a', formatted_attributes)
-        self.assertIn('show', formatted_attributes)
+        formatted_attributes = api.format_resource_attributes(res, ['b'])
+        self.assertEqual({'b': None}, formatted_attributes)
 
     def test_format_resource_attributes_force_attributes(self):
         res = self.stack['generic1']
         force_attrs = ['a1', 'a2']
 
         formatted_attributes = api.format_resource_attributes(res, force_attrs)
-        self.assertEqual(4, len(formatted_attributes))
-        self.assertIn('foo', formatted_attributes)
-        self.assertIn('Foo', formatted_attributes)
+        self.assertEqual(2, len(formatted_attributes))
         self.assertIn('a1', formatted_attributes)
         self.assertIn('a2', formatted_attributes)
 
+    def test_format_resource_attributes_resolve_requested(self):
+        res = self.stack['generic1']
+
+        formatted_attributes = api.format_resource_attributes(res, ['foo'])
+        self.assertEqual({'foo': 'generic1'}, formatted_attributes)
+
     def _get_formatted_resource_properties(self, res_name):
         tmpl = parser.Template(template_format.parse('''
             heat_template_version: 2013-05-23
@@ -251,6 +277,26 @@ class FormatTest(common.HeatTestCase):
             event_id_formatted['path'])
         self.assertEqual(event_id, event_identifier.event_id)
 
+    def test_format_db_event(self):
+        db_event = mock.Mock(uuid='abc123yc-9f88-404d-a85b-531529456xyz',
+                             stack_id=self.stack.id,
+                             resource_name='generic1',
+                             physical_resource_id='z3455xyc',
+                             resource_action='CREATE',
+                             resource_status='COMPLETE',
+                             resource_status_reason='state changed',
+                             resource_type='GenericResourceType',
+                             resource_properties={'Foo': 'bar'},
+                             created_at=datetime(2015, 1, 2, 3, 4, 5))
+        event = self._dummy_event(1)
+        event.physical_resource_id = 'z3455xyc'
+        event.resource_properties = {'Foo': 'bar'}
+        event.timestamp = datetime(2015, 1, 2, 3, 4, 5)
+
+        formatted = api.format_db_event(db_event, self.stack.identifier())
+
+        self.assertEqual(api.format_event(event), formatted)
+
     @mock.patch.object(api, 'format_stack_resource')
     def test_format_stack_preview(self, mock_fmt_resource):
         def mock_format_resources(res, **kwargs):
@@ -1834,6 +1834,24 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_event_list_test_stack')
+    def test_stack_event_list_by_tenant_no_stack_load(self):
+        self.m.StubOutWithMock(parser.Stack, 'load')
+        self.m.ReplayAll()
+        get_identities = self.patchobject(
+            db_api, 'stack_get_identities',
+            wraps=db_api.stack_get_identities)
+
+        events = self.eng.list_events(self.ctx, None)
+
+        self.assertEqual(2, len(events))
+        get_identities.assert_called_once_with(self.ctx,
+                                               set([self.stack.id]))
+        for ev in events:
+            self.assertEqual(dict(self.stack.identifier()),
+                             ev['stack_identity'])
+        self.m.VerifyAll()
+
     @mock.patch.object(db_api, 'event_get_all_by_stack')
     @mock.patch.object(service.EngineService, '_get_stack')
     def test_stack_events_list_passes_marker_and_filters(self,
@@ -1900,6 +1918,33 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_list_summary_test_stack')
+    def test_stack_list_summary(self):
+        self.m.StubOutWithMock(parser.Stack, '_from_db')
+        self.m.ReplayAll()
+
+        sl = self.eng.list_stacks(self.ctx, summary=True)
+
+        self.assertEqual(1, len(sl))
+        s = sl[0]
+        self.assertEqual(self.stack.name, s['stack_name'])
+        self.assertEqual(dict(self.stack.identifier()), s['stack_identity'])
+        self.assertIn('WordPress', s['description'])
+        self.assertEqual(s['description'], s['template_description'])
+        self.assertEqual('CREATE', s['stack_action'])
+        self.assertIn('creation_time', s)
+        self.assertIn('updated_time', s)
+        self.assertNotIn('parameters', s)
+        self.assertNotIn('outputs', s)
+        self.m.VerifyAll()
+
+    @mock.patch.object(db_api, 'stack_get_all')
+    def test_stack_list_summary_eager_loads(self, mock_stack_get_all):
+        self.eng.list_stacks(self.ctx, summary=True)
+        mock_stack_get_all.assert_called_once_with(self.ctx, None, None, None,
+                                                   None, None, True, False,
+                                                   False, eager_load=True)
+
     @mock.patch.object(db_api, 'stack_get_all')
     def test_stack_list_passes_marker_info(self, mock_stack_get_all):
         limit = object()
@@ -2245,7 +2290,8 @@ class StackServiceTest(common.HeatTestCase):
         self.assertIn('resource_type', r)
         self.assertIn('physical_resource_id', r)
         self.assertIn('resource_name', r)
-        self.assertIn('attributes', r)
+        self.assertEqual({}, r['attributes'])
+        self.assertIn('PublicIp', r['unresolved_attributes'])
         self.assertEqual('WebServer', r['resource_name'])
 
         self.m.VerifyAll()
@@ -2298,6 +2344,75 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_resource_metadata_test_stack')
+    def test_stack_resource_metadata(self):
+        self.patchobject(parser.Stack, 'load')
+        self.patchobject(res.Resource, 'FnGetAtt')
+        self.stack['WebServer'].metadata_set({'foo': 'bar'})
+
+        result = self.eng.describe_stack_resource_metadata(
+            self.ctx, self.stack.identifier(), 'WebServer')
+        self.assertEqual({'foo': 'bar'}, result['metadata'])
+        etag = result['metadata_etag']
+
+        result = self.eng.describe_stack_resource_metadata(
+            self.ctx, self.stack.identifier(), 'WebServer', etag=etag)
+        self.assertEqual({'metadata_etag': etag}, result)
+
+        self.stack['WebServer'].metadata_set({'foo': 'baz'})
+        result = self.eng.describe_stack_resource_metadata(
+            self.ctx, self.stack.identifier(), 'WebServer', etag=etag)
+        self.assertEqual({'foo': 'baz'}, result['metadata'])
+        self.assertNotEqual(etag, result['metadata_etag'])
+
+        self.assertFalse(parser.Stack.load.called)
+        self.assertFalse(res.Resource.FnGetAtt.called)
+
+    @stack_context('service_resource_metadata_nonexist_test_stack')
+    def test_stack_resource_metadata_nonexist_resource(self):
+        ex = self.assertRaises(dispatcher.ExpectedException,
+                               self.eng.describe_stack_resource_metadata,
+                               self.ctx, self.stack.identifier(), 'foo')
+        self.assertEqual(exception.ResourceNotFound, ex.exc_info[0])
+
+    @stack_context('service_resource_metadata_user_deny_test_stack')
+    def test_stack_resource_metadata_stack_user_deny(self):
+        self.ctx.roles = [cfg.CONF.heat_stack_user_role]
+        self.m.StubOutWithMock(service.EngineService, '_authorize_stack_user')
+        service.EngineService._authorize_stack_user(self.ctx, mox.IgnoreArg(),
+                                                    'foo').AndReturn(False)
+        self.m.ReplayAll()
+
+        ex = self.assertRaises(dispatcher.ExpectedException,
+                               self.eng.describe_stack_resource_metadata,
+                               self.ctx, self.stack.identifier(), 'foo')
+        self.assertEqual(exception.Forbidden, ex.exc_info[0])
+
+        self.m.VerifyAll()
+
+    @stack_context('service_resource_metadata_user_cached_test_stack')
+    def test_stack_resource_metadata_stack_user_cached(self):
+        self.ctx.roles = [cfg.CONF.heat_stack_user_role]
+        self.patchobject(parser.Stack, 'load', return_value=self.stack)
+        authorize = self.patchobject(service.EngineService,
+                                     '_authorize_stack_user',
+                                     return_value=True)
+
+        for i in range(2):
+            result = self.eng.describe_stack_resource_metadata(
+                self.ctx, self.stack.identifier(), 'WebServer')
+            self.assertIn('metadata', result)
+
+        self.assertEqual(1, parser.Stack.load.call_count)
+        self.assertEqual(1, authorize.call_count)
+
+        # the decision is not reused once the stack has changed
+        self.stack['WebServer'].metadata_set({'foo': 'bar'})
+        self.ctx.session.expire_all()
+        self.eng.describe_stack_resource_metadata(
+            self.ctx, self.stack.identifier(), 'WebServer')
+        self.assertEqual(2, authorize.call_count)
+
     @stack_context('service_resources_describe_test_stack')
     def test_stack_resources_describe(self):
         self.m.StubOutWithMock(parser.Stack, 'load')
@@ -2345,6 +2460,43 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_resources_describe_cached_test_stack')
+    def test_stack_resources_describe_reuses_stack(self):
+        self.patchobject(parser.Stack, 'load', wraps=parser.Stack.load)
+
+        for i in range(2):
+            resources = self.eng.describe_stack_resources(
+                self.ctx, self.stack.identifier(), 'WebServer')
+            self.assertEqual('WebServer', resources[0]['resource_name'])
+        self.assertEqual(1, parser.Stack.load.call_count)
+
+        db_api.stack_update(self.ctx, self.stack.id,
+                            {'status_reason': 'changed'})
+        self.eng.show_stack(self.ctx, self.stack.identifier())
+        self.assertEqual(2, parser.Stack.load.call_count)
+        self.eng.list_stack_resources(self.ctx, self.stack.identifier())
+        self.assertEqual(2, parser.Stack.load.call_count)
+
+    @stack_context('service_resources_describe_uncached_test_stack')
+    def test_stack_resource_describe_error_not_cached(self):
+        self.patchobject(parser.Stack, 'load', wraps=parser.Stack.load)
+
+        for i in range(2):
+            self.assertRaises(dispatcher.ExpectedException,
+                              self.eng.describe_stack_resource,
+                              self.ctx, self.stack.identifier(), 'foo')
+        self.assertEqual(2, parser.Stack.load.call_count)
+
+    @stack_context('service_resources_describe_nocache_test_stack')
+    def test_stack_resources_describe_cache_disabled(self):
+        cfg.CONF.set_override('max_cached_stacks', 0)
+        self.patchobject(parser.Stack, 'load', wraps=parser.Stack.load)
+
+        for i in range(2):
+            self.eng.describe_stack_resources(self.ctx,
+                                              self.stack.identifier(), None)
+        self.assertEqual(2, parser.Stack.load.call_count)
+
     def test_stack_resources_describe_bad_lookup(self):
         self.m.StubOutWithMock(service.EngineService, '_get_stack')
         service.EngineService._get_stack(
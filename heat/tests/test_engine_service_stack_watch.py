@@ -12,8 +12,10 @@
 #    under the License.
 
 import mock
+from oslo.config import cfg
 
 from heat.engine import service_stack_watch
+from heat.engine import watchrule
 from heat.rpc import api as rpc_api
 from heat.tests import common
 from heat.tests import utils
@@ -69,8 +71,8 @@ class StackServiceWatcherTest(common.HeatTestCase):
         sw.start_watch_task(stack_id, self.ctx)
 
         # assert that add_timer IS called.
-        self.assertEqual([mock.call(stack_id, sw.periodic_watcher_task,
-                                    sid=stack_id)],
+        self.assertEqual([mock.call(cfg.CONF.periodic_interval,
+                                    sw.periodic_watcher_task)],
                          tg.add_timer.call_args_list)
 
     @mock.patch.object(service_stack_watch.db_api, 'stack_get_all_by_owner_id')
@@ -105,6 +107,64 @@ class StackServiceWatcherTest(common.HeatTestCase):
         sw.start_watch_task(stack_id, self.ctx)
 
         # assert that add_timer IS called.
-        self.assertEqual([mock.call(stack_id, sw.periodic_watcher_task,
-                                    sid=stack_id)],
+        self.assertEqual([mock.call(cfg.CONF.periodic_interval,
+                                    sw.periodic_watcher_task)],
                          tg.add_timer.call_args_list)
+
+    @mock.patch.object(service_stack_watch.db_api, 'stack_get_all_by_owner_id')
+    @mock.patch.object(service_stack_watch.db_api,
+                       'watch_rule_get_all_by_stack')
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_update')
+    def test_periodic_watch_task_created_once(self, watch_rule_update,
+                                              watch_rule_get_all_by_stack,
+                                              stack_get_all_by_owner_id):
+        wr1 = mock.Mock()
+        wr1.id = 4
+        wr1.state = rpc_api.WATCH_STATE_NODATA
+
+        watch_rule_get_all_by_stack.return_value = [wr1]
+        stack_get_all_by_owner_id.return_value = []
+        tg = mock.Mock()
+        sw = service_stack_watch.StackWatch(tg)
+        sw.start_watch_task(91, self.ctx)
+        sw.start_watch_task(92, self.ctx)
+
+        # the rules of both stacks are reset, but only one timer is added
+        self.assertEqual(2, watch_rule_update.call_count)
+        self.assertEqual([mock.call(cfg.CONF.periodic_interval,
+                                    sw.periodic_watcher_task)],
+                         tg.add_timer.call_args_list)
+
+    @mock.patch.object(watchrule.WatchRule, 'load')
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get_all')
+    def test_check_watches(self, watch_rule_get_all, wr_load):
+        wr1 = mock.Mock()
+        wr2 = mock.Mock()
+        wr3 = mock.Mock()
+        watch_rule_get_all.return_value = [wr1, wr2, wr3]
+
+        idle_rule = mock.Mock()
+        idle_rule.evaluate.return_value = []
+        action = mock.Mock()
+        alarm_rule = mock.Mock()
+        alarm_rule.stack_id = 'a-stack'
+        alarm_rule.evaluate.return_value = [action]
+        wr_load.side_effect = [Exception('boom'), idle_rule, alarm_rule]
+
+        tg = mock.Mock()
+        sw = service_stack_watch.StackWatch(tg)
+        sw.periodic_watcher_task()
+
+        watch_rule_get_all.assert_called_once_with(
+            mock.ANY,
+            exclude_states=(rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED,
+                            rpc_api.WATCH_STATE_SUSPENDED))
+        self.assertEqual([mock.call(mock.ANY, watch=wr,
+                                    use_stored_context=True)
+                          for wr in (wr1, wr2, wr3)],
+                         wr_load.call_args_list)
+        # only the rule with actions starts a thread, with the stack its
+        # actions were looked up in
+        tg.start.assert_called_once_with('a-stack', mock.ANY,
+                                         alarm_rule.stack, [action],
+                                         alarm_rule.get_details())
@@ -12,12 +12,15 @@
 #    under the License.
 
 import mock
+from oslo.config import cfg
+from oslo.utils import timeutils
 import six
 import uuid
 
 from glanceclient import exc as glance_exceptions
 
 from heat.common import exception
+from heat.engine.clients import client_plugin
 from heat.engine.clients.os import glance
 from heat.tests import common
 from heat.tests import utils
@@ -31,6 +34,7 @@ class GlanceUtilsTests(common.HeatTestCase):
 
     def setUp(self):
         super(GlanceUtilsTests, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.glance_client = self.m.CreateMockAnything()
         con = utils.dummy_context()
         c = con.clients
@@ -57,6 +61,37 @@ class GlanceUtilsTests(common.HeatTestCase):
                           self.glance_plugin.get_image_id, 'noimage')
         self.m.VerifyAll()
 
+    def test_get_image_id_indexed(self):
+        cfg.CONF.set_override('client_lookup_cache_ttl', 60)
+        client_plugin.ClientPlugin._indexes.clear()
+        self.addCleanup(client_plugin.ClientPlugin._indexes.clear)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        my_image = self.m.CreateMockAnything()
+        my_image.id = str(uuid.uuid4())
+        my_image.name = 'myfakeimage'
+        other_image = self.m.CreateMockAnything()
+        other_image.id = str(uuid.uuid4())
+        other_image.name = 'myfakeimage'
+        self.glance_client.images = self.m.CreateMockAnything()
+        self.glance_client.images.list().AndReturn([my_image])
+        self.glance_client.images.list().AndReturn([my_image, other_image])
+        filters = {'name': 'myfakeimage'}
+        self.glance_client.images.list(filters=filters).AndReturn(
+            [my_image, other_image])
+        self.m.ReplayAll()
+        self.assertEqual(my_image.id,
+                         self.glance_plugin.get_image_id('myfakeimage'))
+        self.assertEqual(my_image.id,
+                         self.glance_plugin.get_image_id(my_image.id))
+        # not found in the index, which is refreshed
+        timeutils.advance_time_seconds(10)
+        self.assertEqual(other_image.id,
+                         self.glance_plugin.get_image_id(other_image.id))
+        self.assertRaises(exception.PhysicalResourceNameAmbiguity,
+                          self.glance_plugin.get_image_id, 'myfakeimage')
+        self.m.VerifyAll()
+
     def test_get_image_id_by_name_in_uuid(self):
         """Tests the get_image_id function by name in uuid."""
         my_image = self.m.CreateMockAnything()
@@ -285,7 +285,15 @@ class WaitCondMetadataUpdateTest(common.HeatTestCase):
         self.assertEqual('{"123": "foo"}', watch.FnGetAtt('Data'))
         self.assertEqual('{"123": "foo"}', inst.metadata_get()['test'])
 
+        # only resources whose metadata refers to the signalled resource,
+        # or to the WaitCondition depending on it, are refreshed
+        metadata_update = instance.Instance.metadata_update
+        refresh = self.patchobject(instance.Instance, 'metadata_update',
+                                   autospec=True,
+                                   side_effect=metadata_update)
         update_metadata('456', 'blarg', 'wibble')
+        self.assertEqual(['S2'],
+                         [c[0][0].name for c in refresh.call_args_list])
         self.assertEqual('{"123": "foo", "456": "blarg"}',
                          watch.FnGetAtt('Data'))
         self.assertEqual('{"123": "foo"}',
@@ -342,6 +350,7 @@ class MetadataRefreshTestServer(common.HeatTestCase):
         # called by metadata_update()
         server.Server.FnGetAtt('first_address').AndReturn('192.0.2.2')
         server.Server.FnGetAtt('first_address').AndReturn('192.0.2.2')
+        server.Server.FnGetAtt('first_address').AndReturn('192.0.2.2')
 
         self.m.ReplayAll()
         self.stack.create()
@@ -370,4 +379,9 @@ class MetadataRefreshTestServer(common.HeatTestCase):
         md = s1.metadata_get(refresh=True)
         self.assertEqual(new_md, md)
 
+        # Unchanged metadata is not written again
+        self.patchobject(s1, 'metadata_set')
+        s1.metadata_update()
+        self.assertFalse(s1.metadata_set.called)
+
         self.m.VerifyAll()
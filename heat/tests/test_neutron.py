@@ -19,6 +19,7 @@ import mox
 from neutronclient.common import exceptions as qe
 from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.v2_0 import client as neutronclient
+from oslo.config import cfg
 
 from heat.common import exception
 from heat.common import template_format
@@ -1019,6 +1020,7 @@ class NeutronSubnetTest(common.HeatTestCase):
 
     def setUp(self):
         super(NeutronSubnetTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.m.StubOutWithMock(neutronclient.Client, 'create_subnet')
         self.m.StubOutWithMock(neutronclient.Client, 'delete_subnet')
         self.m.StubOutWithMock(neutronclient.Client, 'show_subnet')
@@ -1328,6 +1330,7 @@ class NeutronRouterTest(common.HeatTestCase):
 
     def setUp(self):
         super(NeutronRouterTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.m.StubOutWithMock(neutronclient.Client, 'create_router')
         self.m.StubOutWithMock(neutronclient.Client, 'delete_router')
         self.m.StubOutWithMock(neutronclient.Client, 'show_router')
@@ -1961,6 +1964,7 @@ class NeutronFloatingIPTest(common.HeatTestCase):
 
     def setUp(self):
         super(NeutronFloatingIPTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.m.StubOutWithMock(neutronclient.Client, 'create_floatingip')
         self.m.StubOutWithMock(neutronclient.Client, 'delete_floatingip')
         self.m.StubOutWithMock(neutronclient.Client, 'show_floatingip')
@@ -2479,6 +2483,7 @@ class NeutronPortTest(common.HeatTestCase):
 
     def setUp(self):
         super(NeutronPortTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.m.StubOutWithMock(neutronclient.Client, 'create_port')
         self.m.StubOutWithMock(neutronclient.Client, 'show_port')
         self.m.StubOutWithMock(neutronclient.Client, 'update_port')
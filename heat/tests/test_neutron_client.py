@@ -12,8 +12,10 @@
 #    under the License.
 
 import mock
+from oslo.config import cfg
 
 from heat.common import exception
+from heat.engine.clients import client_plugin
 from heat.engine.clients.os import neutron
 from heat.tests import common
 from heat.tests import utils
@@ -46,6 +48,28 @@ class NeutronClientPluginTests(NeutronClientPluginTestCase):
         self.mock_find.assert_called_once_with(self.neutron_client, 'network',
                                                'test_network')
 
+    def test_find_neutron_resource_indexed(self):
+        cfg.CONF.set_override('client_lookup_cache_ttl', 60)
+        client_plugin.ClientPlugin._indexes.clear()
+        self.addCleanup(client_plugin.ClientPlugin._indexes.clear)
+        self.neutron_client.list_networks.return_value = {
+            'networks': [{'id': 'net1', 'name': 'test_network'},
+                         {'id': 'net2', 'name': 'dup'},
+                         {'id': 'net3', 'name': 'dup'}]}
+
+        for i in range(3):
+            res = self.neutron_plugin.find_neutron_resource(
+                {'net': 'test_network'}, 'net', 'network')
+            self.assertEqual('net1', res)
+        self.neutron_client.list_networks.assert_called_once_with()
+        self.assertFalse(self.mock_find.called)
+
+        res = self.neutron_plugin.find_neutron_resource({'net': 'dup'},
+                                                        'net', 'network')
+        self.assertEqual(42, res)
+        self.mock_find.assert_called_once_with(self.neutron_client,
+                                               'network', 'dup')
+
     def test_resolve_network(self):
         props = {'net': 'test_network'}
 
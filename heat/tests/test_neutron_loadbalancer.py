@@ -350,6 +350,7 @@ class PoolTest(common.HeatTestCase):
 
     def setUp(self):
         super(PoolTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.m.StubOutWithMock(neutronclient.Client, 'create_pool')
         self.m.StubOutWithMock(neutronclient.Client, 'delete_pool')
         self.m.StubOutWithMock(neutronclient.Client, 'show_pool')
@@ -18,6 +18,7 @@ import mox
 from neutronclient.common import exceptions as qe
 from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.v2_0 import client as neutronclient
+from oslo.config import cfg
 import six
 
 from heat.common import exception
@@ -95,6 +96,7 @@ sng = {
 class NeutronNetworkGatewayTest(common.HeatTestCase):
     def setUp(self):
         super(NeutronNetworkGatewayTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.m.StubOutWithMock(neutronclient.Client, 'create_network_gateway')
         self.m.StubOutWithMock(neutronclient.Client, 'show_network_gateway')
         self.m.StubOutWithMock(neutronclient.Client, 'delete_network_gateway')
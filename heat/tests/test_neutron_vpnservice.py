@@ -16,6 +16,7 @@ import mox
 from neutronclient.common import exceptions
 from neutronclient.neutron import v2_0 as neutronV20
 from neutronclient.v2_0 import client as neutronclient
+from oslo.config import cfg
 import six
 
 from heat.common import exception
@@ -165,6 +166,7 @@ class VPNServiceTest(common.HeatTestCase):
 
     def setUp(self):
         super(VPNServiceTest, self).setUp()
+        cfg.CONF.set_override('client_lookup_cache_ttl', 0)
         self.m.StubOutWithMock(neutronclient.Client, 'create_vpnservice')
         self.m.StubOutWithMock(neutronclient.Client, 'delete_vpnservice')
         self.m.StubOutWithMock(neutronclient.Client, 'show_vpnservice')
@@ -15,11 +15,14 @@
 import collections
 import mock
 from novaclient import exceptions as nova_exceptions
+from novaclient.v1_1 import servers
 from oslo.config import cfg
+from oslo.utils import timeutils
 import six
 import uuid
 
 from heat.common import exception
+from heat.engine.clients import client_plugin
 from heat.engine.clients.os import nova
 from heat.tests import common
 from heat.tests import utils
@@ -80,6 +83,22 @@ class NovaClientPluginTests(NovaClientPluginTestCase):
                           self.nova_plugin.get_flavor_id, 'noflavor')
         self.m.VerifyAll()
 
+    def test_get_flavor_id_indexed(self):
+        cfg.CONF.set_override('client_lookup_cache_ttl', 60)
+        client_plugin.ClientPlugin._indexes.clear()
+        self.addCleanup(client_plugin.ClientPlugin._indexes.clear)
+        my_flavor = self.m.CreateMockAnything()
+        my_flavor.name = 'X-Large'
+        my_flavor.id = str(uuid.uuid4())
+        self.nova_client.flavors = self.m.CreateMockAnything()
+        self.nova_client.flavors.list().AndReturn([my_flavor])
+        self.m.ReplayAll()
+        self.assertEqual(my_flavor.id,
+                         self.nova_plugin.get_flavor_id('X-Large'))
+        self.assertEqual(my_flavor.id,
+                         self.nova_plugin.get_flavor_id(my_flavor.id))
+        self.m.VerifyAll()
+
     def test_get_keypair(self):
         """Tests the get_keypair function."""
         my_pub_key = 'a cool public key string'
@@ -174,6 +193,137 @@ class NovaUtilsRefreshServerTests(NovaClientPluginTestCase):
         self.m.VerifyAll()
 
 
+class NovaUtilsRefreshServerBatchTests(NovaClientPluginTestCase):
+
+    def setUp(self):
+        super(NovaUtilsRefreshServerBatchTests, self).setUp()
+        cfg.CONF.set_override('server_status_batch_threshold', 2)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        self.nova_client.servers = self.m.CreateMockAnything()
+
+    def _server(self, server_id, status, manager=None):
+        return servers.Server(manager, {'id': server_id, 'status': status},
+                              loaded=True)
+
+    def test_refresh_batched(self):
+        self.nova_plugin.server_list_page_size = 2
+        manager = mock.Mock()
+        manager.get.side_effect = lambda sid: self._server(sid, 'ACTIVE')
+        polled = [self._server(str(i), 'BUILD', manager) for i in range(4)]
+        self.nova_client.servers.list(marker=None, limit=2).AndReturn(
+            [self._server('1', 'ACTIVE'), self._server('2', 'ERROR')])
+        self.nova_client.servers.list(marker='2', limit=2).AndReturn(
+            [self._server('3', 'ACTIVE')])
+        self.nova_client.servers.list(marker=None, limit=2).AndReturn([])
+        self.m.ReplayAll()
+
+        # below the threshold, the server is refreshed on its own
+        self.nova_plugin.refresh_server(polled[0])
+        self.assertEqual('ACTIVE', polled[0].status)
+        manager.get.assert_called_once_with('0')
+
+        # the servers are listed a page at a time
+        for server in polled[1:]:
+            self.nova_plugin.refresh_server(server)
+        self.assertEqual(['ACTIVE', 'ERROR', 'ACTIVE'],
+                         [server.status for server in polled[1:]])
+        self.assertEqual(1, manager.get.call_count)
+
+        # the list is reused until it expires, and servers missing from it
+        # are refreshed on their own
+        self.nova_plugin.refresh_server(polled[1])
+        self.assertEqual(1, manager.get.call_count)
+        timeutils.advance_time_seconds(1)
+        self.nova_plugin.refresh_server(polled[1])
+        self.assertEqual(2, manager.get.call_count)
+        self.m.VerifyAll()
+
+    def test_refresh_batched_default_threshold(self):
+        cfg.CONF.clear_override('server_status_batch_threshold')
+        threshold = cfg.CONF.server_status_batch_threshold
+        self.nova_plugin.server_list_page_size = 4
+        manager = mock.Mock()
+        manager.get.side_effect = lambda sid: self._server(sid, 'BUILD')
+        polled = [self._server(str(i), 'BUILD', manager)
+                  for i in range(threshold + 2)]
+        listed = [self._server(str(i), 'ACTIVE') for i in range(threshold)]
+        marker = None
+        for start in range(0, threshold + 1, 4):
+            page = listed[start:start + 4]
+            self.nova_client.servers.list(marker=marker,
+                                          limit=4).AndReturn(page)
+            marker = page and page[-1].id
+        self.m.ReplayAll()
+
+        # the servers are listed once the threshold is reached, and those
+        # missing from the list are refreshed on their own
+        for server in polled:
+            self.nova_plugin.refresh_server(server)
+        self.assertEqual(threshold + 1, manager.get.call_count)
+        self.assertEqual(['BUILD'] * (threshold - 1) + ['ACTIVE'] +
+                         ['BUILD'] * 2,
+                         [server.status for server in polled])
+        self.m.VerifyAll()
+
+    def test_refresh_batched_max_pages(self):
+        self.nova_plugin.server_list_page_size = 2
+        self.nova_plugin.server_list_max_pages = 1
+        manager = mock.Mock()
+        manager.get.side_effect = lambda sid: self._server(sid, 'ACTIVE')
+        polled = [self._server(str(i), 'BUILD', manager) for i in range(3)]
+        self.nova_client.servers.list(marker=None, limit=2).AndReturn(
+            [self._server('0', 'BUILD'), self._server('1', 'ERROR')])
+        self.m.ReplayAll()
+
+        # servers beyond the last page listed are refreshed on their own
+        for server in polled:
+            self.nova_plugin.refresh_server(server)
+        self.assertEqual(['ACTIVE', 'ERROR', 'ACTIVE'],
+                         [server.status for server in polled])
+        self.assertEqual([mock.call('0'), mock.call('2')],
+                         manager.get.call_args_list)
+        self.m.VerifyAll()
+
+    def test_refresh_below_threshold_after_window(self):
+        manager = mock.Mock()
+        manager.get.side_effect = lambda sid: self._server(sid, 'ACTIVE')
+        polled = [self._server(str(i), 'BUILD', manager) for i in range(2)]
+        self.m.ReplayAll()
+
+        self.nova_plugin.refresh_server(polled[0])
+        timeutils.advance_time_seconds(10)
+        self.nova_plugin.refresh_server(polled[1])
+        self.assertEqual([mock.call('0'), mock.call('1')],
+                         manager.get.call_args_list)
+        self.m.VerifyAll()
+
+
+class NovaUtilsFetchServerTests(NovaClientPluginTestCase):
+
+    def setUp(self):
+        super(NovaUtilsFetchServerTests, self).setUp()
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        self.nova_client.servers = self.m.CreateMockAnything()
+
+    def test_fetch_server_reused(self):
+        addresses = {'private': [{'addr': '10.0.0.1', 'version': 4}]}
+        server = servers.Server(None, {'id': '1234', 'addresses': addresses},
+                                loaded=True)
+        self.nova_client.servers.get('1234').AndReturn(server)
+        self.nova_client.servers.get('1234').AndReturn(server)
+        self.m.ReplayAll()
+
+        self.assertIs(server, self.nova_plugin.fetch_server('1234'))
+        self.assertEqual('10.0.0.1',
+                         self.nova_plugin.server_to_ipaddress('1234'))
+
+        timeutils.advance_time_seconds(1)
+        self.assertIs(server, self.nova_plugin.fetch_server('1234'))
+        self.m.VerifyAll()
+
+
 class NovaUtilsUserdataTests(NovaClientPluginTestCase):
 
     def test_build_userdata(self):
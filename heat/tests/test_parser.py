@@ -1047,6 +1047,199 @@ class StackTest(common.HeatTestCase):
                              status_reason='blarg')
         self.assertEqual(1, stack.total_resources())
 
+    def test_total_resources_stored(self):
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'A': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl),
+                             status_reason='blarg')
+        stack.store()
+
+        # nested stacks whose resources have not been stored yet
+        cfn_tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                   'Resources':
+                   {'A': {'Type': 'GenericResourceType'},
+                    'B': {'Type': 'GenericResourceType'},
+                    'C': {'Type': 'GenericResourceType'}}}
+        hot_tpl = {'heat_template_version': '2013-05-23',
+                   'resources':
+                   {'A': {'type': 'GenericResourceType'},
+                    'B': {'type': 'GenericResourceType'}}}
+        child = parser.Stack(self.ctx, 'child', parser.Template(cfn_tpl),
+                             owner_id=stack.id)
+        child.store()
+        for name, owner in (('grandchild1', child), ('grandchild2', child)):
+            parser.Stack(self.ctx, name, parser.Template(hot_tpl),
+                         owner_id=owner.id).store()
+
+        self.patchobject(generic_rsrc.GenericResource, 'nested',
+                         create=True)
+
+        self.assertEqual(8, stack.total_resources())
+        self.assertEqual(7, child.total_resources())
+        self.assertFalse(generic_rsrc.GenericResource.nested.called)
+
+    def test_resource_action_limits_unset(self):
+        stack = parser.Stack(self.ctx, 'test_stack', self.tmpl)
+        self.assertIsNone(stack.resource_action_limits())
+
+    def test_resource_action_limits(self):
+        cfg.CONF.set_override('max_resource_actions_per_stack', 3)
+        cfg.CONF.set_override('max_resource_actions_per_engine', 5)
+        cfg.CONF.set_override('max_resource_actions_per_type',
+                              ['GenericResourceType=2', 'Bogus'])
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'A': {'Type': 'GenericResourceType'},
+                'B': {'Type': 'ResourceWithPropsType'}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+
+        limits = stack.resource_action_limits()
+        a_limits = limits(stack['A'])
+        b_limits = limits(stack['B'])
+        self.assertEqual([3, 5, 2], [l.limit for l in a_limits])
+        self.assertEqual([3, 5], [l.limit for l in b_limits])
+        self.assertIs(a_limits[0], b_limits[0])
+        self.assertIs(a_limits[1], b_limits[1])
+
+        # Per-stack limits are not shared, but engine-wide ones are
+        other_limits = stack.resource_action_limits()(stack['A'])
+        self.assertIsNot(a_limits[0], other_limits[0])
+        self.assertIs(a_limits[1], other_limits[1])
+        self.assertIs(a_limits[2], other_limits[2])
+
+    def test_resource_action_limits_wait_for_signal(self):
+        cfg.CONF.set_override('max_resource_actions_per_stack', 1)
+        cfg.CONF.set_override('max_resource_actions_per_engine', 1)
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'A': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+        self.patchobject(generic_rsrc.GenericResource, 'waits_for_signal',
+                         new=True)
+
+        self.assertEqual([], stack.resource_action_limits()(stack['A']))
+
+    def test_create_resource_action_limits(self):
+        cfg.CONF.set_override('max_resource_actions_per_stack', 1)
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'A': {'Type': 'GenericResourceType'},
+                'B': {'Type': 'GenericResourceType'},
+                'C': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+        stack.store()
+        stack.create()
+
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.COMPLETE),
+                         stack.state)
+        for res in stack.values():
+            self.assertEqual((res.CREATE, res.COMPLETE), res.state)
+
+    def test_reset_resource_attributes_dependents(self):
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'A': {'Type': 'GenericResourceType',
+                      'DependsOn': 'D'},
+                'B': {'Type': 'GenericResourceType',
+                      'DependsOn': 'A'},
+                'C': {'Type': 'GenericResourceType'},
+                'D': {'Type': 'GenericResourceType',
+                      'DependsOn': 'F'},
+                'E': {'Type': 'GenericResourceType',
+                      'DependsOn': 'D'},
+                'F': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+        stack.store()
+        stack.create()
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.COMPLETE),
+                         stack.state)
+
+        for res in stack.values():
+            self.assertEqual(res.name, res.attributes['foo'])
+
+        stack['A'].state_set(stack['A'].CHECK, stack['A'].COMPLETE)
+
+        # the changed resource, the resources it requires and those
+        # depending on any of them are reset
+        for name in ('A', 'B', 'D', 'E'):
+            self.assertEqual({}, stack[name].attributes._resolved_values)
+        self.assertEqual({'foo': 'C'}, stack['C'].attributes._resolved_values)
+        self.assertEqual({'foo': 'F'}, stack['F'].attributes._resolved_values)
+
+        stack.reset_resource_attributes()
+        self.assertEqual({}, stack['C'].attributes._resolved_values)
+
+    def test_metadata_dependents(self):
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'Handle': {'Type': 'GenericResourceType'},
+                'Wait': {'Type': 'ResourceWithPropsType',
+                         'Properties': {'Foo': {'Ref': 'Handle'}}},
+                'A': {'Type': 'GenericResourceType',
+                      'Metadata': {'data': {'Fn::GetAtt': ['Wait', 'foo']}}},
+                'B': {'Type': 'GenericResourceType',
+                      'Metadata': {'handle': {'Ref': 'Handle'}}},
+                'C': {'Type': 'GenericResourceType',
+                      'Metadata': {'foo': 'bar'}}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+
+        self.assertEqual(set(['A', 'B']),
+                         set(r.name for r in
+                             stack.metadata_dependents('Handle')))
+        self.assertEqual(['A'],
+                         [r.name for r in stack.metadata_dependents('Wait')])
+        self.assertEqual([], stack.metadata_dependents('A'))
+        self.assertEqual([], stack.metadata_dependents('C'))
+
+    def test_prepare_reuse(self):
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'A': {'Type': 'ResourceWithPropsType',
+                      'Properties': {'Foo': 'abc'}}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+        self.assertEqual('abc', stack['A'].properties['Foo'])
+
+        ctx = utils.dummy_context()
+        stack.prepare_reuse(ctx)
+
+        self.assertIs(ctx, stack.context)
+        self.assertIs(ctx, stack['A'].context)
+        self.assertIs(ctx, stack['A'].properties.context)
+        self.assertIs(ctx, stack['A'].properties.props['Foo'].context)
+        self.assertEqual('abc', stack['A'].properties['Foo'])
+
+    def test_resource_index(self):
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources':
+               {'A': {'Type': 'ResourceWithPropsType',
+                      'Properties': {'Foo': 'abc'}},
+                'B': {'Type': 'ResourceWithPropsType',
+                      'Properties': {'Foo': 'abc'}},
+                'C': {'Type': 'ResourceWithPropsType',
+                      'Properties': {'Foo': 'xyz'}},
+                'D': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+
+        def foo_key(res):
+            return res.properties['Foo']
+
+        self.assertEqual(set(['A', 'B', 'C']),
+                         set(r.name for r in stack.resources_with_interface(
+                             'ResourceWithPropsType')))
+        index = stack.resource_index('ResourceWithPropsType', foo_key)
+        self.assertEqual(set(['abc', 'xyz']), set(index))
+        self.assertEqual(set(['A', 'B']), set(r.name for r in index['abc']))
+        self.assertEqual(['C'], [r.name for r in index['xyz']])
+        self.assertIs(index,
+                      stack.resource_index('ResourceWithPropsType', foo_key))
+
+        # the indexes are discarded once the dependencies are calculated
+        stack.dependencies
+        self.assertIsNot(index,
+                         stack.resource_index('ResourceWithPropsType',
+                                              foo_key))
+
     def _setup_nested(self, name):
         nested_tpl = ('{"HeatTemplateFormatVersion" : "2012-12-12",'
                       '"Resources":{'
@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo.config import cfg
 import six
 import testtools
 
@@ -1046,6 +1047,63 @@ class PropertiesTest(testtools.TestCase):
         props = properties.Properties(schema, {'foo': None})
         self.assertEqual(['one', 'two'], props['foo'])
 
+    def _counting_props(self, schema, data):
+        self.resolved = []
+
+        def resolver(value):
+            self.resolved.append(value)
+            return value
+
+        return properties.Properties(schema, data, resolver)
+
+    def test_memoized(self):
+        schema = {'foo': {'Type': 'String'}, 'bar': {'Type': 'Integer'}}
+        props = self._counting_props(schema, {'foo': 'baz', 'bar': 1})
+
+        with props.memoized():
+            self.assertEqual('baz', props['foo'])
+            self.assertEqual('baz', props['foo'])
+            self.assertEqual(1, props['bar'])
+            with props.memoized():
+                self.assertEqual('baz', props['foo'])
+            self.assertEqual('baz', props['foo'])
+        self.assertEqual(['baz', 1], self.resolved)
+
+        self.assertEqual('baz', props['foo'])
+        self.assertEqual(['baz', 1, 'baz'], self.resolved)
+
+    def test_memoized_validate(self):
+        schema = {'foo': {'Type': 'String'}}
+        props = self._counting_props(schema, {'foo': 'baz'})
+
+        with props.memoized():
+            props.validate()
+            self.assertEqual('baz', props['foo'])
+            props.validate()
+        self.assertEqual(['baz', 'baz'], self.resolved)
+
+    def test_memoized_copies(self):
+        schema = {'foo': {'Type': 'List'}}
+        props = self._counting_props(schema, {'foo': ['a']})
+
+        with props.memoized():
+            props['foo'].append('b')
+            props['foo'].append('c')
+            self.assertEqual(['a'], props['foo'])
+        self.assertEqual(1, len(self.resolved))
+
+    def test_memoized_verify_stale(self):
+        cfg.CONF.set_override('verify_memoized_properties', True)
+        self.addCleanup(cfg.CONF.clear_override, 'verify_memoized_properties')
+        schema = {'foo': {'Type': 'String'}}
+        data = {'foo': 'baz'}
+        props = properties.Properties(schema, data)
+
+        with props.memoized():
+            self.assertEqual('baz', props['foo'])
+            data['foo'] = 'quux'
+            self.assertEqual('quux', props['foo'])
+
     def test_bad_resolver(self):
         schema = {'foo': {'Type': 'String', 'Default': 'bar'}}
 
@@ -18,6 +18,7 @@ import uuid
 import yaml
 
 import mock
+from oslo.config import cfg
 
 from heat.common import exception
 from heat.common.i18n import _
@@ -1100,3 +1101,76 @@ Outputs:
                          stack.output('value'))
 
         self.m.VerifyAll()
+
+
+class ParsedTemplateCacheTest(common.HeatTestCase):
+
+    provider = {
+        'HeatTemplateFormatVersion': '2012-12-12',
+        'Parameters': {
+            'Foo': {'Type': 'String', 'Default': 'bar'},
+        },
+        'Outputs': {
+            'Blarg': {'Value': 'wibble'},
+        },
+    }
+
+    def setUp(self):
+        super(ParsedTemplateCacheTest, self).setUp()
+        template_resource._parsed_templates.clear()
+        self.addCleanup(template_resource._parsed_templates.clear)
+        self.patchobject(template_resource.template_format, 'parse',
+                         wraps=template_format.parse)
+
+    def _create_resource(self, name, files):
+        env = environment.Environment()
+        env.load({'resource_registry':
+                  {'DummyResource': 'test_resource.template'}})
+        stack = parser.Stack(utils.dummy_context(), 'test_stack',
+                             parser.Template(empty_template, files=files),
+                             env=env,
+                             stack_id=str(uuid.uuid4()))
+        definition = rsrc_defn.ResourceDefinition(name, "DummyResource")
+        return template_resource.TemplateResource(name, definition, stack)
+
+    def test_parsed_once(self):
+        files = {'test_resource.template': json.dumps(self.provider)}
+        res1 = self._create_resource('test_t_res1', dict(files))
+        res2 = self._create_resource('test_t_res2', dict(files))
+        res2.implementation_signature()
+
+        self.assertEqual(1, template_resource.template_format.parse.call_count)
+        self.assertIn('Foo', res1.properties_schema)
+        self.assertIn('Blarg', res2.attributes_schema)
+        self.assertIsNot(res1.properties_schema, res2.properties_schema)
+
+        # each resource gets its own copy of the parsed template
+        child1 = res1.child_template()
+        child1['Outputs'].clear()
+        self.assertEqual(self.provider, res2.child_template())
+
+    def test_changed_template_parsed(self):
+        files = {'test_resource.template': json.dumps(self.provider)}
+        self._create_resource('test_t_res1', files)
+        provider = dict(self.provider, Outputs={})
+        files = {'test_resource.template': json.dumps(provider)}
+        res2 = self._create_resource('test_t_res2', files)
+
+        self.assertEqual(2, template_resource.template_format.parse.call_count)
+        self.assertEqual({}, res2.attributes_schema)
+
+    def test_cache_size_limit(self):
+        data = json.dumps(self.provider)
+        cfg.CONF.set_override('max_template_cache_size', len(data))
+
+        self._create_resource('test_t_res1',
+                              {'test_resource.template': data})
+        self.assertEqual(1, len(template_resource._parsed_templates))
+        provider = dict(self.provider, Outputs={})
+        self._create_resource('test_t_res2', {'test_resource.template':
+                                              json.dumps(provider)})
+        self.assertEqual(1, len(template_resource._parsed_templates))
+        self._create_resource('test_t_res3',
+                              {'test_resource.template': data})
+
+        self.assertEqual(3, template_resource.template_format.parse.call_count)
@@ -29,6 +29,7 @@ from heat.engine.cfn import functions as cfn_funcs
 from heat.engine import dependencies
 from heat.engine import environment
 from heat.engine import parser
+from heat.engine import properties
 from heat.engine import resource
 from heat.engine import resources
 from heat.engine import rsrc_defn
@@ -540,6 +541,27 @@ class ResourceTest(common.HeatTestCase):
         self.assertIn(estr, six.text_type(err))
         self.assertEqual((res.CREATE, res.FAILED), res.state)
 
+    def test_create_properties_memoized(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo',
+                                            {'Foo': 'abc'})
+        res = generic_rsrc.ResourceWithProps('test_resource', tmpl, self.stack)
+        get_value = self.patchobject(properties.Property, 'get_value',
+                                     autospec=True,
+                                     side_effect=properties.Property.get_value)
+
+        def handle_create():
+            self.assertEqual('abc', res.properties['Foo'])
+            self.assertEqual('abc', res.properties['Foo'])
+
+        self.patchobject(res, 'handle_create', side_effect=handle_create)
+        scheduler.TaskRunner(res.create)()
+
+        self.assertEqual((res.CREATE, res.COMPLETE), res.state)
+        # resolved once for the events and once more to validate
+        self.assertEqual(2, get_value.call_count)
+        self.assertEqual('abc', res.properties['Foo'])
+        self.assertEqual(3, get_value.call_count)
+
     def test_create_fail_metadata_parse_error(self):
         rname = 'test_resource'
         get_att = cfn_funcs.GetAtt(self.stack, 'Fn::GetAtt',
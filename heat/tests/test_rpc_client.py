@@ -120,6 +120,7 @@ class EngineRpcAPITestCase(testtools.TestCase):
             'tenant_safe': mock.ANY,
             'show_deleted': mock.ANY,
             'show_nested': mock.ANY,
+            'summary': mock.ANY,
         }
         self._test_engine_api('list_stacks', 'call', **default_args)
 
@@ -211,6 +212,13 @@ class EngineRpcAPITestCase(testtools.TestCase):
                               resource_name='LogicalResourceId',
                               with_attr=None)
 
+    def test_describe_stack_resource_metadata(self):
+        self._test_engine_api('describe_stack_resource_metadata', 'call',
+                              stack_identity=self.identity,
+                              resource_name='LogicalResourceId',
+                              etag='abc123',
+                              version='1.4')
+
     def test_find_physical_resource(self):
         self._test_engine_api('find_physical_resource', 'call',
                               physical_resource_id=u'404d-a85b-5315293e67de')
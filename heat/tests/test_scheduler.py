@@ -14,6 +14,7 @@
 import contextlib
 
 import eventlet
+from oslo.config import cfg
 
 from heat.engine import dependencies
 from heat.engine import scheduler
@@ -440,6 +441,130 @@ class DependencyTaskGroupTest(common.HeatTestCase):
         self.assertEqual(e1, exc)
 
 
+class ConcurrencyLimitTest(common.HeatTestCase):
+
+    def test_limit(self):
+        limit = scheduler.ConcurrencyLimit(2)
+        self.assertTrue(limit.acquire())
+        self.assertTrue(limit.acquire())
+        self.assertFalse(limit.acquire())
+        limit.release()
+        self.assertTrue(limit.acquire())
+        self.assertEqual(2, limit.running)
+
+    def test_unlimited(self):
+        limit = scheduler.ConcurrencyLimit()
+        for i in range(100):
+            self.assertTrue(limit.acquire())
+        self.assertEqual(100, limit.running)
+
+    def test_available(self):
+        limit = scheduler.ConcurrencyLimit(1)
+        self.assertTrue(limit.available())
+        limit.acquire()
+        self.assertFalse(limit.available())
+        limit.release()
+        self.assertTrue(limit.available())
+
+
+class DependencyTaskGroupLimitTest(common.HeatTestCase):
+
+    def _run(self, deps, limits, num_steps=2):
+        events = []
+
+        def task(key):
+            events.append(('start', key))
+            for i in range(num_steps - 1):
+                yield
+            events.append(('end', key))
+
+        tg = scheduler.DependencyTaskGroup(deps, task, limits=limits)
+        scheduler.TaskRunner(tg)(wait_time=None)
+        return events
+
+    def test_limit(self):
+        limit = scheduler.ConcurrencyLimit(2)
+        deps = dependencies.Dependencies([(str(i), None) for i in range(5)])
+        events = self._run(deps, lambda k: [limit])
+
+        running = 0
+        for event, key in events:
+            running += 1 if event == 'start' else -1
+            self.assertTrue(running <= 2)
+        self.assertEqual(10, len(events))
+        self.assertEqual(0, limit.running)
+
+    def test_shared_limit(self):
+        shared = scheduler.ConcurrencyLimit(1)
+        shared.acquire()
+        deps = dependencies.Dependencies([('a', None)])
+
+        tg = scheduler.DependencyTaskGroup(deps, lambda k: None,
+                                           limits=lambda k: [shared])
+        runner = scheduler.TaskRunner(tg)
+        runner.start()
+        self.assertFalse(runner.step())
+        self.assertFalse(runner.step())
+
+        shared.release()
+        self.assertFalse(runner.step())
+        self.assertEqual(1, shared.running)
+        self.assertTrue(runner.step())
+        self.assertEqual(0, shared.running)
+
+    def test_blocked_not_retried_until_released(self):
+        limit = scheduler.ConcurrencyLimit(1)
+        deps = dependencies.Dependencies([(str(i), None) for i in range(3)])
+        calls = []
+
+        def limits(key):
+            calls.append(key)
+            return [limit]
+
+        events = self._run(deps, limits, num_steps=5)
+
+        self.assertEqual(6, len(events))
+        # each blocked subtask is retried only when a slot has been freed
+        self.assertEqual(6, len(calls))
+
+    def test_critical_path_first(self):
+        limit = scheduler.ConcurrencyLimit(1)
+        deps = dependencies.Dependencies([('short', None),
+                                          ('long3', 'long2'),
+                                          ('long2', 'long1')])
+        events = self._run(deps, lambda k: [limit], num_steps=1)
+
+        self.assertEqual([('start', 'long1'), ('end', 'long1')], events[:2])
+
+    def test_limits_released_on_error(self):
+        limit = scheduler.ConcurrencyLimit(5)
+
+        def task(key):
+            if key == 'fail':
+                raise ValueError()
+            yield
+
+        deps = dependencies.Dependencies([('fail', None), ('ok', None),
+                                          ('after', 'fail')])
+        tg = scheduler.DependencyTaskGroup(deps, task,
+                                           limits=lambda k: [limit])
+        self.assertRaises(ValueError,
+                          scheduler.TaskRunner(tg), wait_time=None)
+        self.assertEqual(0, limit.running)
+
+    def test_limits_released_on_cancel(self):
+        limit = scheduler.ConcurrencyLimit(5)
+        deps = dependencies.Dependencies([('a', None), ('b', None)])
+        tg = scheduler.DependencyTaskGroup(deps, DummyTask(),
+                                           limits=lambda k: [limit])
+        runner = scheduler.TaskRunner(tg)
+        runner.start()
+        self.assertEqual(2, limit.running)
+
+        runner.cancel()
+        self.assertEqual(0, limit.running)
+
+
 class TaskTest(common.HeatTestCase):
 
     def setUp(self):
@@ -906,6 +1031,124 @@ class TimeoutTest(common.HeatTestCase):
         self.assertNotEqual(earlier, later)
 
 
+class WakeupHintTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(WakeupHintTest, self).setUp()
+        self.addCleanup(self.m.VerifyAll)
+
+    def _stub_wallclock(self, now):
+        self.m.StubOutWithMock(scheduler, 'wallclock')
+        scheduler.wallclock().MultipleTimes().AndReturn(now)
+
+    def test_earliest(self):
+        self._stub_wallclock(100)
+        self.m.ReplayAll()
+
+        event = eventlet.event.Event()
+        hint = scheduler.WakeupHint.earliest([
+            scheduler.WakeupHint(deadline=110),
+            scheduler.WakeupHint(deadline=105),
+            scheduler.WakeupHint(events=[event])])
+
+        self.assertEqual(105, hint.deadline)
+        self.assertEqual([event], hint.events)
+        self.assertEqual(5, hint.remaining())
+        self.assertFalse(hint.ready())
+
+        event.send()
+        self.assertTrue(hint.ready())
+
+    def test_earliest_none(self):
+        self.assertIsNone(scheduler.WakeupHint.earliest([]))
+        self.assertIsNone(scheduler.WakeupHint.earliest(
+            [scheduler.WakeupHint(deadline=105), None]))
+
+    def test_run_deadline(self):
+        def task():
+            yield scheduler.WakeupHint(deadline=105)
+            yield scheduler.WakeupHint.after(3)
+
+        self._stub_wallclock(100)
+        self.m.StubOutWithMock(scheduler.TaskRunner, '_sleep')
+        scheduler.TaskRunner._sleep(5).AndReturn(None)
+        scheduler.TaskRunner._sleep(3).AndReturn(None)
+        self.m.ReplayAll()
+
+        scheduler.TaskRunner(task)()
+
+    def test_run_deadline_timeout(self):
+        def task():
+            yield scheduler.WakeupHint(deadline=160)
+            yield scheduler.WakeupHint(deadline=160)
+
+        self._stub_wallclock(100)
+        self.m.StubOutWithMock(scheduler.TaskRunner, '_sleep')
+        scheduler.TaskRunner._sleep(30).AndReturn(None)
+        self.m.ReplayAll()
+
+        runner = scheduler.TaskRunner(task)
+        runner.start(timeout=30)
+        self.assertFalse(runner.due())
+        runner.run_to_completion()
+
+    def test_run_event(self):
+        event = eventlet.event.Event()
+        results = []
+
+        def task():
+            yield event
+            results.append(event.ready())
+
+        self.m.StubOutWithMock(scheduler.TaskRunner, '_sleep')
+        self.m.ReplayAll()
+
+        eventlet.spawn_after(0.01, event.send)
+        scheduler.ENABLE_SLEEP = True
+        scheduler.TaskRunner(task)(wait_time=60)
+        self.assertEqual([True], results)
+
+    def test_backoff(self):
+        self._stub_wallclock(0)
+        self.m.StubOutWithMock(scheduler.TaskRunner, '_sleep')
+        scheduler.TaskRunner._sleep(0.1).AndReturn(None)
+        scheduler.TaskRunner._sleep(0.2).AndReturn(None)
+        scheduler.TaskRunner._sleep(0.3).AndReturn(None)
+        scheduler.TaskRunner._sleep(0.3).AndReturn(None)
+        self.m.ReplayAll()
+
+        cfg.CONF.set_override('min_task_wait_time', 0.1)
+        scheduler.TaskRunner(DummyTask(4))(wait_time=0.3)
+
+    def test_dependency_group(self):
+        steps = []
+
+        def task(key):
+            steps.append((key, 1))
+            yield scheduler.WakeupHint(deadline=100 + int(key))
+            steps.append((key, 2))
+
+        deps = dependencies.Dependencies([('1', None), ('5', None)])
+        tg = scheduler.DependencyTaskGroup(deps, task)
+
+        self._stub_wallclock(100)
+        self.m.ReplayAll()
+
+        runner = scheduler.TaskRunner(tg)
+        runner.start()
+        self.assertEqual(101, runner.wakeup_hint().deadline)
+        self.assertFalse(runner.due())
+
+        self.m.UnsetStubs()
+        self._stub_wallclock(102)
+        self.m.ReplayAll()
+
+        self.assertTrue(runner.due())
+        self.assertFalse(runner.step())
+        self.assertIn(('1', 2), steps)
+        self.assertNotIn(('5', 2), steps)
+
+
 class DescriptionTest(common.HeatTestCase):
 
     def setUp(self):
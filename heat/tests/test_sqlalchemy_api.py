@@ -18,12 +18,14 @@ import uuid
 
 import mock
 import mox
+from oslo.config import cfg
 from oslo.utils import timeutils
 
 from heat.common import context
 from heat.common import exception
 from heat.common import template_format
 from heat.db.sqlalchemy import api as db_api
+from heat.db.sqlalchemy import models
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import nova
 from heat.engine import environment
@@ -1245,6 +1247,38 @@ class DBAPIRawTemplateTest(common.HeatTestCase):
         self.assertEqual(new_t, updated_tp.template)
         self.assertEqual(new_files, updated_tp.files)
 
+    def test_raw_template_content_shared(self):
+        tp1 = create_raw_template(self.ctx)
+        tp2 = create_raw_template(self.ctx)
+        self.assertNotEqual(tp1.id, tp2.id)
+        self.assertEqual(tp1.template_blob_id, tp2.template_blob_id)
+        self.assertEqual(tp1.files_blob_id, tp2.files_blob_id)
+        self.assertNotEqual(tp1.template_blob_id, tp1.files_blob_id)
+
+        # changing a copy of the content does not change the stored blob
+        t = tp1.template
+        t['Description'] = 'changed'
+        self.assertNotEqual(t, tp2.template)
+
+        updated_tp = db_api.raw_template_update(self.ctx, tp1.id,
+                                                {'template': t})
+        self.assertEqual(t, updated_tp.template)
+        self.assertNotEqual(tp2.template_blob_id,
+                            updated_tp.template_blob_id)
+        self.assertNotEqual(t, db_api.raw_template_get(self.ctx,
+                                                       tp2.id).template)
+
+    def test_raw_template_legacy_content(self):
+        t = template_format.parse(wp_template)
+        tp = models.RawTemplate()
+        tp.update({'_template': t, '_files': {'foo': 'bar'}})
+        tp.save(self.ctx.session)
+
+        template = db_api.raw_template_get(self.ctx, tp.id)
+        self.assertIsNone(template.template_blob_id)
+        self.assertEqual(t, template.template)
+        self.assertEqual({'foo': 'bar'}, template.files)
+
 
 class DBAPIUserCredsTest(common.HeatTestCase):
     def setUp(self):
@@ -1361,6 +1395,14 @@ class DBAPIStackTest(common.HeatTestCase):
         self.assertRaises(exception.NotFound, db_api.stack_update, self.ctx,
                           UUID2, values)
 
+    def test_stack_update_increments_version(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        self.assertEqual(0, stack.version)
+
+        db_api.stack_update(self.ctx, stack.id, {'status': 'failed'})
+        stack = db_api.stack_get(self.ctx, stack.id)
+        self.assertEqual(1, stack.version)
+
     def test_stack_get_returns_a_stack(self):
         stack = create_stack(self.ctx, self.template, self.user_creds)
         ret_stack = db_api.stack_get(self.ctx, stack.id, show_deleted=False)
@@ -1441,6 +1483,29 @@ class DBAPIStackTest(common.HeatTestCase):
                                                            parent_stack2.id)
         self.assertEqual(2, len(stack2_children))
 
+    def test_stack_count_nested_resources(self):
+        def create_nested(num_resources, owner, backup=False):
+            return create_stack(self.ctx, self.template, self.user_creds,
+                                owner_id=owner.id, backup=backup,
+                                num_resources=num_resources)
+
+        root = create_stack(self.ctx, self.template, self.user_creds)
+        child1 = create_nested(1, root)
+        create_nested(1, root)
+        grandchild = create_nested(2, child1)
+        create_nested(4, root, backup=True)
+        deleted = create_nested(8, root)
+        db_api.stack_delete(self.ctx, deleted.id)
+        create_nested(16, create_stack(self.ctx, self.template,
+                                       self.user_creds))
+
+        self.assertEqual(
+            4, db_api.stack_count_nested_resources(self.ctx, root.id))
+        self.assertEqual(
+            2, db_api.stack_count_nested_resources(self.ctx, child1.id))
+        self.assertEqual(
+            0, db_api.stack_count_nested_resources(self.ctx, grandchild.id))
+
     def test_stack_get_all_with_regular_tenant(self):
         values = [
             {'tenant': UUID1},
@@ -1533,6 +1598,59 @@ class DBAPIStackTest(common.HeatTestCase):
         self._deleted_stack_existance(utils.dummy_context(), stacks,
                                       (), (0, 1, 2, 3, 4))
 
+    def test_purge_deleted_shared_template_content(self):
+        now = datetime.datetime.now()
+        deleted = now - datetime.timedelta(days=2)
+        tmpl1 = create_raw_template(self.ctx)
+        tmpl2 = create_raw_template(self.ctx)
+        tmpl3 = create_raw_template(self.ctx, files={})
+        create_stack(self.ctx, tmpl1, self.user_creds, deleted_at=deleted)
+        create_stack(self.ctx, tmpl2, self.user_creds)
+        create_stack(self.ctx, tmpl3, self.user_creds, deleted_at=deleted)
+        self.ctx.session.query(models.TemplateBlob).update(
+            {'created_at': deleted, 'updated_at': deleted})
+
+        db_api.purge_deleted(age=1, granularity='days')
+
+        # the content still used by the remaining template is kept
+        blob_ids = set(b.id for b in
+                       self.ctx.session.query(models.TemplateBlob))
+        self.assertEqual(set([tmpl2.template_blob_id, tmpl2.files_blob_id]),
+                         blob_ids)
+
+    def test_purge_deleted_recent_template_content(self):
+        deleted = datetime.datetime.now() - datetime.timedelta(days=2)
+        tmpl = create_raw_template(self.ctx)
+        create_stack(self.ctx, tmpl, self.user_creds, deleted_at=deleted)
+
+        db_api.purge_deleted(age=1, granularity='days')
+
+        # unreferenced content stored within the purge age may be about to
+        # be reused by another engine, so it is kept
+        blob_ids = set(b.id for b in
+                       self.ctx.session.query(models.TemplateBlob))
+        self.assertEqual(set([tmpl.template_blob_id, tmpl.files_blob_id]),
+                         blob_ids)
+
+    def test_purge_deleted_reused_template_content(self):
+        deleted = datetime.datetime.now() - datetime.timedelta(days=2)
+        tmpl = create_raw_template(self.ctx, template={'reused': True},
+                                   files={'unused': ''})
+        create_stack(self.ctx, tmpl, self.user_creds, deleted_at=deleted)
+        self.ctx.session.query(models.TemplateBlob).update(
+            {'created_at': deleted, 'updated_at': deleted})
+
+        # content stored long ago is reused by a new template
+        reused = db_api._template_blob_get_or_create(self.ctx,
+                                                     tmpl.template)
+        self.assertEqual(tmpl.template_blob_id, reused.id)
+        db_api.purge_deleted(age=1, granularity='days')
+
+        blob_ids = set(b.id for b in
+                       self.ctx.session.query(models.TemplateBlob))
+        self.assertIn(tmpl.template_blob_id, blob_ids)
+        self.assertNotIn(tmpl.files_blob_id, blob_ids)
+
     def _deleted_stack_existance(self, ctx, stacks, existing, deleted):
         for s in existing:
             self.assertIsNotNone(db_api.stack_get(ctx, stacks[s].id,
@@ -1575,6 +1693,59 @@ class DBAPIResourceTest(common.HeatTestCase):
         self.assertRaises(exception.NotFound, db_api.resource_get,
                           self.ctx, UUID2)
 
+    def test_resource_update_batch(self):
+        res1 = create_resource(self.ctx, self.stack, name='res1')
+        res2 = create_resource(self.ctx, self.stack, name='res2')
+
+        db_api.resource_update_batch(self.ctx, {
+            res1.id: {'status': 'failed', 'status_reason': 'boom'},
+            res2.id: {'nova_instance': UUID2},
+        })
+
+        ret_res1 = db_api.resource_get(self.ctx, res1.id)
+        self.assertEqual('failed', ret_res1.status)
+        self.assertEqual('boom', ret_res1.status_reason)
+        self.assertEqual(UUID1, ret_res1.nova_instance)
+        ret_res2 = db_api.resource_get(self.ctx, res2.id)
+        self.assertEqual('complete', ret_res2.status)
+        self.assertEqual(UUID2, ret_res2.nova_instance)
+
+    def _stack_version(self):
+        self.ctx.session.expire_all()
+        return db_api.stack_get(self.ctx, self.stack.id).version
+
+    def test_resource_changes_increment_stack_version(self):
+        version = self._stack_version()
+
+        res = create_resource(self.ctx, self.stack)
+        self.assertEqual(version + 1, self._stack_version())
+
+        res.update_and_save({'status': 'failed'})
+        self.assertEqual(version + 2, self._stack_version())
+
+        db_api.resource_update_batch(self.ctx, {res.id: {'status': 'ok'}})
+        self.assertEqual(version + 3, self._stack_version())
+
+        res.context = self.ctx
+        create_resource_data(self.ctx, res)
+        self.assertEqual(version + 4, self._stack_version())
+
+    def test_resource_changes_increment_stack_version_once(self):
+        res1 = create_resource(self.ctx, self.stack, name='res1')
+        res2 = create_resource(self.ctx, self.stack, name='res2')
+        version = self._stack_version()
+
+        session = self.ctx.session
+        with session.begin():
+            res1.status = 'failed'
+            res2.status = 'failed'
+        self.assertEqual(version + 1, self._stack_version())
+
+        # flushing unchanged resources does not change the stack
+        with session.begin():
+            session.add(res1)
+        self.assertEqual(version + 1, self._stack_version())
+
     def test_resource_get_by_name_and_stack(self):
         create_resource(self.ctx, self.stack)
 
@@ -1863,6 +2034,105 @@ class DBAPIEventTest(common.HeatTestCase):
         self.assertEqual(1, db_api.event_count_all_by_stack(self.ctx,
                                                             self.stack2.id))
 
+    def test_event_create_batch(self):
+        self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        values = [
+            {'stack_id': self.stack1.id, 'resource_name': 'res%d' % i,
+             'resource_action': 'create', 'resource_status': 'complete'}
+            for i in range(3)]
+
+        events = db_api.event_create_batch(self.ctx, values)
+
+        self.assertEqual(3, len(events))
+        ret_events = db_api.event_get_all_by_stack(self.ctx, self.stack1.id)
+        self.assertEqual(['res0', 'res1', 'res2'],
+                         sorted(e.resource_name for e in ret_events))
+
+    def test_event_create_batch_prunes(self):
+        cfg.CONF.set_override('max_events_per_stack', 5)
+        cfg.CONF.set_override('event_purge_batch_size', 1)
+        self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        for i in range(4):
+            create_event(self.ctx, stack_id=self.stack1.id,
+                         resource_name='old%d' % i)
+
+        db_api.event_create_batch(self.ctx, [
+            {'stack_id': self.stack1.id, 'resource_name': 'new%d' % i}
+            for i in range(3)])
+
+        ret_events = db_api.event_get_all_by_stack(self.ctx, self.stack1.id)
+        self.assertEqual(['new0', 'new1', 'new2', 'old2', 'old3'],
+                         sorted(e.resource_name for e in ret_events))
+
+    def test_event_create_counts_amortized(self):
+        cfg.CONF.set_override('max_events_per_stack', 10)
+        cfg.CONF.set_override('event_purge_batch_size', 4)
+        self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        self.addCleanup(db_api._event_counts.pop, self.stack1.id, None)
+        count = self.patchobject(db_api, 'event_count_all_by_stack',
+                                 wraps=db_api.event_count_all_by_stack)
+
+        for i in range(10):
+            create_event(self.ctx, stack_id=self.stack1.id,
+                         resource_name='res%d' % i)
+        self.assertEqual(1, count.call_count)
+
+        create_event(self.ctx, stack_id=self.stack1.id,
+                     resource_name='res10')
+        self.assertEqual(2, count.call_count)
+        ret_events = db_api.event_get_all_by_stack(self.ctx, self.stack1.id)
+        self.assertEqual(7, len(ret_events))
+        self.assertNotIn('res3', [e.resource_name for e in ret_events])
+
+        for i in range(11, 14):
+            create_event(self.ctx, stack_id=self.stack1.id,
+                         resource_name='res%d' % i)
+        self.assertEqual(2, count.call_count)
+        self.assertEqual(10, len(db_api.event_get_all_by_stack(
+            self.ctx, self.stack1.id)))
+
+    def test_event_create_counts_other_writers(self):
+        cfg.CONF.set_override('max_events_per_stack', 3)
+        cfg.CONF.set_override('event_purge_batch_size', 1)
+        self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        self.addCleanup(db_api._event_counts.pop, self.stack1.id, None)
+        create_event(self.ctx, stack_id=self.stack1.id, resource_name='a')
+        # Simulate an event written by another engine
+        self._create_event_elsewhere(resource_name='b')
+        create_event(self.ctx, stack_id=self.stack1.id, resource_name='c')
+        create_event(self.ctx, stack_id=self.stack1.id, resource_name='d')
+        self.assertEqual(4, db_api.event_count_all_by_stack(self.ctx,
+                                                            self.stack1.id))
+        create_event(self.ctx, stack_id=self.stack1.id, resource_name='e')
+
+        ret_events = db_api.event_get_all_by_stack(self.ctx, self.stack1.id)
+        self.assertEqual(['c', 'd', 'e'],
+                         sorted(e.resource_name for e in ret_events))
+
+    def test_event_create_counts_recounted(self):
+        cfg.CONF.set_override('max_events_per_stack', 3)
+        cfg.CONF.set_override('event_purge_batch_size', 1)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        self.addCleanup(db_api._event_counts.pop, self.stack1.id, None)
+        create_event(self.ctx, stack_id=self.stack1.id, resource_name='a')
+        for name in ('b', 'c', 'd'):
+            self._create_event_elsewhere(resource_name=name)
+
+        # the estimate is seeded from the real count again once it is old
+        timeutils.advance_time_seconds(db_api._EVENT_COUNTS_MAX_AGE)
+        create_event(self.ctx, stack_id=self.stack1.id, resource_name='e')
+        ret_events = db_api.event_get_all_by_stack(self.ctx, self.stack1.id)
+        self.assertEqual(['c', 'd', 'e'],
+                         sorted(e.resource_name for e in ret_events))
+        self.assertEqual((3, timeutils.utcnow_ts()),
+                         db_api._event_counts[self.stack1.id])
+
+    def _create_event_elsewhere(self, **kwargs):
+        event = models.Event(stack_id=self.stack1.id, **kwargs)
+        event.save(self.ctx.session)
+
     def test_event_resource_status_reason_truncate(self):
         event = create_event(self.ctx, resource_status_reason='a' * 1024)
         ret_event = db_api.event_get(self.ctx, event.id)
@@ -1906,6 +2176,18 @@ class DBAPIWatchRuleTest(common.HeatTestCase):
         names = [wr.name for wr in wrs]
         [self.assertIn(val['name'], names) for val in values]
 
+    def test_watch_rule_get_all_exclude_states(self):
+        values = [
+            {'name': 'rule1', 'state': 'NORMAL'},
+            {'name': 'rule2', 'state': 'SUSPENDED'},
+            {'name': 'rule3', 'state': 'ALARM'},
+        ]
+        [create_watch_rule(self.ctx, self.stack, **val) for val in values]
+
+        wrs = db_api.watch_rule_get_all(self.ctx,
+                                        exclude_states=('SUSPENDED',))
+        self.assertEqual(['rule1', 'rule3'], sorted(wr.name for wr in wrs))
+
     def test_watch_rule_get_all_by_stack(self):
         self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
 
@@ -1978,3 +2260,43 @@ class DBAPIWatchDataTest(common.HeatTestCase):
 
         data = [wd.data for wd in watch_data]
         [self.assertIn(val['data'], data) for val in values]
+
+    def test_watch_data_get_all_by_watch_rule(self):
+        now = timeutils.utcnow()
+        other_rule = create_watch_rule(self.ctx, self.stack, name='other')
+        create_watch_data(self.ctx, other_rule, created_at=now)
+        for age in (30, 20, 10):
+            create_watch_data(self.ctx, self.watch_rule,
+                              data={'age': age},
+                              created_at=now - datetime.timedelta(
+                                  seconds=age))
+
+        watch_data = db_api.watch_data_get_all_by_watch_rule(
+            self.ctx, self.watch_rule.id)
+        self.assertEqual([30, 20, 10], [wd.data['age'] for wd in watch_data])
+
+        watch_data = db_api.watch_data_get_all_by_watch_rule(
+            self.ctx, self.watch_rule.id,
+            since=now - datetime.timedelta(seconds=20))
+        self.assertEqual([20, 10], [wd.data['age'] for wd in watch_data])
+
+    def test_watch_data_delete_before(self):
+        now = timeutils.utcnow()
+        other_rule = create_watch_rule(self.ctx, self.stack, name='other')
+        create_watch_data(self.ctx, other_rule,
+                          created_at=now - datetime.timedelta(seconds=30))
+        for age in (30, 20, 10):
+            create_watch_data(self.ctx, self.watch_rule,
+                              data={'age': age},
+                              created_at=now - datetime.timedelta(
+                                  seconds=age))
+
+        deleted = db_api.watch_data_delete_before(
+            self.ctx, self.watch_rule.id,
+            now - datetime.timedelta(seconds=15))
+        self.assertEqual(2, deleted)
+
+        watch_data = db_api.watch_data_get_all_by_watch_rule(
+            self.ctx, self.watch_rule.id)
+        self.assertEqual([10], [wd.data['age'] for wd in watch_data])
+        self.assertEqual(2, len(db_api.watch_data_get_all(self.ctx)))
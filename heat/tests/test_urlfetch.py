@@ -11,8 +11,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import tempfile
+
 from oslo.config import cfg
-import requests
 from requests import exceptions
 import six
 
@@ -21,8 +23,10 @@ from heat.tests import common
 
 
 class Response(object):
-    def __init__(self, buf=''):
+    def __init__(self, buf='', status_code=200, headers=None):
         self.buf = buf
+        self.status_code = status_code
+        self.headers = headers or {}
 
     def iter_content(self, chunk_size=1):
         while self.buf:
@@ -32,11 +36,31 @@ class Response(object):
     def raise_for_status(self):
         pass
 
+    def close(self):
+        pass
+
+
+class FileResponse(object):
+    def __init__(self, buf='', headers=None):
+        self.buf = buf
+        self.headers = headers or {}
+
+    def info(self):
+        return self.headers
+
+    def read(self):
+        return self.buf
+
+    def close(self):
+        pass
+
 
 class UrlFetchTest(common.HeatTestCase):
     def setUp(self):
         super(UrlFetchTest, self).setUp()
-        self.m.StubOutWithMock(requests, 'get')
+        self.m.StubOutWithMock(urlfetch._session, 'get')
+        urlfetch._cache.clear()
+        self.addCleanup(urlfetch._cache.clear)
 
     def test_file_scheme_default_behaviour(self):
         self.m.ReplayAll()
@@ -49,8 +73,7 @@ class UrlFetchTest(common.HeatTestCase):
         url = 'file:///etc/profile'
 
         self.m.StubOutWithMock(six.moves.urllib.request, 'urlopen')
-        six.moves.urllib.request.urlopen(url).AndReturn(
-            six.moves.cStringIO(data))
+        six.moves.urllib.request.urlopen(url).AndReturn(FileResponse(data))
         self.m.ReplayAll()
 
         self.assertEqual(data, urlfetch.get(url, allowed_schemes=['file']))
@@ -72,7 +95,8 @@ class UrlFetchTest(common.HeatTestCase):
         url = 'http://example.com/template'
         data = '{ "foo": "bar" }'
         response = Response(data)
-        requests.get(url, stream=True).AndReturn(response)
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(response)
         self.m.ReplayAll()
         self.assertEqual(data, urlfetch.get(url))
         self.m.VerifyAll()
@@ -81,7 +105,8 @@ class UrlFetchTest(common.HeatTestCase):
         url = 'https://example.com/template'
         data = '{ "foo": "bar" }'
         response = Response(data)
-        requests.get(url, stream=True).AndReturn(response)
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(response)
         self.m.ReplayAll()
         self.assertEqual(data, urlfetch.get(url))
         self.m.VerifyAll()
@@ -89,7 +114,8 @@ class UrlFetchTest(common.HeatTestCase):
     def test_http_error(self):
         url = 'http://example.com/template'
 
-        requests.get(url, stream=True).AndRaise(exceptions.HTTPError())
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndRaise(exceptions.HTTPError())
         self.m.ReplayAll()
 
         self.assertRaises(urlfetch.URLFetchError, urlfetch.get, url)
@@ -98,7 +124,8 @@ class UrlFetchTest(common.HeatTestCase):
     def test_non_exist_url(self):
         url = 'http://non-exist.com/template'
 
-        requests.get(url, stream=True).AndRaise(exceptions.Timeout())
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndRaise(exceptions.Timeout())
         self.m.ReplayAll()
 
         self.assertRaises(urlfetch.URLFetchError, urlfetch.get, url)
@@ -114,7 +141,8 @@ class UrlFetchTest(common.HeatTestCase):
         data = '{ "foo": "bar" }'
         response = Response(data)
         cfg.CONF.set_override('max_template_size', 500)
-        requests.get(url, stream=True).AndReturn(response)
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(response)
         self.m.ReplayAll()
         urlfetch.get(url)
         self.m.VerifyAll()
@@ -124,9 +152,101 @@ class UrlFetchTest(common.HeatTestCase):
         data = '{ "foo": "bar" }'
         response = Response(data)
         cfg.CONF.set_override('max_template_size', 5)
-        requests.get(url, stream=True).AndReturn(response)
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(response)
         self.m.ReplayAll()
         exception = self.assertRaises(urlfetch.URLFetchError,
                                       urlfetch.get, url)
         self.assertIn("Template exceeds", six.text_type(exception))
         self.m.VerifyAll()
+
+    def test_http_cached_max_age(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        response = Response(data, headers={'cache-control': 'max-age=60'})
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(response)
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_http_revalidated(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        response = Response(data, headers={'etag': '"abc"',
+                                           'last-modified': 'yesterday'})
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(response)
+        urlfetch._session.get(
+            url, stream=True,
+            headers={'If-None-Match': '"abc"',
+                     'If-Modified-Since': 'yesterday'}).AndReturn(
+                         Response(status_code=304,
+                                  headers={'etag': '"abc"'}))
+        urlfetch._session.get(
+            url, stream=True,
+            headers={'If-None-Match': '"abc"',
+                     'If-Modified-Since': 'yesterday'}).AndReturn(
+                         Response('{}', headers={'etag': '"def"'}))
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual('{}', urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_http_revalidated_without_validators(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        validators = {'If-Modified-Since': 'yesterday'}
+        response = Response(data, headers={'last-modified': 'yesterday'})
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(response)
+        urlfetch._session.get(url, stream=True,
+                              headers=validators).AndReturn(
+                                  Response(status_code=304))
+        urlfetch._session.get(url, stream=True,
+                              headers=validators).AndReturn(
+                                  Response(status_code=304))
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_http_no_store(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        headers = {'etag': '"abc"', 'cache-control': 'no-store'}
+        urlfetch._session.get(url, stream=True, headers={}).AndReturn(
+            Response(data, headers=headers))
+        urlfetch._session.get(url, stream=True,
+                              headers={}).AndReturn(Response(data))
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_file_scheme_cached(self):
+        self.m.ReplayAll()
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        os.write(fd, '{ "foo": "bar" }')
+        os.close(fd)
+        os.utime(path, (1000000000, 1000000000))
+        url = 'file://' + path
+
+        self.assertEqual('{ "foo": "bar" }',
+                         urlfetch.get(url, allowed_schemes=['file']))
+
+        # Same size and modification time, so the content is not re-read
+        with open(path, 'w') as f:
+            f.write('{ "foo": "baz" }')
+        os.utime(path, (1000000000, 1000000000))
+        self.assertEqual('{ "foo": "bar" }',
+                         urlfetch.get(url, allowed_schemes=['file']))
+
+        os.utime(path, (1000000100, 1000000100))
+        self.assertEqual('{ "foo": "baz" }',
+                         urlfetch.get(url, allowed_schemes=['file']))
+        self.m.VerifyAll()
@@ -327,6 +327,13 @@ class WatchRuleTest(common.HeatTestCase):
         self.assertEqual(watchrule.WatchRule.NODATA, dbwr.state)
         self.assertEqual(rule, dbwr.rule)
 
+        # updates also store when the rule was last evaluated
+        last = timeutils.utcnow() - datetime.timedelta(seconds=600)
+        self.wr.last_evaluated = last
+        self.wr.store()
+        dbwr = db_api.watch_rule_get_by_name(self.ctx, 'storetest')
+        self.assertEqual(last, dbwr.last_evaluated)
+
     def test_evaluate(self):
         rule = {'EvaluationPeriods': '1',
                 'MetricName': 'test_metric',
@@ -384,6 +391,44 @@ class WatchRuleTest(common.HeatTestCase):
         self.assertEqual(now, self.wr.last_evaluated)
         self.assertEqual([], actions)
 
+    def test_evaluate_stored_data(self):
+        rule = {'EvaluationPeriods': '1',
+                'MetricName': 'test_metric',
+                'Period': '300',
+                'Statistic': 'Maximum',
+                'ComparisonOperator': 'GreaterThanOrEqualToThreshold',
+                'Threshold': '30'}
+
+        now = timeutils.utcnow()
+        last = now - datetime.timedelta(seconds=300)
+        db_wr = db_api.watch_rule_create(self.ctx, {
+            'name': 'storedwatch',
+            'rule': rule,
+            'state': 'NODATA',
+            'stack_id': self.stack_id,
+            'last_evaluated': last})
+        for value, age in ((99, 400), (25, 150)):
+            db_api.watch_data_create(self.ctx, {
+                'data': {'test_metric': {'Value': value, 'Unit': 'Count'}},
+                'watch_rule_id': db_wr.id,
+                'created_at': now - datetime.timedelta(seconds=age)})
+
+        self.m.StubOutWithMock(timeutils, 'utcnow')
+        timeutils.utcnow().MultipleTimes().AndReturn(now)
+        self.m.ReplayAll()
+
+        # The sample from outside the period is ignored, then aged out
+        wr = watchrule.WatchRule.load(self.ctx, 'storedwatch')
+        self.assertIsNone(wr.watch_data)
+        actions = wr.evaluate()
+        self.assertEqual('NORMAL', wr.state)
+        self.assertEqual([], actions)
+
+        remaining = db_api.watch_data_get_all_by_watch_rule(self.ctx,
+                                                            db_wr.id)
+        self.assertEqual([25], [d.data['test_metric']['Value']
+                                for d in remaining])
+
     def test_evaluate_suspend(self):
         rule = {'EvaluationPeriods': '1',
                 'MetricName': 'test_metric',
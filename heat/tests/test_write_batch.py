@@ -0,0 +1,157 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo.config import cfg
+
+from heat.db import api as db_api
+from heat.engine import parser
+from heat.engine import resource
+from heat.engine import scheduler
+from heat.engine import template
+from heat.engine import write_batch
+from heat.tests import common
+from heat.tests import generic_resource as generic_rsrc
+from heat.tests import utils
+
+
+class WriteBatchTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(WriteBatchTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.patchobject(db_api, 'resource_update_batch')
+        self.patchobject(db_api, 'event_create_batch')
+
+    def test_coalesce_resource_updates(self):
+        batch = write_batch.WriteBatch(self.ctx, 10)
+        batch.resource_update(1, {'status': 'IN_PROGRESS', 'action': 'C'})
+        batch.resource_update(1, {'status': 'COMPLETE'})
+        batch.resource_update(2, {'status': 'FAILED'})
+        self.assertEqual(2, len(batch))
+        self.assertFalse(db_api.resource_update_batch.called)
+
+        batch.flush()
+
+        db_api.resource_update_batch.assert_called_once_with(
+            self.ctx, {1: {'status': 'COMPLETE', 'action': 'C'},
+                       2: {'status': 'FAILED'}})
+        self.assertFalse(db_api.event_create_batch.called)
+        self.assertEqual(0, len(batch))
+
+    def test_events_timestamped(self):
+        batch = write_batch.WriteBatch(self.ctx, 10)
+        batch.event_add({'resource_name': 'foo'})
+        batch.flush()
+
+        events = db_api.event_create_batch.call_args[0][1]
+        self.assertEqual(1, len(events))
+        self.assertEqual('foo', events[0]['resource_name'])
+        self.assertIsNotNone(events[0]['created_at'])
+
+    def test_flush_when_full(self):
+        batch = write_batch.WriteBatch(self.ctx, 2)
+        batch.event_add({'resource_name': 'foo'})
+        self.assertFalse(db_api.event_create_batch.called)
+        batch.resource_update(1, {'status': 'COMPLETE'})
+
+        self.assertEqual(1, db_api.resource_update_batch.call_count)
+        self.assertEqual(1, db_api.event_create_batch.call_count)
+        self.assertEqual(0, len(batch))
+
+    def test_flush_db_error(self):
+        db_api.resource_update_batch.side_effect = Exception('boom')
+        batch = write_batch.WriteBatch(self.ctx, 10)
+        batch.resource_update(1, {'status': 'COMPLETE'})
+
+        batch.flush()
+
+        self.assertEqual(0, len(batch))
+
+    def test_flushing_each_step(self):
+        batch = write_batch.WriteBatch(self.ctx, 10)
+
+        def task():
+            for i in range(3):
+                batch.resource_update(i, {'status': 'COMPLETE'})
+                yield
+
+        scheduler.TaskRunner(batch.flushing, task())()
+
+        self.assertEqual([mock.call(self.ctx, {i: {'status': 'COMPLETE'}})
+                          for i in range(3)],
+                         db_api.resource_update_batch.call_args_list)
+
+    def test_flushing_on_failure(self):
+        batch = write_batch.WriteBatch(self.ctx, 10)
+
+        def task():
+            batch.resource_update(1, {'status': 'FAILED'})
+            raise ValueError('boom')
+            yield
+
+        runner = scheduler.TaskRunner(batch.flushing, task())
+        self.assertRaises(ValueError, runner)
+
+        db_api.resource_update_batch.assert_called_once_with(
+            self.ctx, {1: {'status': 'FAILED'}})
+
+
+class StackWriteBatchTest(common.HeatTestCase):
+
+    tmpl = {
+        'HeatTemplateFormatVersion': '2012-12-12',
+        'Resources': {
+            'A': {'Type': 'GenericResourceType'},
+            'B': {'Type': 'GenericResourceType',
+                  'DependsOn': 'A'},
+        }
+    }
+
+    def setUp(self):
+        super(StackWriteBatchTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        resource._register_class('GenericResourceType',
+                                 generic_rsrc.GenericResource)
+
+    def _create_stack(self):
+        stack = parser.Stack(self.ctx, 'batch_test',
+                             template.Template(self.tmpl))
+        stack.store()
+        stack.create()
+        return stack
+
+    def test_create_batched(self):
+        self.patchobject(db_api, 'resource_update_batch',
+                         wraps=db_api.resource_update_batch)
+        stack = self._create_stack()
+
+        self.assertEqual((stack.CREATE, stack.COMPLETE), stack.state)
+        self.assertIsNone(stack.write_batch)
+        self.assertTrue(db_api.resource_update_batch.called)
+        for db_res in db_api.resource_get_all_by_stack(self.ctx,
+                                                       stack.id).values():
+            self.assertEqual(('CREATE', 'COMPLETE'),
+                             (db_res.action, db_res.status))
+        events = db_api.event_get_all_by_stack(self.ctx, stack.id)
+        self.assertEqual(4, len(events))
+
+    def test_create_unbatched(self):
+        cfg.CONF.set_override('max_batched_state_writes', 0)
+        self.patchobject(db_api, 'resource_update_batch')
+        stack = self._create_stack()
+
+        self.assertEqual((stack.CREATE, stack.COMPLETE), stack.state)
+        self.assertFalse(db_api.resource_update_batch.called)
+        events = db_api.event_get_all_by_stack(self.ctx, stack.id)
+        self.assertEqual(4, len(events))
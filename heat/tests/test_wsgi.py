@@ -179,6 +179,22 @@ class ResourceTest(common.HeatTestCase):
         self.assertRaises(AttributeError, resource.dispatch, Controller(),
                           'index', 'on', pants='off')
 
+    def test_resource_call_response_etag(self):
+        class Controller(object):
+            def index(self, req):
+                req.environ['heat.response_etag'] = 'abc123'
+                return {'foo': 'bar'}
+
+        actions = {'action': 'index'}
+        env = {'wsgiorg.routing_args': [None, actions]}
+        request = wsgi.Request.blank('/?ContentType=JSON', environ=env)
+        resource = wsgi.Resource(Controller(),
+                                 wsgi.JSONRequestDeserializer(),
+                                 None)
+        response = resource(request)
+        self.assertEqual('abc123', response.etag)
+        self.assertEqual({'foo': 'bar'}, json.loads(response.body))
+
     def test_resource_call_error_handle(self):
         class Controller(object):
             def delete(self, req, identity):